@@ -4,19 +4,33 @@ eventlet.monkey_patch(thread=False) # Thread=False avoids context errors
 
 
 from flask import Flask, request, jsonify, send_from_directory
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from dotenv import load_dotenv
 import os
 import time
 import json
 import base64
-from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-import threading    
 from flask_jwt_extended import JWTManager
 
 from models import Location, EventType, EventClass, Camera, Role
 from database import db
+from db_pool import engine_options, pool_metrics
+import migrate
+from rollups import register_rollup_listeners
+from reference_cache import reference_cache, conditional_json
+from role_cache import role_cache
+from executor import blocking_executor
+from stream_manager import StreamSupervisor, SubscriptionRegistry
+from frame_cache import FrameCache, RENDITIONS, DEFAULT_RENDITION
+from frame_renderer import MockFrameRenderer, MockFrameSource
+from stream_ingest import MJPEGFrameSource, STREAM_INGEST_ENABLED, is_ingestable
+from inference import DetectionStage, DETECTION_ENABLED
+from fall_confirmation import FallConfirmationEngine
+from event_writer import EventLogWriter
+from clip_recorder import ClipRecorder, CLIP_RECORDER_ENABLED
+from retention import RetentionJob, RETENTION_ENABLED, RETENTION_LEASE
+from metrics import registry as metrics_registry, instrument_app, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from cluster import ProducerElector, SOCKETIO_MESSAGE_QUEUE, connect_lease_store
 from routes.user_routes import user_routes
 from routes.camera_routes import camera_routes
 from routes.event_routes import event_routes
@@ -38,22 +52,23 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False # Disable to avoid overhead
 
 # --- Connection Pooling & Timeout ---
-# Set pool recycle to less than server's wait_timeout (e.g., 2 hours = 7200 seconds)
-app.config['SQLALCHEMY_POOL_RECYCLE'] = 7200 
-
-# Force a test (pre-ping) query on the connection before use for stale connection
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    "pool_pre_ping": True
-}
+# Pool size/overflow/timeout/recycle come from DB_POOL_* env vars; pre-ping
+# drops stale connections. See db_pool.py (and /api/db_pool for the numbers).
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 db.init_app(app)
 
+# Keep the hourly event rollups in step with event_logs changes
+register_rollup_listeners()
+
 jwt = JWTManager(app)
 
 # Set up CORS policies
+# With SOCKETIO_MESSAGE_QUEUE set, emits go through the broker to the clients of every worker (see cluster.py)
 socketio = SocketIO(
     app,
     cors_allowed_origins=["http://localhost:5173", "http://127.0.0.1:5173", "*"],
-    async_mode='eventlet'
+    async_mode='eventlet',
+    message_queue=SOCKETIO_MESSAGE_QUEUE
 )
 
 # Register Blueprints
@@ -62,118 +77,286 @@ app.register_blueprint(camera_routes, url_prefix='/api')
 app.register_blueprint(event_routes, url_prefix='/api')
 app.register_blueprint(settings_routes, url_prefix='/api')
 
-# --- MOCK Stream Functions (Simulate OpenVINO/Fuzzy Logic) ---
+# Latency and SQL statements per request for every route (served at /metrics)
+instrument_app(app)
 
-# Global flag to control the main stream thread loop
-MOCK_STREAM_RUNNING = True
+# --- Stream & Detection Pipeline ---
 
-# This dict will hold the last frame data for each camera
-MOCK_FRAME_DATA = {}
+# Latest source frame per camera plus its lazily encoded JPEG renditions
+frame_cache = FrameCache(run_blocking=blocking_executor.run)
 
-# Event to control the mock stream loop
-mock_stream_event = threading.Event()
+# Frame transports a client can ask for in its Socket.IO auth payload:
+# io(url, { auth: { frame_transport: 'binary' } }). Clients that don't ask get base64.
+FRAME_TRANSPORT_BINARY = 'binary'
+FRAME_TRANSPORT_BASE64 = 'base64'
 
-# Lock for thread-safe access to MOCK_FRAME_DATA
-frame_lock = threading.Lock()
-MOCK_STREAM_THREAD = None # Global thread object
+# Connected clients per transport
+FRAME_TRANSPORT_CLIENTS = {FRAME_TRANSPORT_BINARY: 0, FRAME_TRANSPORT_BASE64: 0}
+CLIENT_TRANSPORTS = {} # sid -> transport
 
-def generate_mock_frame(cam_id, cam_name):
-    """Generates a simple red JPEG frame with text overlay (Base64 encoded)."""
-    try:
-        from PIL import Image, ImageDraw, ImageFont 
-    except ImportError:
-        return base64.b64encode(b"MOCK STREAM ERROR: No Image Lib").decode('utf-8')
+# Which client shows which camera. Frames only go to the camera's rooms,
+# and a camera with no subscribers is not rendered at all.
+stream_subscriptions = SubscriptionRegistry()
 
-    # Create a simple dark red image (320x240)
-    img = Image.new('RGB', (320, 240), color='darkred')
-    d = ImageDraw.Draw(img)
+# Renders the mock frames at the 'full' rendition size (fonts and canvases are cached)
+frame_renderer = MockFrameRenderer(RENDITIONS['full']['size'])
 
-    # Add text overlay
-    text = f"AGAPAI MOCK STREAM\n{cam_name.upper()} (ID: {cam_id})\nTime: {time.strftime('%H:%M:%S')}"
+# Multi-worker mode: elects one producer per camera across the workers (set up below)
+cluster = None
 
-    # Simple font setup
-    try:
-        font = ImageFont.truetype("arial.ttf", 16)
-    except IOError:
-        font = ImageFont.load_default()
+def watched_rooms(cam_id):
+    """{(rendition, transport): subscribers} of a camera, on every worker in multi-worker mode."""
+    if cluster:
+        return cluster.room_counts(cam_id)
+    return stream_subscriptions.room_counts(cam_id)
 
-    d.text((10, 10), text, fill=(255, 255, 255), font=font)
+def camera_wanted(cam_id):
+    """Frames are needed while someone watches the camera, or always when detection is on."""
+    return DETECTION_ENABLED or bool(watched_rooms(cam_id))
 
-    # Encode as JPEG
-    buffer = BytesIO()
-    img.save(buffer, format='jpeg', quality=70)
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
-
-def mock_stream_loop():
-    """Continuously sends mock video frames and periodic incidents."""
-    print("Starting mock stream loop...")
-    incident_timer = time.time()
-    INCIDENT_INTERVAL = 240  # seconds
+def make_frame_source(cam_id, cam_name, stream_url):
+    """
+    Picks the frame source for a camera: its real MJPEG stream_url when it can
+    be ingested, otherwise the mock renderer.
+    """
+    if STREAM_INGEST_ENABLED and is_ingestable(stream_url):
+        return MJPEGFrameSource(
+            socketio, cam_id, stream_url, RENDITIONS['full']['size'],
+            is_wanted=camera_wanted
+        ).start()
+    return MockFrameSource(frame_renderer, cam_id, cam_name)
+
+def publish_frame(cam_id, frame_image):
+    """
+    Stores the latest source frame for a camera and sends it to the clients
+    subscribed to that camera, in the rendition and transport each one asked for.
+    Each rendition is encoded at most once per frame, however many clients get it.
+    Returns the number of payload bytes sent.
+    """
+    frame_cache.put_source(cam_id, frame_image)
+
+    bytes_sent = 0
+    for (rendition, transport), clients in watched_rooms(cam_id).items():
+        frame_jpeg = frame_cache.get(cam_id, rendition)
+        if frame_jpeg is None:
+            continue
+
+        if transport == FRAME_TRANSPORT_BINARY:
+            # Binary clients get the JPEG as a Socket.IO binary attachment
+            payload = frame_jpeg
+        else:
+            # Older clients still get a base64 string
+            payload = base64.b64encode(frame_jpeg).decode('utf-8')
+
+        socketio.emit('camera_frame', {
+            'cam_id': cam_id,  # <-- SEND THE DATABASE ID
+            'rendition': rendition,
+            'frame': payload
+        }, to=SubscriptionRegistry.room(cam_id, rendition, transport))
+        bytes_sent += len(payload) * clients
+
+    # After the emits, so the recorder can reuse the renditions just encoded for viewers
+    if clip_recorder:
+        clip_recorder.record(cam_id)
+    return bytes_sent
+
+# One producer per active camera, started on the first client connection
+stream_supervisor = StreamSupervisor(
+    app, socketio, make_frame_source, publish_frame,
+    is_wanted=camera_wanted,
+    on_camera_removed=lambda cam_id: forget_camera(cam_id),
+    # Enabled cameras come from the reference cache, not a query per sync;
+    # in multi-worker mode only the ones this worker was elected to produce
+    load_cameras=lambda: [
+        (cam['id'], cam['name'], cam['stream_url'])
+        for cam in reference_cache.snapshot().cameras
+        if cam['status'] and (cluster is None or cluster.owns(cam['id']))
+    ]
+)
+app.extensions['stream_supervisor'] = stream_supervisor
 
-    while MOCK_STREAM_RUNNING and not mock_stream_event.is_set():
-        
-        # 1. Generate and emit frames (for M-JPEG stream)
-        # Use app_context to allow database queries in this thread
-        with app.app_context():
-            try:
-                # Get all cameras from the database
-                cameras_from_db = Camera.query.all()
-                
-                if not cameras_from_db:
-                    # If no cameras in DB, print a waiting message
-                    print("Mock Stream: No cameras in database. Waiting...")
-                    socketio.sleep(5) # Wait 5 seconds before checking again
-                    continue
-
-                for cam in cameras_from_db:
-                    # Use cam.id as the cam_id
-                    frame_base64 = generate_mock_frame(cam.id, cam.cam_name)
-
-                    with frame_lock:
-                        MOCK_FRAME_DATA[cam.id] = frame_base64
-
-                    socketio.emit('camera_frame', {
-                        'cam_id': cam.id,  # <-- SEND THE DATABASE ID
-                        'frame': frame_base64
-                    })
-
-            except Exception as e:
-                print(f"Error in mock stream loop: {e}")
-
-        # 2. Simulate Periodic Incident Alert
-        current_time = time.time()
-        if current_time - incident_timer > INCIDENT_INTERVAL:
-            mock_incident = {
-                'type': 'Fall Detected',
-                'location': 'Sebastian', # Update this to use a real location
-                'timestamp': int(current_time)
-            }
-            socketio.emit('incident_alert', mock_incident)
-            print(f"MOCK ALERT: {mock_incident['type']} at {mock_incident['location']} sent.")
-            incident_timer = current_time
-
-        # Simulate ~10 FPS
-        socketio.sleep(0.1)
-
-    print("Mock stream loop finished.")
+def enabled_camera_ids():
+    with app.app_context():
+        return [cam['id'] for cam in reference_cache.snapshot().cameras if cam['status']]
+
+def reference_data_changed_elsewhere():
+    """Another worker changed cameras or locations."""
+    reference_cache.invalidate()
+    stream_supervisor.sync()
+
+if SOCKETIO_MESSAGE_QUEUE:
+    cluster = ProducerElector(
+        socketio, connect_lease_store(),
+        get_camera_ids=enabled_camera_ids,
+        get_local_rooms=stream_subscriptions.all_room_counts,
+        on_ownership_change=stream_supervisor.sync,
+        on_reference_change=reference_data_changed_elsewhere,
+        # Cluster-wide jobs that must run on one worker only
+        jobs=[RETENTION_LEASE] if RETENTION_ENABLED else []
+    )
+    app.extensions['cluster'] = cluster
+
+# Latest detections per camera: {cam_id: {'timestamp': ..., 'detections': [...]}}
+LATEST_DETECTIONS = {}
+
+# Confirms falls over several frames; one EventLog row + one alert per incident
+# Incident rows are inserted in batches in the background (the frame path never waits on MySQL)
+# In multi-worker mode each worker spools to its own file and claims the files of stopped workers
+event_writer = EventLogWriter(
+    app, socketio, run_blocking=blocking_executor.run,
+    node_id=cluster.node_id if cluster else None,
+    live_node_ids=cluster.known_live_node_ids if cluster else None
+)
+app.extensions['event_writer'] = event_writer
+
+# Last few seconds of every camera, so each incident gets a clip (EventLog.file_path)
+clip_recorder = ClipRecorder(socketio, frame_cache, run_blocking=blocking_executor.run) if CLIP_RECORDER_ENABLED else None
+app.extensions['clip_recorder'] = clip_recorder
+
+fall_engine = FallConfirmationEngine(app, socketio, event_writer=event_writer, clip_recorder=clip_recorder)
+app.extensions['fall_engine'] = fall_engine
+
+def handle_detections(cam_id, detections):
+    """Keeps the newest detections of a camera and feeds them to the fall engine."""
+    LATEST_DETECTIONS[cam_id] = {'timestamp': int(time.time()), 'detections': detections}
+    fall_engine.update(cam_id, detections)
+
+def forget_camera(cam_id):
+    """Drops everything kept in memory for a camera that was deleted or disabled."""
+    frame_cache.drop_camera(cam_id)
+    fall_engine.forget(cam_id)
+    if clip_recorder:
+        clip_recorder.forget(cam_id)
+    LATEST_DETECTIONS.pop(cam_id, None)
+
+# Archives/deletes old event_logs rows and clips once a day (see retention.py);
+# in multi-worker mode only on the worker holding the retention lease
+retention_job = RetentionJob(
+    app, socketio, db, run_blocking=blocking_executor.run,
+    is_leader=lambda: cluster is None or cluster.leads(RETENTION_LEASE)
+) if RETENTION_ENABLED else None
+app.extensions['retention_job'] = retention_job
+
+# Batches the newest frame of every running camera through the fall model
+detection_stage = DetectionStage(
+    socketio, frame_cache,
+    get_camera_ids=lambda: list(stream_supervisor.producers),
+    on_detections=handle_detections,
+    run_blocking=blocking_executor.run
+)
+app.extensions['detection_stage'] = detection_stage
+
+def start_pipeline():
+    """Starts the background tasks (no-ops once they are running)."""
+    if cluster:
+        cluster.start()
+    stream_supervisor.start()
+    event_writer.start()
+    if retention_job:
+        retention_job.start()
+    if DETECTION_ENABLED:
+        detection_stage.start()
+
+# --- Metrics (GET /metrics) ---
+# Counters the pipeline already keeps are read at scrape time, not on the hot path
+
+def producer_values(read):
+    return {(str(cam_id),): read(producer) for cam_id, (_, producer) in list(stream_supervisor.producers.items())}
+
+metrics_registry.callback(
+    'agapai_frames_emitted_total', 'Frames published to Socket.IO rooms.', ('cam_id',),
+    lambda: producer_values(lambda p: p.frames_published), kind='counter')
+metrics_registry.callback(
+    'agapai_frame_bytes_emitted_total', 'Frame payload bytes sent to clients.', ('cam_id',),
+    lambda: producer_values(lambda p: p.bytes_published), kind='counter')
+metrics_registry.callback(
+    'agapai_frames_dropped_total', 'Frames replaced in the queue before they were published.', ('cam_id',),
+    lambda: producer_values(lambda p: p.queue.dropped), kind='counter')
+metrics_registry.callback(
+    'agapai_frames_skipped_total', 'Producer ticks skipped because nobody watched the camera.', ('cam_id',),
+    lambda: producer_values(lambda p: p.frames_skipped), kind='counter')
+metrics_registry.callback(
+    'agapai_socketio_clients', 'Connected Socket.IO clients in this worker.', ('transport',),
+    lambda: {(transport,): count for transport, count in FRAME_TRANSPORT_CLIENTS.items()})
+metrics_registry.callback(
+    'agapai_db_pool_connections_in_use', 'Database connections checked out of the pool.', (),
+    lambda: {(): pool_metrics.in_use})
+metrics_registry.callback(
+    'agapai_db_pool_timeouts_total', 'Pool checkouts that timed out.', (),
+    lambda: {(): pool_metrics.timeouts}, kind='counter')
+metrics_registry.callback(
+    'agapai_event_writer_queue_depth', 'Event rows waiting to be written.', (),
+    lambda: {(): event_writer.queue.qsize()})
+metrics_registry.callback(
+    'agapai_executor_in_flight', 'Blocking calls running in the thread pool.', (),
+    lambda: {(): blocking_executor.in_flight})
 
 # --- SocketIO Event Handlers ---
 
 @socketio.on('connect')
 def handle_connect(auth=None):
-    # ...
-    global MOCK_STREAM_THREAD # Ensure you're modifying the global variable
-    with frame_lock:
-        # Start the background thread only if it hasn't been started yet
-        if MOCK_STREAM_THREAD is None:
-            print("Starting mock stream thread...")
-            MOCK_STREAM_THREAD = socketio.start_background_task(mock_stream_loop)
+    # Negotiate the frame transport (old clients send no auth and get base64)
+    requested = (auth or {}).get('frame_transport') if isinstance(auth, dict) else None
+    transport = FRAME_TRANSPORT_BINARY if requested == FRAME_TRANSPORT_BINARY else FRAME_TRANSPORT_BASE64
+    CLIENT_TRANSPORTS[request.sid] = transport
+    FRAME_TRANSPORT_CLIENTS[transport] += 1
+    emit('stream_options', {'frame_transport': transport})
+
+    start_pipeline()
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handles client disconnections."""
+    transport = CLIENT_TRANSPORTS.pop(request.sid, None)
+    if transport:
+        FRAME_TRANSPORT_CLIENTS[transport] -= 1
+    # Socket.IO leaves the rooms for us; just forget the subscriptions
+    stream_subscriptions.remove_client(request.sid)
     print(f'Client disconnected: {request.sid}')
 
+def _parse_cam_ids(data):
+    """Reads {'cam_ids': [1, 2, ...]} from a subscribe/unsubscribe payload."""
+    cam_ids = (data or {}).get('cam_ids', []) if isinstance(data, dict) else []
+    parsed = set()
+    for cam_id in cam_ids:
+        try:
+            parsed.add(int(cam_id))
+        except (TypeError, ValueError):
+            continue
+    return parsed
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    """
+    Joins the rooms of the cameras a client is currently showing.
+    Payload: { "cam_ids": [1, 2, 3], "rendition": "thumb" | "full" }
+    Subscribing again with another rendition switches the client over.
+    """
+    rendition = (data or {}).get('rendition') if isinstance(data, dict) else None
+    if rendition not in RENDITIONS:
+        rendition = DEFAULT_RENDITION
+
+    transport = CLIENT_TRANSPORTS.get(request.sid, FRAME_TRANSPORT_BASE64)
+    for cam_id in _parse_cam_ids(data):
+        old_room, new_room = stream_subscriptions.subscribe(request.sid, cam_id, rendition, transport)
+        if old_room:
+            leave_room(old_room)
+        if new_room:
+            join_room(new_room)
+    return {'status': 'success', 'cam_ids': sorted(stream_subscriptions.cameras_for(request.sid))}
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    """
+    Leaves the rooms of cameras that are no longer on screen.
+    Payload: { "cam_ids": [1, 2, 3] }
+    """
+    for cam_id in _parse_cam_ids(data):
+        room = stream_subscriptions.unsubscribe(request.sid, cam_id)
+        if room:
+            leave_room(room)
+    return {'status': 'success', 'cam_ids': sorted(stream_subscriptions.cameras_for(request.sid))}
+
 # --- Flask Routes (REST API & Main Entry Point) ---
 
 @app.route('/create_db')
@@ -182,6 +365,8 @@ def create_db():
     from models import Role, User, Location, EventType, EventClass, Camera, EventLog
     with app.app_context():
         db.create_all()
+        # create_all() already builds the current schema, so record the migrations as applied
+        migrate.stamp(db.engine)
     return "Database tables created!"
 
 @app.route('/seed_db')
@@ -229,6 +414,7 @@ def seed_db():
                 db.session.add(new_role)
 
             db.session.commit()
+            reference_cache.invalidate()
             
             print("Database seeding successful!")
             return "Database seeded with 1 Location, 1 Camera, 1 EventType, and 1 EventClass."
@@ -247,36 +433,96 @@ def serve_index(path):
 @app.route('/api/camera_status', methods=['GET'])
 def get_camera_status():
     """
-    Returns camera status from the DATABASE now.
+    Returns camera status from the reference cache (with ETag/304).
     This replaces the old mock route.
     """
     try:
-        cameras = Camera.query.all()
+        snapshot = reference_cache.snapshot()
         status_list = []
-        for cam in cameras:
+        for cam in snapshot.cameras:
             status_list.append({
-                'id': cam.id,
-                'location': cam.location.loc_name if cam.location else 'Unknown',
-                'status': 'Connected' if cam.cam_status else 'Disconnected'
+                'id': cam['id'],
+                'location': cam['location_name'] or 'Unknown',
+                'status': 'Connected' if cam['status'] else 'Disconnected'
             })
-        return jsonify({'status': 'success', 'cameras': status_list}), 200
+        return conditional_json(snapshot, {'status': 'success', 'cameras': status_list})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/stream_stats', methods=['GET'])
+def get_stream_stats():
+    """
+    Returns per-camera producer counters (frames, bytes/s, CPU per frame)
+    plus how many clients use each frame transport.
+    """
+    return jsonify({
+        'status': 'success',
+        'transports': FRAME_TRANSPORT_CLIENTS,
+        'frame_cache': frame_cache.stats(),
+        'executor': blocking_executor.stats(),
+        'detection': detection_stage.stats(),
+        'fall_confirmation': fall_engine.stats(),
+        'event_writer': event_writer.stats(),
+        'clip_recorder': clip_recorder.stats() if clip_recorder else None,
+        'reference_cache': reference_cache.stats(),
+        'role_cache': role_cache.stats(),
+        'cluster': cluster.stats() if cluster else None,
+        'producers': stream_supervisor.stats()
+    }), 200
+
+@app.route('/api/db_pool', methods=['GET'])
+def get_db_pool_stats():
+    """
+    Returns the connection pool settings and counters (checkout waits and
+    timeouts, connections in use, pre-ping failures) for sizing the pool.
+    """
+    return jsonify({'status': 'success', 'db_pool': pool_metrics.stats(db.engine)}), 200
+
+@app.route('/api/retention', methods=['GET'])
+def get_retention_stats():
+    """Returns the retention job's state and the report of its last run (rows and bytes reclaimed)."""
+    return jsonify({'status': 'success', 'retention': retention_job.stats() if retention_job else None}), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text format: request latency, SQL per request, frame timings and counters."""
+    return metrics_registry.render(), 200, {'Content-Type': METRICS_CONTENT_TYPE}
+
+@app.route('/api/detections', methods=['GET'])
+def get_detections():
+    """Returns the latest detections of every camera."""
+    return jsonify({
+        'status': 'success',
+        'detections': {str(cam_id): entry for cam_id, entry in LATEST_DETECTIONS.items()}
+    }), 200
+
 # --- Start Server ---
 
 if __name__ == '__main__':
-    print("Starting Flask server with SocketIO on port 5000...")
+    port = int(os.getenv('PORT', 5000))  # One port per worker in multi-worker mode
+    print(f"Starting Flask server with SocketIO on port {port}...")
     print("Eventlet applied. Using eventlet for asynchronous mode.")
     print(f"Async mode: {socketio.async_mode}")
 
+    # Replays rows spooled while the database was unreachable last time
+    event_writer.start()
+    # In multi-worker mode this worker may produce for other workers' clients, so start now
+    if cluster:
+        start_pipeline()
+
     try:
-        socketio.run(app, host='0.0.0.0', port=5000, debug=False, use_reloader=False)
+        socketio.run(app, host='0.0.0.0', port=port, debug=False, use_reloader=False)
     except KeyboardInterrupt:
         print("Server shutting down...")
     finally:
-        MOCK_STREAM_RUNNING = False
-        mock_stream_event.set()
-        if MOCK_STREAM_THREAD and MOCK_STREAM_THREAD.join():
-            MOCK_STREAM_THREAD.join()
+        if cluster:
+            cluster.stop()
+        stream_supervisor.stop()
+        detection_stage.stop()
+        if clip_recorder:
+            clip_recorder.stop()
+        if retention_job:
+            retention_job.stop()
+        event_writer.stop()
+        blocking_executor.shutdown()
         print("Server shutdown complete.")
\ No newline at end of file
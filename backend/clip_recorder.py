@@ -0,0 +1,384 @@
+# backend/clip_recorder.py
+import mmap
+import os
+import struct
+import time
+import traceback
+from array import array
+from datetime import datetime
+
+from frame_cache import RENDITIONS
+
+# --- Configuration ---
+CLIP_RECORDER_ENABLED = os.getenv('CLIP_RECORDER', 'true').lower() in ('1', 'true', 'yes')
+CLIP_PRE_SECONDS = float(os.getenv('CLIP_PRE_SECONDS', 10))    # Kept in memory before an incident
+CLIP_POST_SECONDS = float(os.getenv('CLIP_POST_SECONDS', 10))  # Recorded after it
+CLIP_FPS = float(os.getenv('CLIP_FPS', 5))                     # Frames per second stored in clips
+CLIP_RENDITION = os.getenv('CLIP_RENDITION', 'full')           # Size/quality, from frame_cache.RENDITIONS
+CLIP_SLOT_BYTES = int(os.getenv('CLIP_SLOT_BYTES', 96 * 1024)) # Largest JPEG a ring slot holds
+# Always-on pre-roll: encode CLIP_RENDITION at CLIP_FPS for every producing camera, watched
+# or not. Costs one JPEG encode per stored frame (about 1-2 ms of CPU at 640x480, i.e.
+# ~1% of a core per camera at 5 FPS). Off by default: the ring then holds only frames
+# viewers already had encoded, plus every frame from the moment a fall is suspected.
+CLIP_PREROLL = os.getenv('CLIP_PREROLL', 'false').lower() in ('1', 'true', 'yes')
+CLIP_DIR = os.getenv(
+    'CLIP_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'clips')
+)
+# Serving (see GET /api/event_logs/<id>/clip)
+CLIP_CHUNK_BYTES = int(os.getenv('CLIP_CHUNK_BYTES', 256 * 1024))  # Bytes per write to the socket
+CLIP_MAX_AGE = int(os.getenv('CLIP_MAX_AGE', 3600))                # Browser cache; clips never change
+CLIP_TOKEN_MAX_AGE = int(os.getenv('CLIP_TOKEN_MAX_AGE', 300))     # Seconds a clip URL's token is valid
+# Behind nginx: an internal location aliased to CLIP_DIR (e.g. '/protected-clips/').
+# The app then only checks the token and nginx sends the file with sendfile().
+CLIP_ACCEL_REDIRECT = os.getenv('CLIP_ACCEL_REDIRECT')
+
+
+class FrameRing:
+    """
+    The last `slots` JPEG frames of one camera, in ONE preallocated slab of
+    slots * slot_bytes bytes. Appending copies the frame into the next slot
+    (overwriting the oldest); nothing is allocated per frame. Frames larger
+    than a slot are skipped.
+    """
+
+    __slots__ = ('slot_bytes', 'slab', 'view', 'lengths', 'times', 'next', 'count')
+
+    def __init__(self, slots, slot_bytes):
+        self.slot_bytes = slot_bytes
+        self.slab = bytearray(slots * slot_bytes)
+        self.view = memoryview(self.slab)
+        self.lengths = array('I', [0] * slots)
+        self.times = array('d', [0.0] * slots)
+        self.next = 0   # Slot written next
+        self.count = 0  # Slots in use
+
+    @property
+    def slots(self):
+        return len(self.lengths)
+
+    def append(self, jpeg, timestamp):
+        """Stores a frame; returns False if it doesn't fit in a slot."""
+        size = len(jpeg)
+        if size > self.slot_bytes:
+            return False
+        start = self.next * self.slot_bytes
+        self.view[start:start + size] = jpeg
+        self.lengths[self.next] = size
+        self.times[self.next] = timestamp
+        self.next = (self.next + 1) % self.slots
+        self.count = min(self.count + 1, self.slots)
+        return True
+
+    def frames_since(self, since):
+        """Copies out [(timestamp, jpeg bytes)] taken at or after `since`, oldest first."""
+        frames = []
+        first = (self.next - self.count) % self.slots
+        for i in range(self.count):
+            slot = (first + i) % self.slots
+            if self.times[slot] >= since:
+                start = slot * self.slot_bytes
+                frames.append((self.times[slot], bytes(self.view[start:start + self.lengths[slot]])))
+        return frames
+
+
+def resolve_clip_path(file_path, clip_dir=CLIP_DIR):
+    """
+    Absolute path of an EventLog.file_path (relative to clip_dir), or None
+    if it would point outside clip_dir.
+    """
+    root = os.path.realpath(clip_dir)
+    path = os.path.realpath(os.path.join(root, file_path))
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return path
+
+
+class MappedFile:
+    """
+    Read-only file object over an mmap of a clip. read() copies just the
+    requested chunk out of the mapping, as bytes (WSGI servers accept
+    nothing else), so serving a range only reads the pages actually sent
+    and never holds more than one chunk in the Python heap.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._pos = 0
+
+    def __len__(self):
+        return len(self._map)
+
+    def read(self, size=-1):
+        end = len(self._map) if size is None or size < 0 else min(self._pos + size, len(self._map))
+        chunk = self._map[self._pos:end]
+        self._pos = end
+        return chunk
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._pos, os.SEEK_END: len(self._map)}[whence]
+        self._pos = max(0, min(base + offset, len(self._map)))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        self._map.close()
+
+
+class Clip:
+    """An incident clip: its pre-roll, then post-roll frames until ends_at."""
+
+    __slots__ = ('cam_id', 'path', 'frames', 'ends_at')
+
+    def __init__(self, cam_id, path, frames, ends_at):
+        self.cam_id = cam_id
+        self.path = path
+        self.frames = frames
+        self.ends_at = ends_at
+
+
+def write_mjpeg_avi(path, jpegs, fps, size):
+    """
+    Writes JPEG frames as a motion-JPEG AVI (RIFF 'AVI ' with an idx1 index),
+    which common desktop players open as is; the frames are not re-encoded.
+    Writes to a temporary file first so a half-written clip is never visible.
+    Returns the file size.
+    """
+    width, height = size
+    fps_milli = max(1, round(fps * 1000))  # dwRate / dwScale = fps
+    max_frame = max((len(jpeg) for jpeg in jpegs), default=0)
+
+    def chunk(fourcc, data):
+        return fourcc + struct.pack('<I', len(data)) + data + (b'\0' if len(data) % 2 else b'')
+
+    def list_chunk(list_type, *chunks):
+        return chunk(b'LIST', list_type + b''.join(chunks))
+
+    avih = struct.pack(
+        '<10I4I',
+        round(1_000_000 / fps),          # dwMicroSecPerFrame
+        round(max_frame * fps),          # dwMaxBytesPerSec
+        0,                               # dwPaddingGranularity
+        0x10,                            # dwFlags: AVIF_HASINDEX
+        len(jpegs),                      # dwTotalFrames
+        0,                               # dwInitialFrames
+        1,                               # dwStreams
+        max_frame,                       # dwSuggestedBufferSize
+        width, height,
+        0, 0, 0, 0                       # dwReserved
+    )
+    strh = struct.pack(
+        '<4s4sIHHIIIIIIIi4h',
+        b'vids', b'MJPG',
+        0,                               # dwFlags
+        0, 0,                            # wPriority, wLanguage
+        0,                               # dwInitialFrames
+        1000, fps_milli,                 # dwScale, dwRate
+        0,                               # dwStart
+        len(jpegs),                      # dwLength
+        max_frame,                       # dwSuggestedBufferSize
+        0xFFFFFFFF,                      # dwQuality (default)
+        0,                               # dwSampleSize
+        0, 0, width, height              # rcFrame
+    )
+    strf = struct.pack(
+        '<IiiHH4sIiiII',
+        40, width, height, 1, 24, b'MJPG', width * height * 3, 0, 0, 0, 0
+    )
+    hdrl = list_chunk(b'hdrl', chunk(b'avih', avih), list_chunk(b'strl', chunk(b'strh', strh), chunk(b'strf', strf)))
+
+    # movi data plus the idx1 entries (offsets count from the 'movi' fourcc)
+    movi_parts = [b'movi']
+    index = []
+    offset = 4
+    for jpeg in jpegs:
+        data = chunk(b'00dc', jpeg)
+        index.append(struct.pack('<4sIII', b'00dc', 0x10, offset, len(jpeg)))  # AVIIF_KEYFRAME
+        movi_parts.append(data)
+        offset += len(data)
+    movi = chunk(b'LIST', b''.join(movi_parts))
+    idx1 = chunk(b'idx1', b''.join(index))
+
+    body = b'AVI ' + hdrl + movi + idx1
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.part'
+    with open(tmp_path, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', len(body)) + body)
+    os.replace(tmp_path, path)
+    return 8 + len(body)
+
+
+class ClipRecorder:
+    """
+    Keeps up to the last CLIP_PRE_SECONDS of every producing camera in a
+    FrameRing and writes incident clips.
+
+    record(cam_id) is called for each published frame; at most CLIP_FPS of
+    them are stored, as the CLIP_RENDITION JPEG from the frame cache (so a
+    rendition viewers already asked for isn't encoded twice). A frame is
+    only encoded for the ring while the camera is armed (arm(), called when
+    a fall is suspected), while a clip collects its post-roll, or always
+    with preroll=True (CLIP_PREROLL); otherwise unwatched cameras cost no
+    encodes and their pre-roll starts at arm(). start_clip()
+    takes the pre-roll out of the ring, keeps collecting CLIP_POST_SECONDS
+    more, then a background task writes the AVI under clip_dir. It returns
+    the clip's path relative to clip_dir right away, for EventLog.file_path.
+
+    Memory is fixed per camera: ring_slots * slot_bytes (see stats()).
+    """
+
+    def __init__(self, socketio, frame_cache, run_blocking=None, clip_dir=CLIP_DIR,
+                 pre_seconds=CLIP_PRE_SECONDS, post_seconds=CLIP_POST_SECONDS, fps=CLIP_FPS,
+                 rendition=CLIP_RENDITION, slot_bytes=CLIP_SLOT_BYTES, preroll=CLIP_PREROLL):
+        if rendition not in RENDITIONS:
+            raise ValueError(f"CLIP_RENDITION must be one of {sorted(RENDITIONS)}, got '{rendition}'")
+        self.socketio = socketio
+        self.frame_cache = frame_cache
+        self.run_blocking = run_blocking or (lambda fn, *args: fn(*args))
+        self.clip_dir = clip_dir
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.fps = fps
+        self.rendition = rendition
+        self.slot_bytes = slot_bytes
+        self.preroll = preroll
+        self.ring_slots = max(1, int(pre_seconds * fps) + 1)
+        self.rings = {}        # cam_id -> FrameRing
+        self.last_frame = {}   # cam_id -> time of the last stored frame
+        self.active = {}       # cam_id -> Clip collecting post-roll
+        self.armed = {}        # cam_id -> time until which frames are encoded for the ring
+        self.frames_recorded = 0
+        self.oversize_frames = 0
+        self.clips_started = 0
+        self.clips_written = 0
+        self.clip_failures = 0
+        self.bytes_written = 0
+        self.last_write_ms = 0.0
+
+    @property
+    def interval(self):
+        return 1.0 / self.fps
+
+    def record(self, cam_id, now=None):
+        """Stores the camera's newest frame (called from publish_frame)."""
+        now = time.time() if now is None else now
+        if now - self.last_frame.get(cam_id, 0.0) < self.interval * 0.9:
+            return
+        if self.preroll or cam_id in self.active or now < self.armed.get(cam_id, 0.0):
+            jpeg = self.frame_cache.get(cam_id, self.rendition)
+        else:
+            jpeg = self.frame_cache.peek(cam_id, self.rendition)  # Free if viewers asked for it
+        if jpeg is None:
+            return
+        self.last_frame[cam_id] = now
+
+        ring = self.rings.get(cam_id)
+        if ring is None:
+            ring = self.rings[cam_id] = FrameRing(self.ring_slots, self.slot_bytes)
+        if ring.append(jpeg, now):
+            self.frames_recorded += 1
+        else:
+            self.oversize_frames += 1
+
+        clip = self.active.get(cam_id)
+        if clip and now <= clip.ends_at:
+            clip.frames.append((now, jpeg))  # bytes from the frame cache are immutable; no copy
+
+    def arm(self, cam_id, now=None):
+        """Encodes every stored frame of a camera for the next pre_seconds (a fall may be starting)."""
+        now = time.time() if now is None else now
+        self.armed[cam_id] = now + self.pre_seconds
+
+    def start_clip(self, cam_id, now=None):
+        """
+        Starts the clip of an incident on a camera and returns its path
+        relative to clip_dir. An incident during another one's post-roll
+        shares that clip.
+        """
+        now = time.time() if now is None else now
+        clip = self.active.get(cam_id)
+        if clip:
+            clip.ends_at = max(clip.ends_at, now + self.post_seconds)
+            return clip.path
+
+        ring = self.rings.get(cam_id)
+        frames = ring.frames_since(now - self.pre_seconds) if ring else []
+        stamp = datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S')
+        path = f"cam_{cam_id}/{stamp}_cam{cam_id}.avi"
+        clip = self.active[cam_id] = Clip(cam_id, path, frames, now + self.post_seconds)
+        self.clips_started += 1
+        self.socketio.start_background_task(self._finish_when_done, clip)
+        return path
+
+    def _finish_when_done(self, clip):
+        while time.time() < clip.ends_at:
+            self.socketio.sleep(max(0.05, clip.ends_at - time.time()))
+        self._finish(clip)
+
+    def _finish(self, clip):
+        if self.active.get(clip.cam_id) is clip:
+            del self.active[clip.cam_id]
+        if not clip.frames:
+            self.clip_failures += 1
+            print(f"Clip recorder: no frames for camera {clip.cam_id}, {clip.path} not written.")
+            return
+        # Play back at the rate the frames were actually taken
+        span = clip.frames[-1][0] - clip.frames[0][0]
+        fps = (len(clip.frames) - 1) / span if span > 0 else self.fps
+        started = time.monotonic()
+        try:
+            size = self.run_blocking(
+                write_mjpeg_avi, os.path.join(self.clip_dir, clip.path),
+                [jpeg for _, jpeg in clip.frames], fps, RENDITIONS[self.rendition]['size']
+            )
+        except Exception as e:
+            self.clip_failures += 1
+            print(f"Clip recorder: could not write {clip.path}: {e}")
+            print(traceback.format_exc())
+            return
+        self.clips_written += 1
+        self.bytes_written += size
+        self.last_write_ms = (time.monotonic() - started) * 1000
+        print(f"Clip recorder: wrote {clip.path} ({len(clip.frames)} frames, {size} bytes)")
+
+    def forget(self, cam_id):
+        """Frees a camera's ring (e.g. after it is deleted); its open clip is written as is."""
+        self.rings.pop(cam_id, None)
+        self.last_frame.pop(cam_id, None)
+        self.armed.pop(cam_id, None)
+        clip = self.active.get(cam_id)
+        if clip:
+            clip.ends_at = 0
+
+    def stop(self):
+        """Writes the clips still collecting post-roll."""
+        for clip in list(self.active.values()):
+            self._finish(clip)
+
+    def stats(self):
+        return {
+            'rendition': self.rendition,
+            'fps': self.fps,
+            'pre_seconds': self.pre_seconds,
+            'post_seconds': self.post_seconds,
+            'preroll': self.preroll,
+            'armed_cameras': sum(1 for until in self.armed.values() if until > time.time()),
+            'ring_slots': self.ring_slots,
+            'slot_bytes': self.slot_bytes,
+            'cameras': len(self.rings),
+            'ring_bytes': len(self.rings) * self.ring_slots * self.slot_bytes,
+            'frames_recorded': self.frames_recorded,
+            'oversize_frames': self.oversize_frames,
+            'active_clips': len(self.active),
+            'clips_started': self.clips_started,
+            'clips_written': self.clips_written,
+            'clip_failures': self.clip_failures,
+            'bytes_written': self.bytes_written,
+            'last_write_ms': round(self.last_write_ms, 2),
+        }
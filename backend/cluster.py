@@ -0,0 +1,306 @@
+# backend/cluster.py
+"""
+Multi-worker mode: several app processes (on one or more hosts) share the
+Socket.IO clients.
+
+Set SOCKETIO_MESSAGE_QUEUE to any backplane URL Flask-SocketIO accepts
+(redis://, rediss://, amqp://, kafka://, ...). Then:
+  - socketio.emit() in one process reaches the clients of every process
+    (each process fans the message out to its own clients);
+  - every camera gets exactly one producer in the whole cluster. The
+    processes hold per-camera leases in a Redis-protocol store
+    (CLUSTER_LEASE_URL, by default the message queue itself), each taking
+    at most its fair share; a lease that isn't renewed within
+    CLUSTER_LEASE_TTL moves to another process.
+  - each process publishes which (camera, rendition, transport) rooms its
+    clients watch, so the producer encodes exactly what some client in the
+    cluster needs, once.
+  - cluster-wide singleton jobs (retention) run on the one process that
+    holds the job's lease, taken and renewed the same way.
+
+Start each process with its own PORT behind a load balancer with sticky
+sessions (Socket.IO long-polling needs them). tools/broker_standin.py is a
+local broker for trying this out.
+"""
+import json
+import math
+import os
+import socket
+import time
+import traceback
+
+# --- Configuration ---
+SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+CLUSTER_LEASE_URL = os.getenv('CLUSTER_LEASE_URL') or SOCKETIO_MESSAGE_QUEUE
+CLUSTER_LEASE_TTL = float(os.getenv('CLUSTER_LEASE_TTL', 6))  # Seconds a lease outlives its last renewal
+CLUSTER_TICK = float(os.getenv('CLUSTER_TICK', 1.0))           # Seconds between renew/election rounds
+CLUSTER_NODE_ID = os.getenv('CLUSTER_NODE_ID') or f"{socket.gethostname()}-{os.getpid()}"
+
+KEY_PREFIX = 'agapai:cluster:'
+REFERENCE_KEY = KEY_PREFIX + 'reference_version'  # Bumped on every camera/location change
+NODES_KEY = KEY_PREFIX + 'nodes'  # Set of node ids; a node is live while its heartbeat key exists
+
+
+def connect_lease_store(url=CLUSTER_LEASE_URL):
+    """Redis client for the leases (needs the 'redis' package)."""
+    if not url or not url.split(':', 1)[0].startswith(('redis', 'rediss', 'unix')):
+        raise ValueError(
+            "Multi-worker mode needs a Redis-protocol lease store: set CLUSTER_LEASE_URL "
+            f"to a redis:// URL (message queue is '{SOCKETIO_MESSAGE_QUEUE}')."
+        )
+    import redis
+    return redis.Redis.from_url(url, socket_timeout=CLUSTER_LEASE_TTL / 2)
+
+
+class ProducerElector:
+    """
+    Decides which cameras this process produces frames for, and keeps the
+    cluster-wide view of who watches what.
+
+    Every tick it:
+      1. refreshes this node's heartbeat and its room counts,
+      2. renews its camera leases (and drops the ones it lost),
+      3. takes free leases while it holds fewer than its fair share
+         (cameras / live nodes, rounded up), and releases one per tick
+         while it holds more (after another node joined),
+      4. reads every node's room counts,
+      5. checks the shared reference-data version (camera changes made
+         on another node),
+      6. renews or tries to take the lease of each singleton job in `jobs`
+         (see leads()),
+    and calls on_ownership_change() when its set of cameras changed.
+    If the store can't be reached for a whole lease TTL, it gives up its
+    cameras and jobs (another node may have taken them over by then).
+    """
+
+    def __init__(self, socketio, store, get_camera_ids, get_local_rooms, on_ownership_change,
+                 on_reference_change=None, jobs=(), node_id=CLUSTER_NODE_ID, ttl=CLUSTER_LEASE_TTL,
+                 tick=CLUSTER_TICK):
+        self.socketio = socketio
+        self.store = store
+        self.get_camera_ids = get_camera_ids
+        self.get_local_rooms = get_local_rooms
+        self.on_ownership_change = on_ownership_change
+        self.on_reference_change = on_reference_change
+        self.jobs = tuple(jobs)
+        self.node_id = node_id
+        self.ttl = ttl
+        self.tick = tick
+        self.running = False
+        self.owned = set()
+        self.led_jobs = set()    # Singleton jobs this node runs
+        self.cluster_rooms = {}  # cam_id -> {(rendition, transport): count}, all nodes
+        self.live_nodes = 1
+        self.live_node_ids = [node_id]
+        self._reference_version = None
+        self._last_success = time.monotonic()
+        self._synced = False  # live_node_ids came from the store at least once
+        self.ticks = 0
+        self.store_errors = 0
+        self.leases_taken = 0
+        self.leases_lost = 0
+
+    # --- Keys ---
+
+    def _lease_key(self, cam_id):
+        return f"{KEY_PREFIX}producer:{cam_id}"
+
+    def _node_key(self, node_id):
+        return f"{KEY_PREFIX}node:{node_id}"
+
+    def _rooms_key(self, node_id):
+        return f"{KEY_PREFIX}rooms:{node_id}"
+
+    def _job_key(self, job):
+        return f"{KEY_PREFIX}job:{job}"
+
+    # --- Queries used by the stream pipeline ---
+
+    def owns(self, cam_id):
+        return cam_id in self.owned
+
+    def room_counts(self, cam_id):
+        """{(rendition, transport): subscribers} for a camera, across the cluster."""
+        counts = dict(self.cluster_rooms.get(cam_id, {}))
+        # This node's own rooms are always current (the shared copy lags a tick)
+        for key, count in self.get_local_rooms().get(cam_id, {}).items():
+            counts[key] = max(counts.get(key, 0), count)
+        return counts
+
+    def has_subscribers(self, cam_id):
+        return bool(self.room_counts(cam_id))
+
+    def leads(self, job):
+        """True while this node holds the lease of a singleton job (only one node in the cluster does)."""
+        return job in self.led_jobs
+
+    def known_live_node_ids(self):
+        """The live node ids as of the last tick, or None if the store hasn't answered within a lease TTL."""
+        if not self._synced or time.monotonic() - self._last_success >= self.ttl:
+            return None
+        return list(self.live_node_ids)
+
+    def reference_data_changed(self):
+        """Tells the other nodes to drop their cached reference data."""
+        try:
+            self._reference_version = str(self.store.incr(REFERENCE_KEY))
+        except Exception as e:
+            self.store_errors += 1
+            print(f"Cluster: could not publish the reference data change: {e}")
+
+    # --- Loop ---
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        print(f"Starting cluster elector as node '{self.node_id}' (lease TTL {self.ttl}s)...")
+        self.socketio.start_background_task(self._loop)
+
+    def stop(self):
+        """Releases this node's leases so other nodes take over at once."""
+        self.running = False
+        try:
+            keys = [self._lease_key(cam_id) for cam_id in self.owned] + [self._job_key(job) for job in self.led_jobs]
+            for key in keys:
+                if self._get(key) == self.node_id:
+                    self.store.delete(key)
+            self.store.delete(self._node_key(self.node_id), self._rooms_key(self.node_id))
+            self.store.srem(NODES_KEY, self.node_id)
+        except Exception as e:
+            print(f"Cluster: could not release leases: {e}")
+        self.owned = set()
+        self.led_jobs = set()
+
+    def _loop(self):
+        while self.running:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error in cluster elector: {e}")
+                print(traceback.format_exc())
+            self.socketio.sleep(self.tick)
+
+    def _get(self, key):
+        value = self.store.get(key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def run_once(self):
+        before = set(self.owned)
+        try:
+            self._sync_with_store()
+            self._last_success = time.monotonic()
+            self._synced = True
+        except Exception as e:
+            self.store_errors += 1
+            print(f"Cluster: lease store unavailable: {e}")
+            if time.monotonic() - self._last_success >= self.ttl and (self.owned or self.led_jobs):
+                print(f"Cluster: giving up {len(self.owned)} camera(s) and {len(self.led_jobs)} job(s) "
+                      f"after {self.ttl}s without the store.")
+                self.owned = set()
+                self.led_jobs = set()
+        self.ticks += 1
+        if self.owned != before:
+            self.on_ownership_change()
+
+    def _sync_with_store(self):
+        ttl_ms = int(self.ttl * 1000)
+        store = self.store
+
+        # 1. Heartbeat and this node's rooms
+        local_rooms = {
+            str(cam_id): [[rendition, transport, count] for (rendition, transport), count in rooms.items()]
+            for cam_id, rooms in self.get_local_rooms().items()
+        }
+        store.set(self._node_key(self.node_id), '1', px=ttl_ms)
+        store.set(self._rooms_key(self.node_id), json.dumps(local_rooms), px=ttl_ms)
+        # Live nodes from the membership set (no KEYS scan); members whose
+        # heartbeat expired are removed
+        store.sadd(NODES_KEY, self.node_id)
+        members = sorted(m.decode() if isinstance(m, bytes) else m for m in store.smembers(NODES_KEY))
+        beats = store.mget([self._node_key(node_id) for node_id in members])
+        self.live_node_ids = [node_id for node_id, beat in zip(members, beats) if beat]
+        dead = [node_id for node_id, beat in zip(members, beats) if not beat]
+        if dead:
+            store.srem(NODES_KEY, *dead)
+        self.live_nodes = max(1, len(self.live_node_ids))
+
+        # 2. Renew held leases, drop lost ones and cameras that went away
+        cameras = set(self.get_camera_ids())
+        for cam_id in sorted(self.owned):
+            key = self._lease_key(cam_id)
+            if cam_id not in cameras:
+                if self._get(key) == self.node_id:
+                    store.delete(key)
+                self.owned.discard(cam_id)
+            elif self._get(key) == self.node_id:
+                # Note: GET then PEXPIRE isn't atomic; at worst a lease taken over
+                # in between is extended once and we step down on the next tick.
+                store.pexpire(key, ttl_ms)
+            else:
+                self.owned.discard(cam_id)
+                self.leases_lost += 1
+                print(f"Cluster: lost the producer lease for camera {cam_id}")
+
+        # 3. Hand back one camera above the fair share (a node joined), then
+        #    take free leases up to it
+        fair_share = math.ceil(len(cameras) / self.live_nodes) if cameras else 0
+        if len(self.owned) > fair_share:
+            cam_id = max(self.owned)
+            if self._get(self._lease_key(cam_id)) == self.node_id:
+                store.delete(self._lease_key(cam_id))
+            self.owned.discard(cam_id)
+            print(f"Cluster: handing camera {cam_id} to another node")
+        for cam_id in sorted(cameras - self.owned):
+            if len(self.owned) >= fair_share:
+                break
+            if store.set(self._lease_key(cam_id), self.node_id, nx=True, px=ttl_ms):
+                self.owned.add(cam_id)
+                self.leases_taken += 1
+                print(f"Cluster: this node now produces camera {cam_id}")
+
+        # 4. Everyone's rooms
+        merged = {}
+        room_keys = [self._rooms_key(node_id) for node_id in self.live_node_ids]
+        for raw in (store.mget(room_keys) if room_keys else []):
+            if not raw:
+                continue
+            for cam_id, rooms in json.loads(raw).items():
+                cam_rooms = merged.setdefault(int(cam_id), {})
+                for rendition, transport, count in rooms:
+                    cam_rooms[(rendition, transport)] = cam_rooms.get((rendition, transport), 0) + count
+        self.cluster_rooms = merged
+
+        # 5. Reference data changed on another node?
+        version = self._get(REFERENCE_KEY)
+        if version != self._reference_version:
+            if self._reference_version is not None and self.on_reference_change:
+                self.on_reference_change()
+            self._reference_version = version
+
+        # 6. Singleton jobs
+        for job in self.jobs:
+            key = self._job_key(job)
+            if job in self.led_jobs:
+                if self._get(key) == self.node_id:
+                    store.pexpire(key, ttl_ms)
+                    continue
+                self.led_jobs.discard(job)
+                print(f"Cluster: lost the lease of job '{job}'")
+            if store.set(key, self.node_id, nx=True, px=ttl_ms):
+                self.led_jobs.add(job)
+                print(f"Cluster: this node now runs job '{job}'")
+
+    def stats(self):
+        return {
+            'node_id': self.node_id,
+            'running': self.running,
+            'live_nodes': self.live_nodes,
+            'owned_cameras': sorted(self.owned),
+            'led_jobs': sorted(self.led_jobs),
+            'watched_cameras': sorted(self.cluster_rooms),
+            'ticks': self.ticks,
+            'leases_taken': self.leases_taken,
+            'leases_lost': self.leases_lost,
+            'store_errors': self.store_errors,
+        }
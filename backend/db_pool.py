@@ -0,0 +1,168 @@
+# backend/db_pool.py
+"""
+Database connection pool: configuration and instrumentation.
+
+app.py runs eventlet with thread=False, so SQLAlchemy's QueuePool waits on a
+real threading.Condition: a request that has to wait for a free connection
+freezes the whole hub (streams included) and, since the green threads
+holding connections can't run to return them, times out. GreenQueuePool
+waits by sleeping (green under eventlet) instead, and times each checkout.
+
+Size the pool from /api/db_pool: DB_POOL_SIZE should cover the usual
+max_in_use, DB_MAX_OVERFLOW the peaks, and (size + overflow) times the
+number of processes must stay below MySQL's max_connections.
+"""
+import os
+import time
+
+from sqlalchemy import event, exc, make_url
+from sqlalchemy.pool import QueuePool
+
+# --- Configuration ---
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))             # Connections kept open
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))      # Extra connections under load
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))    # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 7200))    # Keep below the server's wait_timeout
+
+WAIT_POLL_INTERVAL = 0.005  # Seconds between checks while the pool is exhausted
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)  # Upper bounds of the wait histogram
+
+
+class PoolMetrics:
+    """Counters fed by GreenQueuePool and the pool events."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_ms_total = 0.0  # Wait + new connection + pre-ping
+        self.checkout_ms_max = 0.0
+        self.waits = 0                # Checkouts that found the pool exhausted
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.timeouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.connects = 0             # New DBAPI connections opened
+        self.invalidations = 0
+        self.preping_failures = 0     # Dead connections found on checkout
+
+    def record_wait(self, ms):
+        self.waits += 1
+        self.wait_ms_total += ms
+        self.wait_ms_max = max(self.wait_ms_max, ms)
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if ms <= bound:
+                self.wait_buckets[i] += 1
+                return
+        self.wait_buckets[-1] += 1
+
+    def record_checkout(self, ms):
+        self.checkouts += 1
+        self.checkout_ms_total += ms
+        self.checkout_ms_max = max(self.checkout_ms_max, ms)
+
+    def stats(self, engine=None):
+        stats = {
+            'config': {
+                'pool_size': DB_POOL_SIZE,
+                'max_overflow': DB_MAX_OVERFLOW,
+                'timeout_seconds': DB_POOL_TIMEOUT,
+                'recycle_seconds': DB_POOL_RECYCLE,
+            },
+            'checkouts': self.checkouts,
+            'avg_checkout_ms': round(self.checkout_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+            'max_checkout_ms': round(self.checkout_ms_max, 3),
+            'waits': self.waits,
+            'avg_wait_ms': round(self.wait_ms_total / self.waits, 3) if self.waits else 0.0,
+            'max_wait_ms': round(self.wait_ms_max, 3),
+            # [{'le_ms': upper bound (None = above the last one), 'count': waits}]
+            'wait_histogram': [
+                {'le_ms': bound, 'count': count}
+                for bound, count in zip(list(WAIT_BUCKETS_MS) + [None], self.wait_buckets)
+            ],
+            'timeouts': self.timeouts,
+            'in_use': self.in_use,
+            'max_in_use': self.max_in_use,
+            'connects': self.connects,
+            'invalidations': self.invalidations,
+            'preping_failures': self.preping_failures,
+        }
+        pool = engine.pool if engine is not None else None
+        if isinstance(pool, QueuePool):
+            stats['pool'] = {
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+            }
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+class GreenQueuePool(QueuePool):
+    """
+    QueuePool that waits for a free connection cooperatively (time.sleep is
+    green once eventlet has patched it) and records checkout timings.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        if self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow:
+            deadline = started + self._timeout
+            while self.checkedout() >= self.size() + self._max_overflow:
+                if time.perf_counter() >= deadline:
+                    pool_metrics.timeouts += 1
+                    raise exc.TimeoutError(
+                        f"QueuePool limit of size {self.size()} overflow {self._max_overflow} reached, "
+                        f"connection timed out, timeout {self._timeout:.2f}"
+                    )
+                time.sleep(WAIT_POLL_INTERVAL)
+            pool_metrics.record_wait((time.perf_counter() - started) * 1000)
+
+        connection = super().connect()
+        pool_metrics.record_checkout((time.perf_counter() - started) * 1000)
+        return connection
+
+
+@event.listens_for(GreenQueuePool, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.connects += 1
+
+
+@event.listens_for(GreenQueuePool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.in_use += 1
+    pool_metrics.max_in_use = max(pool_metrics.max_in_use, pool_metrics.in_use)
+
+
+@event.listens_for(GreenQueuePool, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.in_use = max(0, pool_metrics.in_use - 1)
+
+
+@event.listens_for(GreenQueuePool, 'invalidate')
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_metrics.invalidations += 1
+    # Pre-ping (and other checkout-time disconnect checks) raise DisconnectionError
+    if isinstance(exception, exc.DisconnectionError):
+        pool_metrics.preping_failures += 1
+
+
+def engine_options(database_url):
+    """SQLALCHEMY_ENGINE_OPTIONS for the app."""
+    options = {
+        'pool_pre_ping': True,  # Test connections before use (drops stale ones)
+        'pool_recycle': DB_POOL_RECYCLE,
+    }
+    url = make_url(database_url) if database_url else None
+    # In-memory SQLite (tests) needs its own single-connection pool
+    if url is not None and not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+        options.update({
+            'poolclass': GreenQueuePool,
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+        })
+    return options
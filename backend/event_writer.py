@@ -0,0 +1,380 @@
+# backend/event_writer.py
+import json
+import os
+import re
+import time
+import traceback
+from datetime import datetime
+
+from eventlet.queue import LightQueue, Empty, Full
+from eventlet.semaphore import Semaphore
+from sqlalchemy import insert
+
+from database import db
+from models import EventLog
+from rollups import apply_new_events
+
+# --- Configuration ---
+EVENT_WRITER_BATCH_SIZE = int(os.getenv('EVENT_WRITER_BATCH_SIZE', 200))        # Rows per INSERT
+EVENT_WRITER_FLUSH_INTERVAL = float(os.getenv('EVENT_WRITER_FLUSH_INTERVAL', 0.5))  # Max seconds a row waits
+EVENT_WRITER_MAX_QUEUE = int(os.getenv('EVENT_WRITER_MAX_QUEUE', 10000))        # Rows held in memory
+EVENT_WRITER_RETRY_INTERVAL = float(os.getenv('EVENT_WRITER_RETRY_INTERVAL', 5.0))  # After a DB failure
+EVENT_WRITER_SPOOL_PATH = os.getenv(
+    'EVENT_WRITER_SPOOL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spool', 'event_logs.jsonl')
+)
+EVENT_WRITER_ORPHAN_CHECK = float(os.getenv('EVENT_WRITER_ORPHAN_CHECK', 60))  # Seconds between orphan spool scans
+
+
+def node_spool_path(path, node_id):
+    """A cluster node's own spool file: event_logs.jsonl -> event_logs.<node id>.jsonl."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{re.sub(r'[^A-Za-z0-9_-]', '_', node_id)}{ext}"
+
+
+def orphan_spools(shared_path, own_path, live_node_ids):
+    """Spool and replay files next to shared_path that belong to neither own_path nor a live node."""
+    folder = os.path.dirname(shared_path)
+    root, ext = os.path.splitext(os.path.basename(shared_path))
+    pattern = re.compile(rf"{re.escape(root)}(\.[A-Za-z0-9_-]+)?{re.escape(ext)}(\.replay)?")
+    live = {node_spool_path(shared_path, node_id) for node_id in live_node_ids}
+    live.add(own_path)
+    try:
+        names = sorted(os.listdir(folder))
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(folder, name) for name in names
+        if pattern.fullmatch(name) and os.path.join(folder, name).removesuffix('.replay') not in live
+    ]
+
+
+def append_spool(path, rows):
+    """Appends rows to a JSONL spool file and fsyncs it. Raises OSError if it can't."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(dict(row, timestamp=row['timestamp'].isoformat())) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_spool(path):
+    """The rows of a spool file (corrupt lines are skipped)."""
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+                row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+                rows.append(row)
+            except (ValueError, KeyError, TypeError):
+                print(f"Event log writer: skipping corrupt spool line: {line[:80]!r}")
+    return rows
+
+
+class EventLogWriter:
+    """
+    Write-behind queue for EventLog inserts.
+
+    enqueue() only puts the row in a bounded in-memory queue, so the frame
+    path never waits on the database. A background task takes up to
+    batch_size rows (or whatever arrived within flush_interval) and writes
+    them with one multi-row INSERT, plus the matching rollup update, in one
+    transaction.
+
+    Rows that can't go to the database - it is unreachable, or the queue is
+    full - are appended to a local JSONL spool file (fsynced). Spool reads
+    and writes go through `run_blocking(fn, *args)` (blocking_executor.run
+    in the app), and rows that overflow the queue are spooled by a
+    background task, so enqueue() never waits on the disk either. The spool
+    is replayed when the database answers again and on the next start.
+    Replay is at-least-once: a crash in the middle of a replay, or a replay
+    whose leftover rows can't be spooled again, can insert a batch twice.
+
+    In multi-worker mode every node has its own spool file (node_spool_path),
+    so no two processes append to or replay the same file. A node that
+    stopped leaves its file behind (the default node id changes on every
+    restart); every EVENT_WRITER_ORPHAN_CHECK seconds a writer claims one
+    such file - of a node that `live_node_ids()` doesn't list, or the
+    single-process spool - by renaming it to its own replay file, which only
+    one node can do. live_node_ids() returns None while the live nodes are
+    unknown, and nothing is claimed then.
+    """
+
+    def __init__(self, app, socketio, batch_size=EVENT_WRITER_BATCH_SIZE,
+                 flush_interval=EVENT_WRITER_FLUSH_INTERVAL, max_queue=EVENT_WRITER_MAX_QUEUE,
+                 retry_interval=EVENT_WRITER_RETRY_INTERVAL, spool_path=EVENT_WRITER_SPOOL_PATH,
+                 run_blocking=None, node_id=None, live_node_ids=None,
+                 orphan_check_interval=EVENT_WRITER_ORPHAN_CHECK):
+        self.app = app
+        self.socketio = socketio
+        self.run_blocking = run_blocking or (lambda fn, *args: fn(*args))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.shared_spool_path = spool_path
+        self.node_id = node_id
+        self.spool_path = node_spool_path(spool_path, node_id) if node_id else spool_path
+        self.replay_path = self.spool_path + '.replay'
+        self.live_node_ids = live_node_ids
+        self.orphan_check_interval = orphan_check_interval
+        self._orphan_check_at = 0.0  # monotonic time of the next orphan spool scan
+        self.queue = LightQueue(maxsize=max_queue)
+        self.overflow = []             # Rows that found the queue full, waiting to be spooled
+        self._overflow_task = False
+        self._spool_lock = Semaphore()  # One spool write at a time (appends from pool threads could interleave)
+        self.running = False
+        self._retry_at = 0.0  # monotonic time before which the DB is not tried again
+        # Counters
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_depth = 0
+        self.queue_full = 0     # Rows that went to the spool because the queue was full
+        self.spooled = 0
+        self.replayed = 0
+        self.orphans_claimed = 0
+        self.dropped = 0        # Rows lost (the spool could not be written either)
+        self.db_failures = 0
+
+    # --- Producer side ---
+
+    def enqueue(self, cam_id, event_class_id, event_status='unacknowledged', file_path=None, timestamp=None):
+        """
+        Queues one event_logs row. Never blocks on the database. The timestamp
+        is taken now, so a delayed insert still records when it happened.
+        Returns False if the row went straight to the spool (queue full).
+        """
+        row = {
+            'timestamp': timestamp or datetime.now().replace(microsecond=0),
+            'cam_id': cam_id,
+            'event_class_id': event_class_id,
+            'event_status': event_status,
+            'file_path': file_path,
+        }
+        self.enqueued += 1
+        try:
+            self.queue.put_nowait(row)
+        except Full:
+            self.queue_full += 1
+            if len(self.overflow) >= self.queue.maxsize:
+                # The spool can't keep up either
+                self.dropped += 1
+                return False
+            self.overflow.append(row)
+            if not self._overflow_task:
+                self._overflow_task = True
+                self.socketio.start_background_task(self._spool_overflow)
+            return False
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    # --- Background task ---
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        print(f"Starting event log writer (batch <= {self.batch_size}, every {self.flush_interval}s)...")
+        self.socketio.start_background_task(self._loop)
+
+    def stop(self):
+        """Stops the task and writes (or spools) whatever is still queued."""
+        self.running = False
+        if self.overflow:
+            rows, self.overflow = self.overflow, []
+            self._spool(rows)
+        remaining = self._drain(self.queue.qsize())
+        for start in range(0, len(remaining), self.batch_size):
+            self._write(remaining[start:start + self.batch_size])
+
+    def _loop(self):
+        while self.running:
+            try:
+                if self.node_id and time.monotonic() >= self._orphan_check_at:
+                    self._orphan_check_at = time.monotonic() + self.orphan_check_interval
+                    self.claim_orphan_spool()
+                if self.spool_pending() and time.monotonic() >= self._retry_at:
+                    self.replay_spool()
+                batch = self._next_batch()
+                if batch:
+                    self._write(batch)
+            except Exception as e:
+                print(f"Error in event log writer: {e}")
+                print(traceback.format_exc())
+                self.socketio.sleep(self.flush_interval)
+
+    def _next_batch(self):
+        """Waits for the first row, then up to flush_interval for the batch to fill."""
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except Empty:
+                break
+        return batch
+
+    def _drain(self, limit):
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self.queue.get_nowait())
+            except Empty:
+                break
+        return rows
+
+    def _write(self, rows):
+        """Inserts a batch, or spools it if the database is (or just became) unavailable."""
+        if time.monotonic() < self._retry_at:
+            self._spool(rows)
+            return
+        try:
+            self._insert(rows)
+        except Exception as e:
+            self.db_failures += 1
+            self._retry_at = time.monotonic() + self.retry_interval
+            print(f"Event log writer: database write failed ({e}); spooling {len(rows)} row(s).")
+            self._spool(rows)
+            return
+        self.written += len(rows)
+
+    def _insert(self, rows):
+        """One multi-row INSERT plus the rollup update, in one transaction."""
+        started = time.monotonic()
+        with self.app.app_context():
+            try:
+                conn = db.session.connection()
+                conn.execute(insert(EventLog.__table__).values(rows))
+                apply_new_events(conn, rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+        self.batches += 1
+        self.last_batch_size = len(rows)
+        self.last_flush_ms = (time.monotonic() - started) * 1000
+
+    # --- Spool ---
+
+    def spool_pending(self):
+        return os.path.exists(self.spool_path) or os.path.exists(self.replay_path)
+
+    def claim_orphan_spool(self):
+        """
+        Takes over one orphan spool file as this node's replay file (renames
+        are atomic, so one node wins each file). Returns its old path, or None.
+        """
+        if os.path.exists(self.replay_path):
+            return None  # Claim the next one after this replay
+        live_ids = self.live_node_ids() if self.live_node_ids else None
+        if live_ids is None:
+            return None
+        for path in self.run_blocking(orphan_spools, self.shared_spool_path, self.spool_path, live_ids):
+            try:
+                os.replace(path, self.replay_path)
+            except FileNotFoundError:
+                continue  # Another node claimed it first
+            self.orphans_claimed += 1
+            print(f"Event log writer: claimed orphan spool {path} for replay.")
+            return path
+        return None
+
+    def _spool_overflow(self):
+        """Background task: spools the rows enqueue() couldn't queue."""
+        try:
+            while self.overflow:
+                rows, self.overflow = self.overflow, []
+                self._spool(rows)
+        finally:
+            self._overflow_task = False
+
+    def _append_spool(self, rows):
+        """Appends rows to the spool off the event loop. Raises OSError if it can't."""
+        with self._spool_lock:
+            self.run_blocking(append_spool, self.spool_path, rows)
+        self.spooled += len(rows)
+
+    def _spool(self, rows):
+        try:
+            self._append_spool(rows)
+        except OSError as e:
+            self.dropped += len(rows)
+            print(f"Event log writer: could not spool {len(rows)} row(s), they are lost: {e}")
+
+    def replay_spool(self):
+        """
+        Inserts the spooled rows in batches. Rows not written because the
+        database failed again go back to the spool; if even that fails, the
+        replay file is kept for the next replay. Returns the rows written.
+        """
+        if not os.path.exists(self.replay_path):
+            if not os.path.exists(self.spool_path):
+                return 0
+            # New failures keep appending to spool_path while this file is replayed
+            with self._spool_lock:
+                os.replace(self.spool_path, self.replay_path)
+
+        rows = self.run_blocking(read_spool, self.replay_path)
+
+        written = 0
+        keep_replay_file = False
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                self._insert(batch)
+            except Exception as e:
+                self.db_failures += 1
+                self._retry_at = time.monotonic() + self.retry_interval
+                print(f"Event log writer: spool replay failed ({e}); will retry.")
+                try:
+                    self._append_spool(rows[start:])
+                except OSError as spool_error:
+                    # Replaying the whole file again later may duplicate the rows already written
+                    keep_replay_file = True
+                    print(f"Event log writer: could not re-spool {len(rows) - start} row(s) ({spool_error}); "
+                          f"keeping {self.replay_path} for the next replay.")
+                break
+            written += len(batch)
+        if not keep_replay_file:
+            os.remove(self.replay_path)
+
+        self.replayed += written
+        self.written += written
+        if written:
+            print(f"Event log writer: replayed {written} spooled row(s).")
+        return written
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'queue_depth': self.queue.qsize(),
+            'max_queue': self.queue.maxsize,
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'batches': self.batches,
+            'last_batch_size': self.last_batch_size,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'queue_full': self.queue_full,
+            'overflow_pending': len(self.overflow),
+            'spooled': self.spooled,
+            'replayed': self.replayed,
+            'orphans_claimed': self.orphans_claimed,
+            'dropped': self.dropped,
+            'db_failures': self.db_failures,
+            'spool_pending': self.spool_pending(),
+            'spool_path': self.spool_path,
+            'db_retry_in': round(max(0.0, self._retry_at - time.monotonic()), 1),
+        }
@@ -0,0 +1,89 @@
+# backend/executor.py
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from eventlet import tpool
+
+# Where CPU-heavy calls (bcrypt, JPEG encode/decode) run:
+#   'thread'  - eventlet's OS thread pool (default; bcrypt and PIL release the GIL)
+#   'process' - a process pool (arguments and results must be picklable)
+#   'inline'  - directly on the hub (old behaviour, useful for comparisons)
+EXECUTOR_MODE = os.getenv('EXECUTOR_MODE', 'thread').lower()
+EXECUTOR_WORKERS = int(os.getenv('EXECUTOR_WORKERS', os.cpu_count() or 2))
+
+EXECUTOR_MODES = ('thread', 'process', 'inline')
+
+
+class BlockingExecutor:
+    """
+    Runs blocking, CPU-bound calls away from the eventlet hub.
+
+    run() looks like a normal function call to the caller, but the calling
+    green thread yields while the work is done, so video streams and other
+    requests keep being served in the meantime.
+    """
+
+    def __init__(self, mode=EXECUTOR_MODE, workers=EXECUTOR_WORKERS):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"EXECUTOR_MODE must be one of {EXECUTOR_MODES}, got '{mode}'")
+        self.mode = mode
+        self.workers = workers
+        self._process_pool = None
+        self._process_pool_lock = threading.Lock()  # Pool is created from tpool threads
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.busy_seconds = 0.0
+
+        if mode in ('thread', 'process'):
+            # In process mode the tpool threads only wait on the processes
+            tpool.set_num_threads(workers)
+
+    def run(self, fn, *args, **kwargs):
+        """Calls fn(*args, **kwargs) in the configured pool and returns its result."""
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.monotonic()
+        try:
+            if self.mode == 'inline':
+                return fn(*args, **kwargs)
+            if self.mode == 'thread':
+                return tpool.execute(fn, *args, **kwargs)
+
+            # Process mode: submit and wait from a tpool OS thread. Submitting
+            # from green threads directly can deadlock the pool's wakeup pipe.
+            return tpool.execute(self._run_in_process, fn, args, kwargs)
+        finally:
+            self.in_flight -= 1
+            self.busy_seconds += time.monotonic() - start
+
+    def _run_in_process(self, fn, args, kwargs):
+        return self._get_process_pool().submit(fn, *args, **kwargs).result()
+
+    def _get_process_pool(self):
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._process_pool
+
+    def shutdown(self):
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'workers': self.workers,
+            'calls': self.calls,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'busy_seconds': round(self.busy_seconds, 3),
+        }
+
+
+# Shared instance used by the routes and the frame pipeline
+blocking_executor = BlockingExecutor()
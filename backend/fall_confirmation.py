@@ -0,0 +1,200 @@
+# backend/fall_confirmation.py
+import os
+import time
+import traceback
+from collections import deque
+
+from database import db
+from models import EventClass, EventLog, EventType
+from reference_cache import reference_cache
+from inference import FALL_CLASS_ID
+
+# --- Configuration ---
+FALL_SCORE_ON = float(os.getenv('FALL_SCORE_ON', 0.6))    # Smoothed score that starts a possible fall
+FALL_SCORE_OFF = float(os.getenv('FALL_SCORE_OFF', 0.4))  # ...and the one that ends it (hysteresis)
+FALL_MIN_DURATION = float(os.getenv('FALL_MIN_DURATION', 2.0))  # seconds above ON before alerting
+FALL_COOLDOWN = float(os.getenv('FALL_COOLDOWN', 60.0))  # seconds after an incident before the next one
+FALL_WINDOW = int(os.getenv('FALL_WINDOW', 5))  # Detection scores averaged per camera
+# Optional: the event_class row used for confirmed falls (default: first class of the 'Fall' event type)
+FALL_EVENT_CLASS_ID = os.getenv('FALL_EVENT_CLASS_ID')
+
+# Per-camera states
+IDLE = 'idle'        # Nothing going on
+PENDING = 'pending'  # Score is above ON, waiting for FALL_MIN_DURATION
+ACTIVE = 'active'    # Incident open (alert sent, row written)
+
+
+class CameraFallState:
+    """Ring buffer of recent fall scores plus the confirmation state of one camera."""
+
+    __slots__ = ('scores', 'state', 'pending_since', 'cooldown_until', 'incident_id')
+
+    def __init__(self, window):
+        self.scores = deque(maxlen=window)
+        self.state = IDLE
+        self.pending_since = None
+        self.cooldown_until = 0.0
+        self.incident_id = None
+
+    def smoothed(self):
+        return sum(self.scores) / len(self.scores) if self.scores else 0.0
+
+
+def fall_score(detections):
+    """Highest 'fall' score among one frame's detections (0 when there is none)."""
+    return max((d['score'] for d in detections if d['class_id'] == FALL_CLASS_ID), default=0.0)
+
+
+class FallConfirmationEngine:
+    """
+    Turns per-frame detections into incidents.
+
+    A camera's scores are smoothed over its last FALL_WINDOW frames. An
+    incident opens once the smoothed score has stayed at or above
+    FALL_SCORE_ON for FALL_MIN_DURATION seconds, and closes when it drops
+    below FALL_SCORE_OFF. After an incident closes, that camera can't open
+    another one for FALL_COOLDOWN seconds. Opening an incident writes one
+    EventLog row and emits one 'incident_alert'; every other frame of the
+    same fall is absorbed here.
+    """
+
+    def __init__(self, app, socketio, score_on=FALL_SCORE_ON, score_off=FALL_SCORE_OFF,
+                 min_duration=FALL_MIN_DURATION, cooldown=FALL_COOLDOWN, window=FALL_WINDOW,
+                 event_writer=None, clip_recorder=None):
+        if score_off > score_on:
+            raise ValueError("FALL_SCORE_OFF must not be above FALL_SCORE_ON")
+        self.app = app
+        self.socketio = socketio
+        self.score_on = score_on
+        self.score_off = score_off
+        self.min_duration = min_duration
+        self.cooldown = cooldown
+        self.window = window
+        self.event_writer = event_writer  # If set, incident rows are written behind (see event_writer.py)
+        self.clip_recorder = clip_recorder  # If set, each incident gets a clip (see clip_recorder.py)
+        self.cameras = {}  # cam_id -> CameraFallState
+        self._event_class_id = None
+        self.frames_seen = 0
+        self.incidents_opened = 0
+        self.incidents_closed = 0
+        self.suppressed_frames = 0  # Fall frames that did not become a new alert
+
+    def update(self, cam_id, detections, now=None):
+        """Feeds one frame's detections for a camera. Returns 'opened', 'closed' or None."""
+        now = time.time() if now is None else now
+        cam = self.cameras.get(cam_id)
+        if cam is None:
+            cam = self.cameras[cam_id] = CameraFallState(self.window)
+
+        score = fall_score(detections)
+        cam.scores.append(score)
+        smoothed = cam.smoothed()
+        self.frames_seen += 1
+        if score >= self.score_on and (cam.state == ACTIVE or now < cam.cooldown_until):
+            self.suppressed_frames += 1
+
+        if cam.state == ACTIVE:
+            if smoothed < self.score_off:
+                cam.state = IDLE
+                cam.incident_id = None
+                cam.cooldown_until = now + self.cooldown
+                self.incidents_closed += 1
+                return 'closed'
+            return None
+
+        if cam.state == PENDING and smoothed < self.score_off:
+            cam.state = IDLE
+            cam.pending_since = None
+            return None
+
+        if cam.state == IDLE:
+            if smoothed < self.score_on:
+                return None
+            cam.state = PENDING
+            cam.pending_since = now
+
+        if self.clip_recorder:
+            # Possibly a fall: keep this camera's frames for the clip
+            self.clip_recorder.arm(cam_id, now)
+
+        # PENDING: alert once the fall has lasted long enough and we're out of cooldown
+        if now - cam.pending_since >= self.min_duration and now >= cam.cooldown_until:
+            cam.state = ACTIVE
+            cam.pending_since = None
+            cam.incident_id = self._open_incident(cam_id, smoothed, now)
+            self.incidents_opened += 1
+            return 'opened'
+        return None
+
+    def forget(self, cam_id):
+        """Drops the state of a camera (e.g. after it is deleted)."""
+        self.cameras.pop(cam_id, None)
+
+    def _fall_event_class_id(self):
+        """The event_class used for confirmed falls, resolved once."""
+        if self._event_class_id is None:
+            if FALL_EVENT_CLASS_ID:
+                self._event_class_id = int(FALL_EVENT_CLASS_ID)
+            else:
+                event_class = EventClass.query.join(EventType).filter(
+                    EventType.event_type_name.ilike('%fall%')
+                ).order_by(EventClass.id).first() or EventClass.query.order_by(EventClass.id).first()
+                self._event_class_id = event_class.id if event_class else None
+        return self._event_class_id
+
+    def _open_incident(self, cam_id, score, now):
+        """
+        Starts the incident's clip, writes (or queues) its EventLog row and
+        emits its alert. Returns the row id, or None when the row goes through
+        the event writer.
+        """
+        event_id = None
+        file_path = self.clip_recorder.start_clip(cam_id, now) if self.clip_recorder else None
+        location_name = 'Unknown'
+        camera_name = f'Camera {cam_id}'
+        with self.app.app_context():
+            try:
+                camera = reference_cache.snapshot().cameras_by_id.get(cam_id)
+                if camera:
+                    camera_name = camera['name']
+                    location_name = camera['location_name'] or location_name
+
+                event_class_id = self._fall_event_class_id()
+                if event_class_id is None:
+                    print("Fall confirmation: no event_class rows, incident not logged.")
+                elif self.event_writer:
+                    # Inserted in the next batch; the row id isn't known yet
+                    self.event_writer.enqueue(cam_id=cam_id, event_class_id=event_class_id, file_path=file_path)
+                else:
+                    log = EventLog(cam_id=cam_id, event_class_id=event_class_id, file_path=file_path)
+                    db.session.add(log)
+                    db.session.commit()
+                    event_id = log.id
+            except Exception as e:
+                db.session.rollback()
+                print(f"Fall confirmation: could not log incident for camera {cam_id}: {e}")
+                print(traceback.format_exc())
+            finally:
+                db.session.remove()
+
+        alert = {
+            'type': 'Fall Detected',
+            'event_id': event_id,
+            'cam_id': cam_id,
+            'camera': camera_name,
+            'location': location_name,
+            'score': round(score, 3),
+            'timestamp': int(now)
+        }
+        self.socketio.emit('incident_alert', alert)
+        print(f"ALERT: {alert['type']} at {location_name} ({camera_name}), event {event_id}.")
+        return event_id
+
+    def stats(self):
+        return {
+            'frames_seen': self.frames_seen,
+            'incidents_opened': self.incidents_opened,
+            'incidents_closed': self.incidents_closed,
+            'suppressed_frames': self.suppressed_frames,
+            'active_cameras': sorted(cid for cid, cam in self.cameras.items() if cam.state == ACTIVE),
+        }
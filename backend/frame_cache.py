@@ -0,0 +1,159 @@
+# backend/frame_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+from eventlet.event import Event
+from PIL import Image
+
+from metrics import FRAME_ENCODE_SECONDS
+
+# Renditions a client can ask for when it subscribes to a camera.
+# 'thumb' is for grid tiles, 'full' is for the focused view.
+RENDITIONS = {
+    'thumb': {'size': (320, 240), 'quality': 60},
+    'full': {'size': (640, 480), 'quality': 80},
+}
+DEFAULT_RENDITION = 'thumb'
+
+# Upper bound for all encoded JPEGs kept in the cache (override with FRAME_CACHE_MAX_BYTES)
+FRAME_CACHE_MAX_BYTES = int(os.getenv('FRAME_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+
+# One reusable encode buffer per thread, instead of a new BytesIO per frame
+_encode_buffers = threading.local()
+
+
+def encode_rendition(image, rendition):
+    """Scales a source image to a rendition's size and encodes it as JPEG bytes."""
+    spec = RENDITIONS[rendition]
+    if image.size != spec['size']:
+        image = image.resize(spec['size'], Image.Resampling.BILINEAR)
+
+    buffer = getattr(_encode_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _encode_buffers.buffer = BytesIO()
+    buffer.seek(0)
+    buffer.truncate()
+    image.save(buffer, format='jpeg', quality=spec['quality'])
+    return buffer.getvalue()
+
+
+class FrameCache:
+    """
+    Latest source frame per camera plus its encoded renditions.
+
+    A rendition is encoded lazily, the first time someone asks for it, and
+    then reused for every other viewer of the same source frame. Encoded
+    entries are evicted least-recently-used once they exceed max_bytes.
+
+    `run_blocking(fn, *args)` is where the JPEG encode runs (e.g.
+    blocking_executor.run); callers asking for a rendition that is already
+    being encoded wait for that result instead of encoding it again.
+    """
+
+    def __init__(self, max_bytes=FRAME_CACHE_MAX_BYTES, run_blocking=None):
+        self.max_bytes = max_bytes
+        self.run_blocking = run_blocking or (lambda fn, *args: fn(*args))
+        self._sources = {}            # cam_id -> (seq, PIL image)
+        self._encoded = OrderedDict() # (cam_id, rendition) -> (seq, jpeg bytes)
+        self._in_flight = {}          # (cam_id, rendition) -> (seq, Event)
+        self._encoded_bytes = 0
+        self.hits = 0
+        self.encodes = 0
+        self.evictions = 0
+
+    def put_source(self, cam_id, image):
+        """
+        Stores a new source frame for a camera and returns its sequence number.
+        Putting the same image object again keeps the sequence (and the
+        already-encoded renditions) unchanged.
+        """
+        seq, current = self._sources.get(cam_id, (0, None))
+        if image is current:
+            return seq
+        self._sources[cam_id] = (seq + 1, image)
+        return seq + 1
+
+    def latest_source(self, cam_id):
+        """Returns (seq, image) of the newest source frame for a camera; image is None if there is none."""
+        return self._sources.get(cam_id, (0, None))
+
+    def peek(self, cam_id, rendition):
+        """The JPEG of the camera's newest frame if that rendition is already encoded, else None (never encodes)."""
+        seq, _ = self._sources.get(cam_id, (0, None))
+        cached = self._encoded.get((cam_id, rendition))
+        return cached[1] if cached and cached[0] == seq else None
+
+    def get(self, cam_id, rendition):
+        """Returns the JPEG for the camera's newest frame, encoding it at most once."""
+        seq, image = self._sources.get(cam_id, (0, None))
+        if image is None:
+            return None
+
+        key = (cam_id, rendition)
+        cached = self._encoded.get(key)
+        if cached and cached[0] == seq:
+            self._encoded.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        pending = self._in_flight.get(key)
+        if pending and pending[0] == seq:
+            self.hits += 1
+            return pending[1].wait()
+
+        done = Event()
+        self._in_flight[key] = (seq, done)
+        try:
+            started = time.perf_counter()
+            jpeg = self.run_blocking(encode_rendition, image, rendition)
+            FRAME_ENCODE_SECONDS.observe(time.perf_counter() - started, cam_id, rendition)
+        except Exception as e:
+            done.send_exception(e)
+            raise
+        finally:
+            if self._in_flight.get(key, (None, None))[1] is done:
+                del self._in_flight[key]
+
+        self.encodes += 1
+        # Don't overwrite a newer frame's rendition stored while we were encoding
+        cached = self._encoded.get(key)
+        if not cached or cached[0] < seq:
+            self._store(key, seq, jpeg)
+        done.send(jpeg)
+        return jpeg
+
+    def drop_camera(self, cam_id):
+        """Forgets everything cached for a camera (e.g. after it is deleted)."""
+        self._sources.pop(cam_id, None)
+        for rendition in RENDITIONS:
+            self._remove((cam_id, rendition))
+
+    def _store(self, key, seq, jpeg):
+        self._remove(key)
+        self._encoded[key] = (seq, jpeg)
+        self._encoded_bytes += len(jpeg)
+        # Evict least recently used renditions until we are back under budget
+        while self._encoded_bytes > self.max_bytes and len(self._encoded) > 1:
+            oldest_key = next(iter(self._encoded))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._encoded.pop(key, None)
+        if entry:
+            self._encoded_bytes -= len(entry[1])
+
+    def stats(self):
+        return {
+            'cameras': len(self._sources),
+            'encoded_entries': len(self._encoded),
+            'encoded_bytes': self._encoded_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'encodes': self.encodes,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,89 @@
+# backend/frame_renderer.py
+import time
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Fonts tried in order before falling back to PIL's built-in bitmap font
+FONT_CANDIDATES = ("arial.ttf", "DejaVuSans.ttf")
+
+
+@lru_cache(maxsize=8)
+def load_font(size=16):
+    """Loads (once per size) the overlay font."""
+    for name in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(name, size)
+        except IOError:
+            continue
+    return ImageFont.load_default()
+
+
+class MockFrameRenderer:
+    """
+    Renders the mock camera frames.
+
+    The dark red canvas and the static text (title, camera name) are drawn
+    once per camera and cached. A new frame only copies that base canvas and
+    draws the timestamp; while the timestamp has not changed (it has one-second
+    resolution) the previous frame object is returned as-is, so FrameCache
+    can skip re-encoding it.
+    """
+
+    def __init__(self, size=(640, 480), font_size=16, color='darkred'):
+        self.size = size
+        self.color = color
+        self.font = load_font(font_size)
+        self.line_height = font_size + 4
+        self._bases = {}   # cam_id -> (cam_name, base image)
+        self._frames = {}  # cam_id -> (timestamp text, frame image)
+
+    def _base_canvas(self, cam_id, cam_name):
+        cached = self._bases.get(cam_id)
+        if cached and cached[0] == cam_name:
+            return cached[1]
+
+        base = Image.new('RGB', self.size, color=self.color)
+        d = ImageDraw.Draw(base)
+        d.text((10, 10), "AGAPAI MOCK STREAM", fill=(255, 255, 255), font=self.font)
+        d.text((10, 10 + self.line_height), f"{cam_name.upper()} (ID: {cam_id})",
+               fill=(255, 255, 255), font=self.font)
+        self._bases[cam_id] = (cam_name, base)
+        self._frames.pop(cam_id, None)  # Name changed: old frame is stale
+        return base
+
+    def render(self, cam_id, cam_name, now=None):
+        """Returns the current frame for a camera as a PIL image (do not modify it)."""
+        stamp = f"Time: {time.strftime('%H:%M:%S', time.localtime(now))}"
+        base = self._base_canvas(cam_id, cam_name)
+
+        cached = self._frames.get(cam_id)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        # Only the timestamp line is drawn per frame; everything else comes from the base
+        frame = base.copy()
+        ImageDraw.Draw(frame).text((10, 10 + 2 * self.line_height), stamp,
+                                   fill=(255, 255, 255), font=self.font)
+        self._frames[cam_id] = (stamp, frame)
+        return frame
+
+    def forget(self, cam_id):
+        """Drops the cached canvases of a camera."""
+        self._bases.pop(cam_id, None)
+        self._frames.pop(cam_id, None)
+
+
+class MockFrameSource:
+    """Frame source for cameras without a usable stream_url: renders mock frames."""
+
+    def __init__(self, renderer, cam_id, cam_name):
+        self.renderer = renderer
+        self.cam_id = cam_id
+        self.cam_name = cam_name
+
+    def read(self):
+        return self.renderer.render(self.cam_id, self.cam_name)
+
+    def close(self):
+        self.renderer.forget(self.cam_id)
@@ -0,0 +1,243 @@
+# backend/inference.py
+import os
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+from yolo_postprocess import postprocess_batch
+
+# --- Configuration ---
+MODEL_PATH = os.getenv(
+    'FALL_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mock_yolov8_fall.xml')
+)
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'numpy-standin')
+DETECTION_ENABLED = os.getenv('DETECTION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+DETECTION_INTERVAL = float(os.getenv('DETECTION_INTERVAL', 1.0))   # seconds between batches
+DETECTION_MAX_BATCH = int(os.getenv('DETECTION_MAX_BATCH', 8))     # cameras per inference call
+DETECTION_CONF_THRESHOLD = float(os.getenv('DETECTION_CONF_THRESHOLD', 0.5))
+DETECTION_IOU_THRESHOLD = float(os.getenv('DETECTION_IOU_THRESHOLD', 0.45))
+
+# Class index of "fall" in the model output
+FALL_CLASS_ID = 0
+
+# YOLO head layout behind the 25200 rows: 3 anchors on 80x80, 40x40 and 20x20 grids
+YOLO_STRIDES = (8, 16, 32)
+YOLO_ANCHORS = (
+    ((10, 13), (16, 30), (33, 23)),
+    ((30, 61), (62, 45), (59, 119)),
+    ((116, 90), (156, 198), (373, 326)),
+)
+
+ModelSpec = namedtuple('ModelSpec', ['name', 'input_shape', 'output_shape'])
+
+
+def load_model_spec(path=MODEL_PATH):
+    """Reads the input/output shapes from an OpenVINO IR model description (.xml)."""
+    root = ET.parse(path).getroot()
+
+    def dims(port):
+        return tuple(int(d) for d in port.get('dims').split(','))
+
+    input_port = root.find("./layers/layer[@type='Parameter']/output[@dims]")
+    output_port = root.find("./outputs/port[@dims]")
+    if input_port is None or output_port is None:
+        raise ValueError(f"Model description {path} has no input or output port")
+    return ModelSpec(root.get('name'), dims(input_port), dims(output_port))
+
+
+def make_anchor_grid(input_size):
+    """Returns the (rows, 4) cx, cy, w, h prior of every output row, in input pixels."""
+    rows = []
+    for stride, anchors in zip(YOLO_STRIDES, YOLO_ANCHORS):
+        cells = input_size // stride
+        ys, xs = np.meshgrid(np.arange(cells), np.arange(cells), indexing='ij')
+        cx = (xs.ravel() + 0.5) * stride
+        cy = (ys.ravel() + 0.5) * stride
+        for w, h in anchors:
+            rows.append(np.stack([cx, cy, np.full_like(cx, w), np.full_like(cy, h)], axis=1))
+    return np.concatenate(rows).astype(np.float32)
+
+
+# --- Pre-processing ---
+
+def frames_to_batch(images, input_size, out=None):
+    """
+    Packs PIL images into one float32 NCHW batch scaled to 0..1.
+    `out` may be a preallocated array with room for at least len(images) frames.
+    """
+    if out is None or out.shape[0] < len(images):
+        out = np.empty((len(images), 3, input_size, input_size), dtype=np.float32)
+    for i, image in enumerate(images):
+        if image.size != (input_size, input_size):
+            image = image.resize((input_size, input_size), Image.Resampling.BILINEAR)
+        out[i] = np.asarray(image.convert('RGB'), dtype=np.uint8).transpose(2, 0, 1)
+    batch = out[:len(images)]
+    batch *= 1.0 / 255.0
+    return batch
+
+
+# --- Inference Backends ---
+
+class NumpyStandInBackend:
+    """
+    Deterministic NumPy stand-in for the mock YOLOv8 fall model.
+
+    It fills an output of the declared shape where every row's box is its
+    anchor prior. Only one row per frame gets an objectness: the middle
+    stride-32 anchor of the grid cell that is brightest compared to the whole
+    frame. The same frame always gives the same detections; the dark mock
+    frames give none.
+    """
+
+    CONTRAST_SCALE = 0.5  # Cell brightness above the frame mean that counts as certain
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.input_size = spec.input_shape[-1]
+        self.rows, self.columns = spec.output_shape[-2:]
+        self.anchor_grid = make_anchor_grid(self.input_size)
+        if self.anchor_grid.shape[0] != self.rows:
+            raise ValueError(f"Anchor layout gives {self.anchor_grid.shape[0]} rows, model declares {self.rows}")
+        self.coarse_stride = YOLO_STRIDES[-1]
+        self.coarse_cells = self.input_size // self.coarse_stride
+        # Rows of the middle stride-32 anchor (the person-sized one)
+        coarse_rows = self.coarse_cells ** 2
+        self.person_row_offset = self.rows - coarse_rows * (len(YOLO_ANCHORS[-1]) - 1)
+        self._output = None
+
+    def __getstate__(self):
+        # Don't ship the (large) output buffer to worker processes
+        state = self.__dict__.copy()
+        state['_output'] = None
+        return state
+
+    def _output_buffer(self, batch_size):
+        if self._output is None or self._output.shape[0] < batch_size:
+            output = np.zeros((batch_size, self.rows, self.columns), dtype=np.float32)
+            output[:, :, :4] = self.anchor_grid
+            output[:, :, 5 + FALL_CLASS_ID] = 1.0
+            self._output = output
+        return self._output[:batch_size]
+
+    def infer(self, batch):
+        """(N, 3, S, S) float32 -> (N, 1, rows, columns) float32."""
+        n, cells, stride = batch.shape[0], self.coarse_cells, self.coarse_stride
+        luminance = batch.mean(axis=1)
+        pooled = luminance.reshape(n, cells, stride, cells, stride).mean(axis=(2, 4)).reshape(n, -1)
+        contrast = pooled - pooled.mean(axis=1, keepdims=True)
+        best_cell = contrast.argmax(axis=1)
+        best_obj = np.clip(contrast[np.arange(n), best_cell] / self.CONTRAST_SCALE, 0, 1)
+
+        output = self._output_buffer(n)
+        output[:, :, 4] = 0.0
+        output[np.arange(n), self.person_row_offset + best_cell, 4] = best_obj
+        return output[:, None]
+
+
+# Name -> backend class. Real runtimes (e.g. OpenVINO) register here.
+INFERENCE_BACKENDS = {
+    'numpy-standin': NumpyStandInBackend,
+}
+
+
+def create_backend(name=INFERENCE_BACKEND, model_path=MODEL_PATH):
+    if name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{name}'. Available: {sorted(INFERENCE_BACKENDS)}")
+    return INFERENCE_BACKENDS[name](load_model_spec(model_path))
+
+
+def detect_batch(backend, images, conf_threshold=DETECTION_CONF_THRESHOLD,
+                 iou_threshold=DETECTION_IOU_THRESHOLD):
+    """Preprocess -> infer -> postprocess for one batch. Runs in the blocking executor."""
+    batch = frames_to_batch(images, backend.input_size)
+    output = backend.infer(batch)
+    return postprocess_batch(output, backend.input_size, conf_threshold, iou_threshold)
+
+
+# --- Detection Stage ---
+
+class DetectionStage:
+    """
+    Periodically gathers the newest frame of every camera from the FrameCache,
+    runs them through the backend in batches of up to max_batch cameras, and
+    calls on_detections(cam_id, detections) for each camera.
+    Frames that were already analysed are skipped.
+    """
+
+    def __init__(self, socketio, frame_cache, get_camera_ids, on_detections, run_blocking,
+                 backend=None, interval=DETECTION_INTERVAL, max_batch=DETECTION_MAX_BATCH):
+        self.socketio = socketio
+        self.frame_cache = frame_cache
+        self.get_camera_ids = get_camera_ids
+        self.on_detections = on_detections
+        self.run_blocking = run_blocking
+        self.backend = backend
+        self.interval = interval
+        self.max_batch = max_batch
+        self.running = False
+        self._last_seq = {}  # cam_id -> sequence number of the last analysed frame
+        self.batches = 0
+        self.frames = 0
+        self.last_batch_ms = 0.0
+
+    def start(self):
+        if self.running:
+            return
+        if self.backend is None:
+            self.backend = create_backend()
+        self.running = True
+        print(f"Starting detection stage ({type(self.backend).__name__}, batch <= {self.max_batch})...")
+        self.socketio.start_background_task(self._loop)
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        while self.running:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error in detection stage: {e}")
+                print(traceback.format_exc())
+            self.socketio.sleep(self.interval)
+
+    def run_once(self):
+        """Analyses every camera whose frame changed since the last run."""
+        pending = []
+        for cam_id in self.get_camera_ids():
+            seq, image = self.frame_cache.latest_source(cam_id)
+            if image is not None and self._last_seq.get(cam_id) != seq:
+                pending.append((cam_id, seq, image))
+
+        for start in range(0, len(pending), self.max_batch):
+            chunk = pending[start:start + self.max_batch]
+            started = time.monotonic()
+            detections = self.run_blocking(detect_batch, self.backend, [image for _, _, image in chunk])
+            self.last_batch_ms = (time.monotonic() - started) * 1000
+            self.batches += 1
+            self.frames += len(chunk)
+
+            for (cam_id, seq, _), cam_detections in zip(chunk, detections):
+                self._last_seq[cam_id] = seq
+                self.on_detections(cam_id, cam_detections)
+
+        # Forget cameras that went away
+        active = set(self.get_camera_ids())
+        for cam_id in list(self._last_seq):
+            if cam_id not in active:
+                del self._last_seq[cam_id]
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'batches': self.batches,
+            'frames': self.frames,
+            'avg_batch_size': round(self.frames / self.batches, 2) if self.batches else 0,
+            'last_batch_ms': round(self.last_batch_ms, 1),
+        }
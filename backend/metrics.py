@@ -0,0 +1,253 @@
+# backend/metrics.py
+"""
+Prometheus-style metrics, served as text at GET /metrics.
+
+A small in-process registry (counters, gauges, histograms with labels) with
+no client library. Hot paths only do a dict lookup and a few additions per
+observation; values that other components already count (frames emitted,
+pool and queue stats, ...) are read from them at scrape time instead
+(callback metrics), so they cost nothing between scrapes. Everything runs
+on the eventlet hub, so there are no locks.
+
+METRICS=false turns all observation off (the endpoint then serves only the
+callback metrics). tools/check_metrics_overhead.py checks the cost stays
+within budget.
+"""
+import math
+import os
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# --- Configuration ---
+METRICS_ENABLED = os.getenv('METRICS', 'true').lower() in ('1', 'true', 'yes')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FRAME_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """Base class: a named family of samples, one per label combination."""
+
+    kind = 'untyped'
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values tuple -> value
+        registry.register(self)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def lines(self):
+        return [f'{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}'
+                for labels, value in self.values.items()]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        if self.registry.enabled:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, *labels, value):
+        if self.registry.enabled:
+            self.values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Bucket counts are stored per bucket (not cumulative), so observe() adds
+    to one slot; render() accumulates them.
+    """
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        state = self.values.get(labels)
+        if state is None:
+            # [count per bucket ..., count above the last bucket, sum, count]
+            state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def lines(self):
+        lines = []
+        bounds = self.buckets + (math.inf,)
+        for labels, state in self.values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_label_text(self.labelnames, labels)} {_format_value(state[-2])}')
+            lines.append(f'{self.name}_count{_label_text(self.labelnames, labels)} {state[-1]}')
+        return lines
+
+
+class CallbackMetric(Metric):
+    """A counter or gauge read at scrape time: collect() returns {label values tuple: value}."""
+
+    def __init__(self, registry, name, documentation, labelnames=(), collect=None, kind='gauge'):
+        super().__init__(registry, name, documentation, labelnames)
+        self.kind = kind
+        self.collect = collect
+
+    def lines(self):
+        try:
+            self.values = self.collect() or {}
+        except Exception as e:
+            print(f"Metrics: could not collect {self.name}: {e}")
+            self.values = {}
+        return super().lines()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.metrics = {}
+        self.scrapes = 0
+        self.last_render_ms = 0.0
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return Counter(self, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return Gauge(self, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return Histogram(self, name, documentation, labelnames, buckets)
+
+    def callback(self, name, documentation, labelnames=(), collect=None, kind='gauge'):
+        return CallbackMetric(self, name, documentation, labelnames, collect, kind)
+
+    def render(self):
+        """The Prometheus text exposition format (version 0.0.4)."""
+        started = time.perf_counter()
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.lines())
+        self.scrapes += 1
+        self.last_render_ms = (time.perf_counter() - started) * 1000
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# --- Hot-path metrics (the rest are callbacks registered by app.py) ---
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'agapai_http_request_duration_seconds', 'Time to build an HTTP response, by route template.',
+    ('blueprint', 'route', 'method', 'status'))
+HTTP_REQUEST_DB_QUERIES = registry.histogram(
+    'agapai_http_request_db_queries', 'SQL statements run per HTTP request.',
+    ('route',), QUERY_COUNT_BUCKETS)
+HTTP_REQUEST_DB_SECONDS = registry.histogram(
+    'agapai_http_request_db_seconds', 'Time spent in SQL statements per HTTP request.', ('route',))
+DB_QUERY_SECONDS = registry.histogram(
+    'agapai_db_query_duration_seconds', 'Duration of every SQL statement (requests and background tasks).')
+FRAME_RENDER_SECONDS = registry.histogram(
+    'agapai_frame_render_seconds', 'Time to render or read one source frame.', ('cam_id',), FRAME_BUCKETS)
+FRAME_ENCODE_SECONDS = registry.histogram(
+    'agapai_frame_encode_seconds', 'Time to encode one JPEG rendition (including the wait for a pool thread).',
+    ('cam_id', 'rendition'), FRAME_BUCKETS)
+
+
+# --- Request and query instrumentation ---
+
+def _route_labels():
+    rule = request.url_rule
+    return request.blueprint or '', rule.rule if rule is not None else '<unmatched>'
+
+
+def _before_request():
+    if not registry.enabled:
+        return
+    g.metrics_started = time.perf_counter()
+    g.metrics_db = [0, 0.0]  # statements, seconds
+
+
+def _after_request(response):
+    started = g.get('metrics_started')
+    if started is not None:
+        blueprint, route = _route_labels()
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, blueprint, route, request.method, str(response.status_code))
+        db_queries, db_seconds = g.metrics_db
+        HTTP_REQUEST_DB_QUERIES.observe(db_queries, route)
+        HTTP_REQUEST_DB_SECONDS.observe(db_seconds, route)
+    return response
+
+
+# The start time lives on the statement's execution context, which is discarded with
+# it; a statement that fails (no after_cursor_execute) leaves nothing behind.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if registry.enabled and context is not None:
+        context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_started', None)
+    if started is None:
+        return
+    context.metrics_started = None
+    elapsed = time.perf_counter() - started
+    DB_QUERY_SECONDS.observe(elapsed)
+    if has_request_context():
+        per_request = g.get('metrics_db')
+        if per_request is not None:
+            per_request[0] += 1
+            per_request[1] += elapsed
+
+
+def instrument_app(app):
+    """Times every request (all blueprints) and every SQL statement of every engine."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,118 @@
+# backend/migrate.py
+"""
+Versioned schema migrations.
+
+Migrations are the numbered .sql files in backend/migrations
+(0001_description.sql, 0002_...). Each one runs once, in order; applied
+versions are recorded in the schema_migrations table.
+
+Usage, from the backend folder:
+    python migrate.py            # apply pending migrations
+    python migrate.py status     # list applied / pending migrations
+    python migrate.py stamp      # mark every migration as applied without running it
+                                 # (for databases created by db.create_all())
+"""
+import os
+import re
+import sys
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_([\w-]+)\.sql$')
+
+
+def list_migrations(directory=MIGRATIONS_DIR):
+    """Returns [(version, name, path)] of every migration file, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(directory, filename)))
+    return migrations
+
+
+def split_statements(sql):
+    """Splits a migration file into statements (drops '--' comments and blank lines)."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [stmt.strip() for stmt in '\n'.join(lines).split(';') if stmt.strip()]
+
+
+def ensure_migrations_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR(16) PRIMARY KEY,"
+        " name VARCHAR(255) NOT NULL,"
+        " applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        ")"
+    ))
+
+
+def applied_versions(engine):
+    with engine.begin() as conn:
+        ensure_migrations_table(conn)
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def upgrade(engine, directory=MIGRATIONS_DIR):
+    """Applies every pending migration in order. Returns the versions applied."""
+    done = applied_versions(engine)
+    applied = []
+    for version, name, path in list_migrations(directory):
+        if version in done:
+            continue
+        with open(path, encoding='utf-8') as f:
+            statements = split_statements(f.read())
+
+        print(f"Applying migration {version}_{name}...")
+        # Note: MySQL commits DDL implicitly, so a failing migration can be half applied
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {'version': version, 'name': name}
+            )
+        applied.append(version)
+    return applied
+
+
+def stamp(engine, directory=MIGRATIONS_DIR):
+    """Records every migration as applied without running it."""
+    done = applied_versions(engine)
+    with engine.begin() as conn:
+        for version, name, _ in list_migrations(directory):
+            if version not in done:
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                    {'version': version, 'name': name}
+                )
+
+
+def status(engine, directory=MIGRATIONS_DIR):
+    """Returns [(version, name, applied)] for every migration."""
+    done = applied_versions(engine)
+    return [(version, name, version in done) for version, name, _ in list_migrations(directory)]
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        sys.exit("DATABASE_URL is not set.")
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'upgrade'
+    engine = create_engine(database_url)
+
+    if command == 'upgrade':
+        applied = upgrade(engine)
+        print(f"Applied {len(applied)} migration(s)." if applied else "Database is up to date.")
+    elif command == 'status':
+        for version, name, is_applied in status(engine):
+            print(f"{version}_{name}: {'applied' if is_applied else 'pending'}")
+    elif command == 'stamp':
+        stamp(engine)
+        print("All migrations marked as applied.")
+    else:
+        sys.exit(f"Unknown command '{command}'. Use upgrade, status or stamp.")
@@ -0,0 +1,8 @@
+-- Indexes for the report queries in routes/event_routes.py:
+-- date-range filters ordered by (timestamp, id) DESC, per-camera history and
+-- unacknowledged-first listings. Index entries end with the primary key
+-- (InnoDB secondary indexes; the rowid on SQLite), so the timestamp index
+-- also gives the id tiebreak of the keyset pages without a sort.
+CREATE INDEX ix_event_logs_timestamp ON event_logs (timestamp);
+CREATE INDEX ix_event_logs_cam_id_timestamp ON event_logs (cam_id, timestamp);
+CREATE INDEX ix_event_logs_event_status_timestamp ON event_logs (event_status, timestamp);
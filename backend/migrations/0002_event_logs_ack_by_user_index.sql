@@ -0,0 +1,5 @@
+-- delete_user_by_id clears ack_by_user_id for the user's rows. InnoDB
+-- already indexes the column for its FOREIGN KEY (and drops that implicit
+-- index once this one exists), so on MySQL this only names it; databases
+-- that don't index foreign keys (SQLite, PostgreSQL) would scan the table.
+CREATE INDEX ix_event_logs_ack_by_user_id ON event_logs (ack_by_user_id);
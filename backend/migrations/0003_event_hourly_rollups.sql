@@ -0,0 +1,12 @@
+-- Per-hour event counts by camera, location and event class, kept up to
+-- date by rollups.py. Fill it from existing history with:
+--     python rollups.py backfill
+CREATE TABLE event_hourly_rollups (
+    hour_start DATETIME NOT NULL,
+    cam_id BIGINT NOT NULL DEFAULT 0,
+    loc_id BIGINT NOT NULL DEFAULT 0,
+    event_class_id BIGINT NOT NULL DEFAULT 0,
+    event_count INT NOT NULL DEFAULT 0,
+    acknowledged_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour_start, cam_id, loc_id, event_class_id)
+);
@@ -52,6 +52,13 @@ class Camera(db.Model):
 
 class EventLog(db.Model):
     __tablename__ = 'event_logs'
+    # Kept in sync with migrations/0001 and 0002
+    __table_args__ = (
+        db.Index('ix_event_logs_timestamp', 'timestamp'),
+        db.Index('ix_event_logs_cam_id_timestamp', 'cam_id', 'timestamp'),
+        db.Index('ix_event_logs_event_status_timestamp', 'event_status', 'timestamp'),
+        db.Index('ix_event_logs_ack_by_user_id', 'ack_by_user_id'),
+    )
     id = db.Column(db.BigInteger, primary_key=True)
     timestamp = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
     event_status = db.Column(db.String(50), default='unacknowledged')
@@ -62,4 +69,16 @@ class EventLog(db.Model):
     
     camera = db.relationship('Camera', backref=db.backref('logs', lazy=True))
     event_class = db.relationship('EventClass', backref=db.backref('logs', lazy=True))
-    acknowledged_by = db.relationship('User', backref=db.backref('acknowledged_logs', lazy=True))
\ No newline at end of file
+    acknowledged_by = db.relationship('User', backref=db.backref('acknowledged_logs', lazy=True))
+
+
+# Per-hour event counts, maintained by rollups.py (see migrations/0003).
+# Missing camera/location/class ids are stored as 0, since they are part of the key.
+class EventHourlyRollup(db.Model):
+    __tablename__ = 'event_hourly_rollups'
+    hour_start = db.Column(db.DateTime, primary_key=True)
+    cam_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False, default=0)
+    loc_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False, default=0)
+    event_class_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False, default=0)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    acknowledged_count = db.Column(db.Integer, nullable=False, default=0)
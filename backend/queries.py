@@ -0,0 +1,82 @@
+# backend/queries.py
+"""
+Shared list queries and their serializers.
+
+The relationships in models.py are lazy: reading user.role or cam.location
+on a loaded row issues one SELECT per row. List endpoints therefore load
+through the queries here, which eager-load exactly what the matching
+serializer reads, so a list costs the same number of statements however
+many rows it has. tools/check_query_counts.py verifies this.
+"""
+from sqlalchemy.orm import joinedload
+
+from models import Camera, EventClass, Location, Role, User
+
+
+# --- Users ---
+
+def users_query():
+    return User.query.options(joinedload(User.role)).order_by(User.id)
+
+
+def serialize_user(user):
+    """The user manager's row format."""
+    return {
+        'id': user.id,
+        'username': user.username,
+        'firstname': user.firstname or 'N/A',
+        'lastname': user.lastname or 'User',
+        'role': user.role.role_name if user.role else 'staff',
+        'userId': user.id
+    }
+
+
+# --- Cameras & Locations ---
+
+def cameras_query(active_only=False):
+    query = Camera.query.options(joinedload(Camera.location)).order_by(Camera.id)
+    if active_only:
+        query = query.filter(Camera.cam_status.is_(True))
+    return query
+
+
+def serialize_camera(cam):
+    return {
+        'id': cam.id,
+        'name': cam.cam_name,
+        'status': cam.cam_status,
+        'stream_url': cam.stream_url,
+        'location_id': cam.loc_id,
+        'location_name': cam.location.loc_name if cam.location else None
+    }
+
+
+def locations_query():
+    return Location.query.order_by(Location.id)
+
+
+def serialize_location(loc):
+    return {'id': loc.id, 'name': loc.loc_name}
+
+
+# --- Event classes & Roles ---
+
+def event_classes_query():
+    return EventClass.query.options(joinedload(EventClass.event_type)).order_by(EventClass.id)
+
+
+def serialize_event_class(cls):
+    return {
+        'id': cls.id,
+        'name': cls.class_name,
+        'event_type_id': cls.event_type_id,
+        'event_type_name': cls.event_type.event_type_name if cls.event_type else None
+    }
+
+
+def roles_query():
+    return Role.query.order_by(Role.id)
+
+
+def serialize_role(role):
+    return {'id': role.id, 'name': role.role_name}
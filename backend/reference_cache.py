@@ -0,0 +1,118 @@
+# backend/reference_cache.py
+import os
+import time
+import uuid
+
+from flask import jsonify, request
+
+from queries import (
+    cameras_query, event_classes_query, locations_query, roles_query,
+    serialize_camera, serialize_event_class, serialize_location, serialize_role,
+)
+
+# Upper bound on staleness for changes made outside this process's routes
+# (other workers, SQL consoles). Writes through the routes invalidate at once.
+REFERENCE_CACHE_TTL = float(os.getenv('REFERENCE_CACHE_TTL', 300))
+
+# Changes on every restart, so ETags from an older process never match
+_PROCESS_TAG = uuid.uuid4().hex[:8]
+
+
+class ReferenceSnapshot:
+    """One consistent, read-only copy of the reference tables as plain dicts."""
+
+    def __init__(self, version, cameras, locations, event_classes, roles):
+        self.version = version
+        self.cameras = cameras
+        self.locations = locations
+        self.event_classes = event_classes
+        self.roles = roles
+        self.cameras_by_id = {cam['id']: cam for cam in cameras}
+        self.locations_by_id = {loc['id']: loc for loc in locations}
+        self.event_classes_by_id = {cls['id']: cls for cls in event_classes}
+        self.roles_by_id = {role['id']: role for role in roles}
+        self.etag = f"ref-{_PROCESS_TAG}-{version}"
+        self.loaded_at = time.monotonic()
+
+
+class ReferenceCache:
+    """
+    In-process cache of the Camera, Location, EventClass and Role tables.
+
+    The tables are small and rarely change, so they are loaded together (with
+    eager joins, 4 queries; see queries.py) and served from memory. Every write route calls
+    invalidate(), which bumps the version; the next reader reloads. A snapshot
+    loaded while an invalidation happened is not kept. The version doubles as
+    the ETag of the GET endpoints built on it.
+    """
+
+    def __init__(self, ttl=REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self.version = 1
+        self._snapshot = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def invalidate(self):
+        """Call after committing a change to any of the cached tables."""
+        self.version += 1
+        self.invalidations += 1
+
+    def snapshot(self):
+        """Returns the current ReferenceSnapshot, loading it if needed. Needs an app context."""
+        snap = self._snapshot
+        if snap and snap.version == self.version and time.monotonic() - snap.loaded_at < self.ttl:
+            self.hits += 1
+            return snap
+
+        self.misses += 1
+        if snap and snap.version == self.version:
+            # Expired by TTL only: count it as a new version, since the data may differ
+            self.version += 1
+        version = self.version
+        snap = self._load(version)
+        if version == self.version:
+            self._snapshot = snap
+        return snap
+
+    def _load(self, version):
+        cameras = [serialize_camera(cam) for cam in cameras_query()]
+        locations = [serialize_location(loc) for loc in locations_query()]
+        event_classes = [serialize_event_class(cls) for cls in event_classes_query()]
+        roles = [serialize_role(role) for role in roles_query()]
+        return ReferenceSnapshot(version, cameras, locations, event_classes, roles)
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'ttl_seconds': self.ttl,
+            'cached': bool(snap and snap.version == self.version),
+            'age_seconds': round(time.monotonic() - snap.loaded_at, 1) if snap else None,
+        }
+
+
+def conditional_json(snapshot, payload, status=200):
+    """
+    JSON response carrying the snapshot's ETag, or an empty 304 when the
+    client's If-None-Match already has it.
+    """
+    if request.if_none_match.contains_weak(snapshot.etag):
+        response = jsonify()
+        response.status_code = 304
+        response.set_data(b'')
+    else:
+        response = jsonify(payload)
+        response.status_code = status
+    response.set_etag(snapshot.etag, weak=True)
+    # Browsers may keep the copy but must revalidate it every time
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# Shared instance used by the routes and the stream supervisor
+reference_cache = ReferenceCache()
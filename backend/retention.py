@@ -0,0 +1,570 @@
+# backend/retention.py
+"""
+Retention for event_logs and incident clips.
+
+Policies are per event class (RETENTION_POLICIES, a JSON object keyed by
+event_class id or class_name; classes not listed use the RETENTION_DEFAULT_*
+values):
+    {"Backward Fall": {"keep_days": 730, "action": "archive", "clip_days": 30},
+     "3": {"keep_days": 90, "action": "delete", "clip_days": null}}
+  - keep_days: event_logs rows older than this leave the table (null = never).
+  - action: 'archive' appends them to gzipped NDJSON files under ARCHIVE_DIR
+    first; 'delete' just deletes them (and their clips).
+  - clip_days: clips older than this move from CLIP_DIR into tar.gz bundles
+    under ARCHIVE_DIR (null = never). An index (clip_index.jsonl) maps each
+    clip's file_path to its bundle, so GET /api/event_logs/<id>/clip can
+    still restore and serve it.
+
+Rows go in batches of RETENTION_BATCH_SIZE, one short transaction each
+(select FOR UPDATE, archive, delete, rollup update), with a pause between
+batches so other writers get the table. The file work (scanning CLIP_DIR,
+compressing bundles, writing the row archive, removing clips) goes through
+`run_blocking` (blocking_executor.run in the app), so the event loop keeps
+serving streams and requests during a run. A run returns a report of rows and
+bytes reclaimed. Archiving is at-least-once: a crash between writing a batch
+to the archive and committing its delete archives that batch twice.
+
+RetentionJob runs it every RETENTION_INTERVAL_HOURS inside the app. By hand,
+from the backend folder:
+    python retention.py run --dry-run    # report only
+    python retention.py run
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, select
+
+from clip_recorder import CLIP_DIR, resolve_clip_path
+from models import EventClass, EventLog
+from rollups import apply_deleted_events, prune_empty
+
+# --- Configuration ---
+RETENTION_ENABLED = os.getenv('RETENTION', 'true').lower() in ('1', 'true', 'yes')
+RETENTION_INTERVAL_HOURS = float(os.getenv('RETENTION_INTERVAL_HOURS', 24))
+RETENTION_FIRST_RUN_DELAY = float(os.getenv('RETENTION_FIRST_RUN_DELAY', 300))  # Seconds after start
+RETENTION_STANDBY_CHECK = float(os.getenv('RETENTION_STANDBY_CHECK', 60))  # Seconds between leader checks
+RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', 500))      # Rows per delete transaction
+RETENTION_BATCH_PAUSE = float(os.getenv('RETENTION_BATCH_PAUSE', 0.2))  # Seconds between batches
+RETENTION_BUNDLE_MAX_BYTES = int(os.getenv('RETENTION_BUNDLE_MAX_BYTES', 512 * 1024 * 1024))
+RETENTION_DEFAULT_KEEP_DAYS = os.getenv('RETENTION_DEFAULT_KEEP_DAYS', '365')
+RETENTION_DEFAULT_ACTION = os.getenv('RETENTION_DEFAULT_ACTION', 'archive')
+RETENTION_DEFAULT_CLIP_DAYS = os.getenv('RETENTION_DEFAULT_CLIP_DAYS', '30')
+RETENTION_POLICIES = os.getenv('RETENTION_POLICIES', '{}')
+ARCHIVE_DIR = os.getenv(
+    'ARCHIVE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive')
+)
+
+ACTIONS = ('archive', 'delete')
+# Restores of the same clip (parallel Range requests) take turns; lock = hash of the path
+_RESTORE_LOCKS = [threading.Lock() for _ in range(64)]
+RETENTION_LEASE = 'retention'  # Cluster job lease (cluster.py): one worker runs retention
+CLIP_INDEX = 'clip_index.jsonl'
+
+
+def _days(value):
+    if value is None or str(value).strip().lower() in ('', 'null', 'none', 'never'):
+        return None
+    days = float(value)
+    if days < 0:
+        raise ValueError(f"Retention days must not be negative, got {value}")
+    return days
+
+
+class RetentionPolicy:
+    """What happens to one event class's rows and clips as they age."""
+
+    __slots__ = ('keep_days', 'action', 'clip_days')
+
+    def __init__(self, keep_days=None, action='archive', clip_days=None):
+        if action not in ACTIONS:
+            raise ValueError(f"Retention action must be one of {ACTIONS}, got '{action}'")
+        self.keep_days = _days(keep_days)
+        self.action = action
+        self.clip_days = _days(clip_days)
+
+    def as_dict(self):
+        return {'keep_days': self.keep_days, 'action': self.action, 'clip_days': self.clip_days}
+
+
+def default_policy():
+    return RetentionPolicy(RETENTION_DEFAULT_KEEP_DAYS, RETENTION_DEFAULT_ACTION, RETENTION_DEFAULT_CLIP_DAYS)
+
+
+def load_policies(conn, raw=RETENTION_POLICIES):
+    """
+    Returns ({event_class_id: policy}, {event_class_id: class_name}) for
+    every event class. Unknown keys in RETENTION_POLICIES raise ValueError.
+    """
+    configured = json.loads(raw or '{}')
+    classes = dict(conn.execute(select(EventClass.id, EventClass.class_name)).all())
+    by_name = {name: class_id for class_id, name in classes.items()}
+
+    policies = {class_id: default_policy() for class_id in classes}
+    for key, spec in configured.items():
+        class_id = int(key) if str(key).isdigit() and int(key) in classes else by_name.get(key)
+        if class_id is None:
+            raise ValueError(f"RETENTION_POLICIES: no event class '{key}'")
+        base = default_policy().as_dict()
+        base.update(spec or {})
+        policies[class_id] = RetentionPolicy(**base)
+    policies[None] = default_policy()  # Rows without a class
+    classes[None] = '(no class)'
+    return policies, classes
+
+
+# --- Clip bundles ---
+
+def load_clip_index(archive_dir=ARCHIVE_DIR):
+    """{file_path: index entry} of every archived clip."""
+    index = {}
+    path = os.path.join(archive_dir, CLIP_INDEX)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    index[entry['file_path']] = entry
+                except (ValueError, KeyError):
+                    print(f"Retention: skipping corrupt clip index line: {line[:80]!r}")
+    return index
+
+
+def _append_lines(path, entries):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_clip_bundle(clips, archive_dir=ARCHIVE_DIR):
+    """
+    Packs [(file_path, absolute path)] into a new tar.gz bundle and indexes
+    it. The originals are left in place (the caller deletes them once this
+    returns). Returns (bundle name, bundle bytes).
+    """
+    bundle = f"clips-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.tar.gz"
+    bundle_path = os.path.join(archive_dir, 'bundles', bundle)
+    os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    entries = []
+    with tarfile.open(bundle_path + '.part', 'w:gz', compresslevel=6) as tar:
+        for file_path, path in clips:
+            tar.add(path, arcname=file_path)
+            entries.append({
+                'file_path': file_path,
+                'bundle': bundle,
+                'size': os.path.getsize(path),
+                'archived_at': datetime.now().isoformat(timespec='seconds'),
+            })
+    with open(bundle_path + '.part', 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(bundle_path + '.part', bundle_path)
+    _append_lines(os.path.join(archive_dir, CLIP_INDEX), entries)
+    return bundle, os.path.getsize(bundle_path)
+
+
+def restore_archived_clip(file_path, clip_dir=CLIP_DIR, archive_dir=ARCHIVE_DIR):
+    """
+    Extracts an archived clip back to its place under clip_dir. Returns the
+    path, or None if the clip isn't in any bundle. The next retention run
+    removes the restored copy again (it's already bundled). Concurrent
+    restores of one clip extract it once; each extraction writes its own
+    temporary file, so even restores in separate processes can't mix.
+    """
+    path = resolve_clip_path(file_path, clip_dir)
+    if path is None:
+        return None
+    with _RESTORE_LOCKS[hash(path) % len(_RESTORE_LOCKS)]:
+        if os.path.isfile(path):
+            return path  # Restored by the request before us
+        entry = load_clip_index(archive_dir).get(file_path)
+        if entry is None:
+            return None
+        bundle_path = os.path.join(archive_dir, 'bundles', entry['bundle'])
+        with tarfile.open(bundle_path, 'r:gz') as tar:
+            info = tar.getmember(file_path)
+            member = tar.extractfile(info)
+            if member is None:
+                return None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.',
+                                            suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    while True:
+                        chunk = member.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                # Keep the clip's original age, so retention sees it as old again
+                os.utime(tmp_path, (info.mtime, info.mtime))
+                os.chmod(tmp_path, 0o644)  # mkstemp makes it private; nginx may serve it (X-Accel-Redirect)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+    return path
+
+
+def _scan_old_clips(clip_dir, newest):
+    """{file_path: (absolute path, mtime, size)} of the clips last modified before `newest`."""
+    candidates = {}
+    for root, _, files in os.walk(clip_dir):
+        for name in files:
+            if not name.endswith('.avi'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if info.st_mtime < newest:
+                candidates[os.path.relpath(path, clip_dir).replace(os.sep, '/')] = (path, info.st_mtime, info.st_size)
+    return candidates
+
+
+def _existing_clips(file_paths, clip_dir):
+    """[(file_path, absolute path)] of the given clips that are still on disk."""
+    clips = [(file_path, resolve_clip_path(file_path, clip_dir)) for file_path in file_paths]
+    return [(file_path, path) for file_path, path in clips if path and os.path.isfile(path)]
+
+
+def _remove_files(paths):
+    """Removes files (ones already gone are skipped). Returns the bytes freed."""
+    freed = 0
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        freed += size
+    return freed
+
+
+# --- Row archive ---
+
+def _archive_rows(rows, archive_dir=ARCHIVE_DIR):
+    """Appends rows to event_logs-YYYYMM.ndjson.gz (by event month) and fsyncs. Returns bytes written."""
+    by_month = {}
+    for row in rows:
+        month = row['timestamp'].strftime('%Y%m') if row['timestamp'] else 'unknown'
+        by_month.setdefault(month, []).append(row)
+
+    written = 0
+    os.makedirs(os.path.join(archive_dir, 'event_logs'), exist_ok=True)
+    for month, month_rows in by_month.items():
+        path = os.path.join(archive_dir, 'event_logs', f'event_logs-{month}.ndjson.gz')
+        before = os.path.getsize(path) if os.path.exists(path) else 0
+        # Each batch is its own gzip member; gzip readers read them as one stream
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                for row in month_rows:
+                    f.write((json.dumps(row, default=str) + '\n').encode('utf-8'))
+            raw.flush()
+            os.fsync(raw.fileno())
+        written += os.path.getsize(path) - before
+    return written
+
+
+# --- The run ---
+
+class RetentionReport:
+    """Counters of one run."""
+
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self.rows_deleted = 0
+        self.rows_archived = 0
+        self.clips_archived = 0
+        self.clips_deleted = 0
+        self.clip_bytes_freed = 0     # Removed from CLIP_DIR
+        self.bundle_bytes_written = 0
+        self.row_archive_bytes_written = 0
+        self.rollup_rows_pruned = 0
+        self.batches = 0
+        self.by_class = {}
+        self.errors = []
+        self.clips_seen = set()  # Clip paths already counted (a dry run sees them twice)
+
+    def count(self, class_name, field, amount=1):
+        counts = self.by_class.setdefault(class_name, {'rows_deleted': 0, 'rows_archived': 0, 'clips_archived': 0, 'clips_deleted': 0})
+        counts[field] += amount
+
+    def as_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'duration_s': round((self.finished_at - self.started_at).total_seconds(), 3) if self.finished_at else None,
+            'rows_deleted': self.rows_deleted,
+            'rows_archived': self.rows_archived,
+            'clips_archived': self.clips_archived,
+            'clips_deleted': self.clips_deleted,
+            'clip_bytes_freed': self.clip_bytes_freed,
+            'bundle_bytes_written': self.bundle_bytes_written,
+            'row_archive_bytes_written': self.row_archive_bytes_written,
+            'bytes_reclaimed': self.clip_bytes_freed - self.bundle_bytes_written - self.row_archive_bytes_written,
+            'rollup_rows_pruned': self.rollup_rows_pruned,
+            'batches': self.batches,
+            'by_class': {str(name): counts for name, counts in self.by_class.items()},
+            'errors': self.errors,
+        }
+
+
+def _older_than(days, now):
+    return now - timedelta(days=days) if days is not None else None
+
+
+def _run_inline(fn, *args):
+    return fn(*args)
+
+
+def archive_clips(engine, policies, class_names, report, now, clip_dir=CLIP_DIR, archive_dir=ARCHIVE_DIR,
+                  run_blocking=_run_inline):
+    """Moves clips past their class's clip_days into bundles (or just drops ones already bundled)."""
+    clip_days = [p.clip_days for p in policies.values() if p.clip_days is not None]
+    if not clip_days or not os.path.isdir(clip_dir):
+        return
+    newest = (now - timedelta(days=min(clip_days))).timestamp()
+
+    # Candidates by file age first (the filesystem is the cheap side), then by event
+    candidates = run_blocking(_scan_old_clips, clip_dir, newest)
+    if not candidates:
+        return
+
+    events = {}
+    file_paths = list(candidates)
+    with engine.connect() as conn:
+        for start in range(0, len(file_paths), RETENTION_BATCH_SIZE):
+            chunk = file_paths[start:start + RETENTION_BATCH_SIZE]
+            for file_path, timestamp, class_id in conn.execute(
+                select(EventLog.file_path, EventLog.timestamp, EventLog.event_class_id)
+                .where(EventLog.file_path.in_(chunk))
+            ):
+                events[file_path] = (timestamp, class_id)
+
+    index = run_blocking(load_clip_index, archive_dir)
+    bundle, bundle_bytes, already_bundled = [], 0, []
+    for file_path, (path, mtime, size) in sorted(candidates.items()):
+        # Clips whose row is gone (or not written yet) age by file time, default policy
+        timestamp, class_id = events.get(file_path, (datetime.fromtimestamp(mtime), None))
+        policy = policies.get(class_id, policies[None])
+        cutoff = _older_than(policy.clip_days, now)
+        if cutoff is None or timestamp is None or timestamp >= cutoff:
+            continue
+        if file_path in index:
+            already_bundled.append(path)
+            continue
+        bundle.append((class_id, file_path, path))
+        bundle_bytes += size
+        if bundle_bytes >= RETENTION_BUNDLE_MAX_BYTES:
+            _flush_bundle(bundle, class_names, report, archive_dir, run_blocking)
+            bundle, bundle_bytes = [], 0
+    _flush_bundle(bundle, class_names, report, archive_dir, run_blocking)
+
+    # Restored copies of bundled clips
+    if already_bundled and not report.dry_run:
+        report.clip_bytes_freed += run_blocking(_remove_files, already_bundled)
+
+
+def _flush_bundle(bundle, class_names, report, archive_dir, run_blocking=_run_inline):
+    bundle = [clip for clip in bundle if clip[2] not in report.clips_seen]
+    if not bundle:
+        return
+    report.clips_seen.update(path for _, _, path in bundle)
+    for class_id, _, path in bundle:
+        report.clips_archived += 1
+        report.count(class_names.get(class_id, class_id), 'clips_archived')
+    if report.dry_run:
+        return
+    _, size = run_blocking(write_clip_bundle, [(file_path, path) for _, file_path, path in bundle], archive_dir)
+    report.bundle_bytes_written += size
+    report.clip_bytes_freed += run_blocking(_remove_files, [path for _, _, path in bundle])
+
+
+def expire_rows(engine, class_id, policy, class_name, report, now, sleep=time.sleep,
+                clip_dir=CLIP_DIR, archive_dir=ARCHIVE_DIR, run_blocking=_run_inline):
+    """Archives/deletes one class's rows older than keep_days, a batch per transaction."""
+    cutoff = _older_than(policy.keep_days, now)
+    if cutoff is None:
+        return
+    table = EventLog.__table__
+    columns = [table.c.id, table.c.timestamp, table.c.cam_id, table.c.event_class_id,
+               table.c.event_status, table.c.ack_by_user_id, table.c.file_path]
+    condition = (table.c.event_class_id.is_(None) if class_id is None else table.c.event_class_id == class_id)
+    query = select(*columns).where(condition, table.c.timestamp < cutoff).order_by(table.c.id)
+
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            if report.dry_run:
+                # Page through instead of deleting
+                rows = [dict(row._mapping) for row in conn.execute(
+                    query.where(table.c.id > last_id).limit(RETENTION_BATCH_SIZE))]
+            else:
+                rows = [dict(row._mapping) for row in conn.execute(
+                    query.limit(RETENTION_BATCH_SIZE).with_for_update())]
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            if not report.dry_run:
+                if policy.action == 'archive':
+                    report.row_archive_bytes_written += run_blocking(_archive_rows, rows, archive_dir)
+                conn.execute(delete(table).where(table.c.id.in_([row['id'] for row in rows])))
+                apply_deleted_events(conn, rows)
+
+        report.batches += 1
+        field = 'rows_archived' if policy.action == 'archive' else 'rows_deleted'
+        setattr(report, field, getattr(report, field) + len(rows))
+        report.count(class_name, field, len(rows))
+
+        # Deleted rows take their clips with them; archived rows' clips go to a bundle
+        file_paths = [row['file_path'] for row in rows if row['file_path']]
+        clips = run_blocking(_existing_clips, file_paths, clip_dir) if file_paths else []
+        if policy.action == 'delete':
+            doomed = [path for _, path in clips if path not in report.clips_seen]
+            report.clips_seen.update(doomed)
+            report.clips_deleted += len(doomed)
+            report.count(class_name, 'clips_deleted', len(doomed))
+            if doomed and not report.dry_run:
+                report.clip_bytes_freed += run_blocking(_remove_files, doomed)
+        else:
+            index = run_blocking(load_clip_index, archive_dir) if clips else {}
+            _flush_bundle([(class_id, file_path, path) for file_path, path in clips if file_path not in index],
+                          {class_id: class_name}, report, archive_dir, run_blocking)
+
+        if len(rows) < RETENTION_BATCH_SIZE:
+            return
+        sleep(RETENTION_BATCH_PAUSE)
+
+
+def run_retention(engine, dry_run=False, now=None, sleep=time.sleep, policies_json=RETENTION_POLICIES,
+                  clip_dir=CLIP_DIR, archive_dir=ARCHIVE_DIR, run_blocking=_run_inline):
+    """
+    One retention pass over every event class. Returns a RetentionReport.
+    File and compression work is done through run_blocking(fn, *args).
+    """
+    now = now or datetime.now()
+    report = RetentionReport(dry_run)
+    with engine.connect() as conn:
+        policies, class_names = load_policies(conn, policies_json)
+
+    try:
+        archive_clips(engine, policies, class_names, report, now, clip_dir, archive_dir, run_blocking)
+    except Exception as e:
+        report.errors.append(f"clips: {e}")
+        print(traceback.format_exc())
+
+    for class_id, policy in policies.items():
+        try:
+            expire_rows(engine, class_id, policy, class_names[class_id], report, now, sleep, clip_dir, archive_dir,
+                        run_blocking)
+        except Exception as e:
+            report.errors.append(f"{class_names[class_id]}: {e}")
+            print(traceback.format_exc())
+
+    if not dry_run and (report.rows_deleted or report.rows_archived):
+        with engine.begin() as conn:
+            report.rollup_rows_pruned = prune_empty(conn)
+    report.finished_at = datetime.now()
+    return report
+
+
+class RetentionJob:
+    """
+    Runs run_retention() every RETENTION_INTERVAL_HOURS as a background task.
+
+    `is_leader()` says whether this worker may run it; in multi-worker mode
+    only the holder of the RETENTION_LEASE does, and the others check again
+    every RETENTION_STANDBY_CHECK seconds in case they take over.
+    """
+
+    def __init__(self, app, socketio, db, run_blocking=None, is_leader=None,
+                 interval_hours=RETENTION_INTERVAL_HOURS, first_run_delay=RETENTION_FIRST_RUN_DELAY):
+        self.app = app
+        self.socketio = socketio
+        self.db = db
+        self.run_blocking = run_blocking or _run_inline
+        self.is_leader = is_leader or (lambda: True)
+        self.interval = interval_hours * 3600
+        self.first_run_delay = first_run_delay
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.last_report = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        print(f"Starting retention job (every {self.interval / 3600:g}h)...")
+        self.socketio.start_background_task(self._loop)
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        self.socketio.sleep(self.first_run_delay)
+        while self.running:
+            if not self.is_leader():
+                self.socketio.sleep(RETENTION_STANDBY_CHECK)
+                continue
+            self.run_once()
+            self.socketio.sleep(self.interval)
+
+    def run_once(self, dry_run=False):
+        try:
+            with self.app.app_context():
+                report = run_retention(self.db.engine, dry_run=dry_run, sleep=self.socketio.sleep,
+                                       run_blocking=self.run_blocking)
+        except Exception as e:
+            self.failures += 1
+            print(f"Error in retention job: {e}")
+            print(traceback.format_exc())
+            return None
+        self.runs += 1
+        self.last_report = report.as_dict()
+        print(f"Retention: {self.last_report['rows_archived']} rows archived, "
+              f"{self.last_report['rows_deleted']} deleted, {self.last_report['clips_archived']} clips bundled, "
+              f"{self.last_report['bytes_reclaimed']} bytes reclaimed.")
+        return self.last_report
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'leader': self.is_leader(),
+            'interval_hours': self.interval / 3600,
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_report': self.last_report,
+        }
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Event log and clip retention")
+    parser.add_argument('command', choices=['run'])
+    parser.add_argument('--dry-run', action='store_true', help='only report what would be removed')
+    args = parser.parse_args()
+
+    load_dotenv()
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        sys.exit("DATABASE_URL is not set.")
+
+    result = run_retention(create_engine(database_url), dry_run=args.dry_run)
+    print(json.dumps(result.as_dict(), indent=2))
@@ -0,0 +1,84 @@
+# backend/role_cache.py
+import os
+import time
+
+from sqlalchemy.orm import joinedload
+
+from database import db
+from models import User
+
+# How long a role (from the database or a token claim) is trusted without
+# re-checking. It bounds how late a role change or deletion made by another
+# process takes effect; changes through this process's routes apply at once.
+AUTH_ROLE_CACHE_TTL = float(os.getenv('AUTH_ROLE_CACHE_TTL', 60))
+
+ROLE_CLAIM = 'role'  # JWT claim set at login
+
+
+class RoleCache:
+    """
+    user id -> role name, for admin_required.
+
+    Lookup order:
+      1. A cached entry younger than the TTL.
+      2. The token's role claim, if the token is younger than the TTL and
+         was issued after the user's last invalidation (it is then as fresh
+         as a cached entry would be).
+      3. The database (one query, role joined); the result is cached.
+    So an admin request normally costs no query, and a changed or deleted
+    user loses their old role within the TTL at most.
+    """
+
+    def __init__(self, ttl=AUTH_ROLE_CACHE_TTL):
+        self.ttl = ttl
+        self.entries = {}     # user_id -> (role_name or None, expires_at)
+        self.changed_at = {}  # user_id -> wall-clock time of the last invalidation
+        self.hits = 0
+        self.claim_hits = 0
+        self.misses = 0
+
+    def role_for(self, user_id, claims=None):
+        """The user's role name, or None if the user doesn't exist (or has no role)."""
+        now = time.time()
+        entry = self.entries.get(user_id)
+        if entry and entry[1] > now:
+            self.hits += 1
+            return entry[0]
+
+        claims = claims or {}
+        issued_at = claims.get('iat', 0)
+        if (ROLE_CLAIM in claims and now - issued_at < self.ttl
+                and issued_at > self.changed_at.get(user_id, 0)):
+            self.claim_hits += 1
+            # Trust the claim only for the rest of the token's trusted window
+            self.entries[user_id] = (claims[ROLE_CLAIM], issued_at + self.ttl)
+            return claims[ROLE_CLAIM]
+
+        self.misses += 1
+        user = db.session.get(User, user_id, options=[joinedload(User.role)])
+        role_name = user.role.role_name if user and user.role else None
+        self.entries[user_id] = (role_name, now + self.ttl)
+        return role_name
+
+    def invalidate(self, user_id):
+        """Call after committing a change to (or the deletion of) a user."""
+        now = time.time()
+        self.entries.pop(user_id, None)
+        self.changed_at[user_id] = now
+        # Older marks no longer matter: tokens from before them are past the TTL anyway
+        for uid, changed in list(self.changed_at.items()):
+            if now - changed > self.ttl:
+                del self.changed_at[uid]
+
+    def stats(self):
+        return {
+            'ttl_seconds': self.ttl,
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'claim_hits': self.claim_hits,
+            'misses': self.misses,
+        }
+
+
+# Shared instance used by admin_required and the user routes
+role_cache = RoleCache()
@@ -0,0 +1,317 @@
+# backend/rollups.py
+"""
+Hourly event rollups (table event_hourly_rollups).
+
+One row per (hour, camera, location, event class) with the number of events
+and how many of them are acknowledged. The location is the camera's current
+one (as in backfill()): when a camera moves, its rows are re-keyed to the new
+location (move_camera()), so later deltas for its older events land on the
+same rows as their original +1. The rows are kept up to date in the same
+transaction as the event_logs change:
+  - ORM inserts, acknowledgements and deletes of EventLog, and ORM changes
+    of Camera.loc_id, are picked up by an after_flush listener
+    (register_rollup_listeners()).
+  - Bulk UPDATEs that bypass the ORM must call apply_acknowledgements(),
+    Core INSERTs (event_writer.py) apply_new_events() and Core DELETEs
+    (retention.py) apply_deleted_events().
+The dashboard summary then reads at most hours x cameras x classes rows,
+however large event_logs gets.
+
+Rebuild from history (e.g. after migration 0003), from the backend folder:
+    python rollups.py backfill                 # everything
+    python rollups.py backfill --since 2025-01-01
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import case, create_engine, event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, attributes
+
+from models import Camera, EventHourlyRollup, EventLog
+
+ACKNOWLEDGED = 'acknowledged'
+NO_ID = 0  # Stored instead of NULL camera/location/class ids (they are part of the key)
+
+
+def hour_of(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _key(timestamp, cam_id, loc_id, event_class_id):
+    return (hour_of(timestamp), cam_id or NO_ID, loc_id or NO_ID, event_class_id or NO_ID)
+
+
+def _update_or_insert(conn, table, rows):
+    """
+    Upsert for databases without one: an UPDATE per row, then an INSERT of
+    the missing ones. A row inserted by a concurrent transaction in between
+    fails the INSERT (inside a savepoint) and is updated instead.
+    """
+    key_columns = [c.name for c in table.primary_key.columns]
+    for row in rows:
+        matches = [table.c[name] == row[name] for name in key_columns]
+        update = table.update().where(*matches).values(
+            event_count=table.c.event_count + row['event_count'],
+            acknowledged_count=table.c.acknowledged_count + row['acknowledged_count'],
+        )
+        if conn.execute(update).rowcount:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(table.insert().values(row))
+        except IntegrityError:
+            conn.execute(update)
+
+
+def apply_increments(conn, increments):
+    """
+    Adds {(hour, cam_id, loc_id, event_class_id): [events, acknowledged]} deltas
+    to the rollup rows, creating them as needed, with one upsert statement
+    (MySQL, SQLite, PostgreSQL) or an UPDATE/INSERT per row (other databases).
+    """
+    rows = [{
+        'hour_start': hour, 'cam_id': cam_id, 'loc_id': loc_id, 'event_class_id': class_id,
+        'event_count': events, 'acknowledged_count': acked,
+    } for (hour, cam_id, loc_id, class_id), (events, acked) in increments.items() if events or acked]
+    if not rows:
+        return
+
+    table = EventHourlyRollup.__table__
+    dialect = conn.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            event_count=table.c.event_count + stmt.inserted.event_count,
+            acknowledged_count=table.c.acknowledged_count + stmt.inserted.acknowledged_count,
+        )
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in table.primary_key.columns],
+            set_={
+                'event_count': table.c.event_count + stmt.excluded.event_count,
+                'acknowledged_count': table.c.acknowledged_count + stmt.excluded.acknowledged_count,
+            },
+        )
+    else:
+        _update_or_insert(conn, table, rows)
+        return
+    conn.execute(stmt)
+
+
+def _load_event_keys(conn, log_ids):
+    """{id: (key, event_status)} for event logs, read back from the database."""
+    rows = conn.execute(
+        select(EventLog.id, EventLog.timestamp, EventLog.cam_id, Camera.loc_id,
+               EventLog.event_class_id, EventLog.event_status)
+        .outerjoin(Camera, EventLog.cam_id == Camera.id)
+        .where(EventLog.id.in_(log_ids))
+    )
+    return {
+        row.id: (_key(row.timestamp, row.cam_id, row.loc_id, row.event_class_id), row.event_status)
+        for row in rows if row.timestamp is not None
+    }
+
+
+def apply_acknowledgements(conn, log_ids, acknowledged=True):
+    """
+    Rollup update for event logs whose status was changed to (or away from)
+    'acknowledged' by a bulk UPDATE. Call it in the same transaction.
+    """
+    if not log_ids:
+        return
+    increments = defaultdict(lambda: [0, 0])
+    for key, _ in _load_event_keys(conn, list(log_ids)).values():
+        increments[key][1] += 1 if acknowledged else -1
+    apply_increments(conn, increments)
+
+
+def _apply_rows(conn, rows, sign):
+    cam_ids = {row['cam_id'] for row in rows if row.get('cam_id')}
+    locations = dict(conn.execute(select(Camera.id, Camera.loc_id).where(Camera.id.in_(cam_ids))).all()) if cam_ids else {}
+    increments = defaultdict(lambda: [0, 0])
+    for row in rows:
+        if row.get('timestamp') is None:
+            continue
+        key = _key(row['timestamp'], row.get('cam_id'), locations.get(row.get('cam_id')), row.get('event_class_id'))
+        increments[key][0] += sign
+        increments[key][1] += sign * (row.get('event_status') == ACKNOWLEDGED)
+    apply_increments(conn, increments)
+
+
+def apply_new_events(conn, rows):
+    """
+    Rollup update for event_logs rows inserted with Core statements (multi-row
+    INSERTs skip the ORM listener). `rows` are the inserted values: dicts with
+    timestamp, cam_id, event_class_id and event_status. Same transaction.
+    """
+    _apply_rows(conn, rows, 1)
+
+
+def apply_deleted_events(conn, rows):
+    """
+    Rollup update for event_logs rows deleted with Core statements. `rows`
+    are the deleted rows' values (as for apply_new_events). Same transaction.
+    """
+    _apply_rows(conn, rows, -1)
+
+
+def move_camera(conn, cam_id, loc_id):
+    """
+    Re-keys a camera's rollup rows to its new location (merging into rows
+    already there). Call it in the transaction that changes Camera.loc_id.
+    """
+    table = EventHourlyRollup.__table__
+    loc_id = loc_id or NO_ID
+    moved = table.c.cam_id == cam_id, table.c.loc_id != loc_id
+    increments = defaultdict(lambda: [0, 0])
+    for row in conn.execute(select(table.c.hour_start, table.c.event_class_id, table.c.event_count,
+                                   table.c.acknowledged_count).where(*moved)):
+        key = (row.hour_start, cam_id, loc_id, row.event_class_id)
+        increments[key][0] += row.event_count
+        increments[key][1] += row.acknowledged_count
+    if not increments:
+        return
+    conn.execute(table.delete().where(*moved))
+    apply_increments(conn, increments)
+
+
+def prune_empty(conn):
+    """Deletes rollup rows left at zero events (e.g. after retention). Returns how many."""
+    table = EventHourlyRollup.__table__
+    return conn.execute(table.delete().where(table.c.event_count <= 0)).rowcount
+
+
+def _after_flush(session, flush_context):
+    """Turns the EventLog inserts/updates/deletes (and camera moves) of a flush into rollup deltas."""
+    moved_cameras = {}  # cam_id -> new loc_id
+    for obj in session.dirty:
+        if isinstance(obj, Camera) and attributes.get_history(obj, 'loc_id').has_changes():
+            moved_cameras[obj.id] = obj.loc_id
+    if moved_cameras:
+        # First, so the deltas below (keyed by the new location) land on the moved rows
+        conn = session.connection()
+        for cam_id, loc_id in moved_cameras.items():
+            move_camera(conn, cam_id, loc_id)
+
+    new_ids = [obj.id for obj in session.new if isinstance(obj, EventLog)]
+    changed = {}  # id -> +1 / -1 change of "is acknowledged"
+    increments = defaultdict(lambda: [0, 0])
+
+    for obj in session.dirty:
+        if not isinstance(obj, EventLog):
+            continue
+        history = attributes.get_history(obj, 'event_status')
+        if not history.has_changes():
+            continue
+        was = ACKNOWLEDGED in (history.deleted or ())
+        now = obj.event_status == ACKNOWLEDGED
+        if was != now:
+            changed[obj.id] = 1 if now else -1
+
+    deleted = [obj for obj in session.deleted if isinstance(obj, EventLog) and obj.timestamp is not None]
+    if not (new_ids or changed or deleted):
+        return
+
+    conn = session.connection()
+    if deleted:
+        # The rows are gone; use the in-memory values (and the cameras' locations)
+        cam_ids = {obj.cam_id for obj in deleted if obj.cam_id}
+        locations = dict(conn.execute(select(Camera.id, Camera.loc_id).where(Camera.id.in_(cam_ids))).all()) if cam_ids else {}
+        for obj in deleted:
+            key = _key(obj.timestamp, obj.cam_id, locations.get(obj.cam_id), obj.event_class_id)
+            increments[key][0] -= 1
+            increments[key][1] -= obj.event_status == ACKNOWLEDGED
+
+    if new_ids or changed:
+        # Read back ids/timestamps (the timestamp is set by the database)
+        loaded = _load_event_keys(conn, new_ids + list(changed))
+        for log_id in new_ids:
+            if log_id in loaded:
+                key, status = loaded[log_id]
+                increments[key][0] += 1
+                increments[key][1] += status == ACKNOWLEDGED
+        for log_id, delta in changed.items():
+            if log_id in loaded:
+                increments[loaded[log_id][0]][1] += delta
+    apply_increments(conn, increments)
+
+
+def register_rollup_listeners():
+    """Keeps event_hourly_rollups in step with every ORM session's EventLog changes."""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+def backfill(conn, since=None):
+    """
+    Rebuilds the rollup rows (all of them, or from `since` on) from event_logs.
+    Aggregation is a single grouped scan; run it off-peak on big tables.
+    Returns the number of rollup rows written.
+    """
+    table = EventHourlyRollup.__table__
+    delete = table.delete()
+    if since is not None:
+        since = hour_of(since)
+        delete = delete.where(table.c.hour_start >= since)
+    conn.execute(delete)
+
+    dialect = conn.dialect.name
+    if dialect == 'mysql':
+        hour = func.date_format(EventLog.timestamp, '%Y-%m-%d %H:00:00')
+    elif dialect == 'sqlite':
+        hour = func.strftime('%Y-%m-%d %H:00:00', EventLog.timestamp)
+    else:
+        hour = func.date_trunc('hour', EventLog.timestamp)
+    hour = hour.label('hour')
+
+    query = select(
+        hour, EventLog.cam_id, Camera.loc_id, EventLog.event_class_id,
+        func.count().label('events'),
+        func.sum(case((EventLog.event_status == ACKNOWLEDGED, 1), else_=0)).label('acked'),
+    ).outerjoin(Camera, EventLog.cam_id == Camera.id).where(
+        EventLog.timestamp.isnot(None)
+    ).group_by(hour, EventLog.cam_id, Camera.loc_id, EventLog.event_class_id)
+    if since is not None:
+        query = query.where(EventLog.timestamp >= since)
+
+    increments = defaultdict(lambda: [0, 0])
+    for row in conn.execute(query):
+        hour_start = row.hour if isinstance(row.hour, datetime) else datetime.strptime(row.hour, '%Y-%m-%d %H:%M:%S')
+        key = _key(hour_start, row.cam_id, row.loc_id, row.event_class_id)
+        increments[key][0] += row.events
+        increments[key][1] += row.acked or 0
+
+    items = list(increments.items())
+    for start in range(0, len(items), 1000):
+        apply_increments(conn, dict(items[start:start + 1000]))
+    return len(items)
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Hourly event rollups")
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--since', help='only rebuild from this date on (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    load_dotenv()
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        sys.exit("DATABASE_URL is not set.")
+
+    since = datetime.strptime(args.since, '%Y-%m-%d') if args.since else None
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        written = backfill(conn, since)
+    print(f"Backfill done: {written} rollup rows written.")
@@ -1,37 +1,39 @@
 # backend/routes/camera_routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from database import db
 from models import Camera, Location
 from flask_jwt_extended import jwt_required
+from reference_cache import reference_cache, conditional_json
 import traceback
 
 # Define a Flask Blueprint
 camera_routes = Blueprint('camera_routes', __name__)
 
+def _reference_data_changed():
+    """
+    Call after committing a camera or location change: drops the cached
+    reference data (on every node, in multi-worker mode) and tells the stream
+    supervisor (if running) to start/stop frame producers so they match the
+    camera table.
+    """
+    reference_cache.invalidate()
+    cluster = current_app.extensions.get('cluster')
+    if cluster:
+        cluster.reference_data_changed()
+    supervisor = current_app.extensions.get('stream_supervisor')
+    if supervisor:
+        supervisor.sync()
+
 # --- Camera Routes ---
 
 @camera_routes.route('/cameras', methods=['GET'])
 def get_all_cameras():
     """
-    GET all cameras from the database.
+    GET all cameras (served from the reference cache, with ETag/304).
     """
     try:
-        cameras = Camera.query.all()
-        
-        # Convert the list of camera objects into a list of dictionaries
-        camera_list = []
-        for cam in cameras:
-            camera_list.append({
-                "id": cam.id,
-                "name": cam.cam_name,
-                "status": cam.cam_status,
-                "stream_url": cam.stream_url,
-                "location_id": cam.loc_id,
-                # Safely access the location name
-                "location_name": cam.location.loc_name if cam.location else None
-            })
-            
-        return jsonify({"status": "success", "cameras": camera_list}), 200
+        snapshot = reference_cache.snapshot()
+        return conditional_json(snapshot, {"status": "success", "cameras": snapshot.cameras})
     
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -66,6 +68,7 @@ def create_camera():
     try:
         db.session.add(new_camera)
         db.session.commit()
+        _reference_data_changed()
         
         # Return the newly created camera object
         return jsonify({
@@ -115,6 +118,7 @@ def update_camera(cam_id):
         # You could also update stream_url here if passed
 
         db.session.commit()
+        _reference_data_changed()
         
         return jsonify({
             "status": "success",
@@ -141,6 +145,7 @@ def delete_camera(cam_id):
         # 2. Delete it from the database
         db.session.delete(camera)
         db.session.commit()
+        _reference_data_changed()
         
         return jsonify({"status": "success", "message": f"Camera {cam_id} deleted"}), 200
     
@@ -178,6 +183,7 @@ def bulk_update_camera_status():
                 updated_count += 1
         
         db.session.commit()
+        _reference_data_changed()
         
         return jsonify({
             "status": "success", 
@@ -195,12 +201,11 @@ def bulk_update_camera_status():
 @camera_routes.route('/locations', methods=['GET'])
 def get_all_locations():
     """
-    GET all locations from the database.
+    GET all locations (served from the reference cache, with ETag/304).
     """
     try:
-        locations = Location.query.all()
-        location_list = [{"id": loc.id, "name": loc.loc_name} for loc in locations]
-        return jsonify({"status": "success", "locations": location_list}), 200
+        snapshot = reference_cache.snapshot()
+        return conditional_json(snapshot, {"status": "success", "locations": snapshot.locations})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -225,6 +230,7 @@ def create_location():
     try:
         db.session.add(new_location)
         db.session.commit()
+        _reference_data_changed()
         
         return jsonify({
             "status": "success",
@@ -262,6 +268,7 @@ def update_location(loc_id):
         # 4. Update and save
         loc.loc_name = new_name
         db.session.commit()
+        _reference_data_changed()
         
         return jsonify({"status": "success", "message": "Location updated"}), 200
 
@@ -292,6 +299,7 @@ def delete_location(loc_id):
         # 3. Delete the location
         db.session.delete(loc)
         db.session.commit()
+        _reference_data_changed()
         
         return jsonify({"status": "success", "message": f"Location '{loc.loc_name}' deleted"}), 200
 
@@ -1,8 +1,25 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import EventLog, EventType, Camera, Location, EventClass, User 
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from werkzeug.exceptions import HTTPException
+from werkzeug.wsgi import FileWrapper
+from models import EventLog, EventType, Camera, Location, EventClass, User, EventHourlyRollup
+from reference_cache import reference_cache
+from clip_recorder import (
+    CLIP_ACCEL_REDIRECT, CLIP_CHUNK_BYTES, CLIP_MAX_AGE, CLIP_TOKEN_MAX_AGE, MappedFile, resolve_clip_path
+)
+from retention import restore_archived_clip
+from executor import blocking_executor
+from rollups import apply_acknowledgements
 from database import db
 import traceback
+import base64
+import csv
+import io
+import json
+import os
+import time
+from sqlalchemy import and_, or_
 from sqlalchemy.sql import func 
 from datetime import datetime, timedelta # 👈 IMPORTED FOR DATE FILTERING
 
@@ -10,97 +27,151 @@ from datetime import datetime, timedelta # 👈 IMPORTED FOR DATE FILTERING
 event_routes = Blueprint('event_routes', __name__)
 
 
-# 2. Define your /event_logs route
+# 2. Paging limits for /event_logs
+DEFAULT_PAGE_SIZE = 50   # Used when the client sends no 'limit'
+MAX_PAGE_SIZE = 200      # Hard cap, whatever the client asks for
+
+
+def encode_cursor(log):
+    """Opaque cursor pointing just after `log` in (timestamp DESC, id DESC) order."""
+    payload = json.dumps({'ts': log.timestamp.isoformat(), 'id': log.id})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Returns (timestamp, id) from a cursor. Raises ValueError if it is malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(payload['ts']), int(payload['id'])
+    except (TypeError, KeyError, ValueError) as e:  # ValueError covers bad base64/JSON/dates
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def build_event_log_query(start_date_str=None, end_date_str=None):
+    """
+    Joined event log query with the optional date filters applied, newest first.
+    Ordered by (timestamp, id) so rows with the same timestamp keep a fixed order.
+    """
+    # Start the complex query construction with joins
+    log_query = db.session.query(
+        EventLog,
+        # 1. RESOLVE EVENT CLASS NAME (Incident Classification)
+        EventClass.class_name.label('event_class_name'), 
+        # 2. RESOLVE LOCATION/CAMERA NAMES
+        Camera.cam_name.label('camera_name'),
+        Location.loc_name.label('location_name'),
+        # 3. RESOLVE ACKNOWLEDGED BY USERNAME (User.username)
+        User.username.label('acknowledged_by_username')
+    ).join(
+        Camera, EventLog.cam_id == Camera.id 
+    ).join(
+        Location, Camera.loc_id == Location.id 
+    ).join(
+        EventClass, EventLog.event_class_id == EventClass.id 
+    # Use LEFT OUTER JOIN for the User table because ack_by_user_id can be NULL
+    ).outerjoin( 
+        User, EventLog.ack_by_user_id == User.id
+    ).order_by(
+        EventLog.timestamp.desc(), EventLog.id.desc()
+    )
+    
+    # Filter by Start Date (Inclusive: >= selected date at 00:00:00)
+    if start_date_str:
+        try:
+            # Convert YYYY-MM-DD string to datetime object (defaults to 00:00:00)
+            start_filter_dt = datetime.strptime(start_date_str, '%Y-%m-%d')
+            log_query = log_query.filter(EventLog.timestamp >= start_filter_dt)
+        except ValueError:
+            # If the date format is invalid, skip the filter but continue
+            print(f"Warning: Invalid start_date format received: {start_date_str}")
+
+    # Filter by End Date (Exclusive: < the next day at 00:00:00)
+    if end_date_str:
+        try:
+            # Convert YYYY-MM-DD string to a datetime object (will be at 00:00:00)
+            end_date_obj = datetime.strptime(end_date_str, '%Y-%m-%d')
+            
+            # Add one day to get the start of the next day
+            # e.g., 2025-11-17 -> 2025-11-18 00:00:00
+            next_day_midnight = end_date_obj + timedelta(days=1)
+            
+            # Apply filter: timestamp < next_day_midnight 
+            log_query = log_query.filter(EventLog.timestamp < next_day_midnight)
+        except ValueError:
+            # If the date format is invalid, skip the filter but continue
+            print(f"Warning: Invalid end_date format received: {end_date_str}")
+
+    return log_query
+
+
+def serialize_event_log(log, event_class_name, camera_name, location_name, acknowledged_by_username):
+    """One row of build_event_log_query() as the dict the frontend expects."""
+    # Formatting the timestamp to match the frontend's expected locale string: MM/DD/YYYY, HH:MM:SS AM/PM
+    # Note: The frontend will likely use its own Date() constructor, but providing this standard helps
+    formatted_timestamp = log.timestamp.strftime('%m/%d/%Y, %I:%M:%S %p') if log.timestamp else None
+    
+    return {
+        "id": log.id,
+        "event_class_name": event_class_name, 
+        "camera_name": camera_name,
+        "location": location_name,
+        "timestamp": formatted_timestamp, # Send formatted string
+        "status": log.event_status,
+        "acknowledged_by_username": acknowledged_by_username,
+        "file_path": log.file_path
+    }
+
+
+# 3. Define your /event_logs route
 @event_routes.route('/event_logs', methods=['GET'])
 @jwt_required()  # Protect this endpoint
 def get_event_logs():
+    """
+    Returns one page of event logs, newest first.
+    Query params: limit (page size, capped at MAX_PAGE_SIZE), start_date, end_date
+    (YYYY-MM-DD) and cursor (the 'next_cursor' of the previous page).
+    Pages are keyed on (timestamp, id) instead of OFFSET, so a deep page costs
+    the same as the first one and new events don't shift the pages being read.
+    """
     try:
         # --- 1. Get Query Parameters ---
         limit_param = request.args.get('limit', default=None, type=int)
         start_date_str = request.args.get('start_date', type=str)
         end_date_str = request.args.get('end_date', type=str)
+        cursor = request.args.get('cursor', type=str)
 
-        # Start the complex query construction with joins
-        log_query = db.session.query(
-            EventLog,
-            # 1. RESOLVE EVENT CLASS NAME (Incident Classification)
-            EventClass.class_name.label('event_class_name'), 
-            # 2. RESOLVE LOCATION/CAMERA NAMES
-            Camera.cam_name.label('camera_name'),
-            Location.loc_name.label('location_name'),
-            # 3. RESOLVE ACKNOWLEDGED BY USERNAME (User.username)
-            User.username.label('acknowledged_by_username')
-        ).join(
-            Camera, EventLog.cam_id == Camera.id 
-        ).join(
-            Location, Camera.loc_id == Location.id 
-        ).join(
-            EventClass, EventLog.event_class_id == EventClass.id 
-        # Use LEFT OUTER JOIN for the User table because ack_by_user_id can be NULL
-        ).outerjoin( 
-            User, EventLog.ack_by_user_id == User.id
-        ).order_by(
-            EventLog.timestamp.desc()
-        )
-        
-        # --- 2. Apply Date Filters ---
-        
-        # Filter by Start Date (Inclusive: >= selected date at 00:00:00)
-        if start_date_str:
-            try:
-                # Convert YYYY-MM-DD string to datetime object (defaults to 00:00:00)
-                start_filter_dt = datetime.strptime(start_date_str, '%Y-%m-%d')
-                log_query = log_query.filter(EventLog.timestamp >= start_filter_dt)
-            except ValueError:
-                # If the date format is invalid, skip the filter but continue
-                print(f"Warning: Invalid start_date format received: {start_date_str}")
+        page_size = limit_param if limit_param is not None and limit_param > 0 else DEFAULT_PAGE_SIZE
+        page_size = min(page_size, MAX_PAGE_SIZE)
+
+        # --- 2. Build the query (joins + date filters) ---
+        log_query = build_event_log_query(start_date_str, end_date_str)
 
-        # Filter by End Date (Exclusive: < the next day at 00:00:00)
-        if end_date_str:
+        # --- 3. Continue after the cursor row ---
+        if cursor:
             try:
-                # Convert YYYY-MM-DD string to a datetime object (will be at 00:00:00)
-                end_date_obj = datetime.strptime(end_date_str, '%Y-%m-%d')
-                
-                # Add one day to get the start of the next day
-                # e.g., 2025-11-17 -> 2025-11-18 00:00:00
-                next_day_midnight = end_date_obj + timedelta(days=1)
-                
-                # Apply filter: timestamp < next_day_midnight 
-                log_query = log_query.filter(EventLog.timestamp < next_day_midnight)
-            except ValueError:
-                # If the date format is invalid, skip the filter but continue
-                print(f"Warning: Invalid end_date format received: {end_date_str}")
-        
-        # --- 3. Apply Limit ---
-        if limit_param is not None and limit_param > 0:
-            log_query = log_query.limit(limit_param) 
-        
-        # Get logs
-        logs = log_query.all()
+                cursor_ts, cursor_id = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 400
+            log_query = log_query.filter(or_(
+                EventLog.timestamp < cursor_ts,
+                and_(EventLog.timestamp == cursor_ts, EventLog.id < cursor_id)
+            ))
+
+        # Get one extra row to know whether there is a next page
+        logs = log_query.limit(page_size + 1).all()
+        has_more = len(logs) > page_size
+        logs = logs[:page_size]
 
         # Serialize the data
-        results = []
-        # Unpack the tuple of results using the defined labels
-        for log, event_class_name, camera_name, location_name, acknowledged_by_username in logs:
-            # Formatting the timestamp to match the frontend's expected locale string: MM/DD/YYYY, HH:MM:SS AM/PM
-            # Note: The frontend will likely use its own Date() constructor, but providing this standard helps
-            formatted_timestamp = log.timestamp.strftime('%m/%d/%Y, %I:%M:%S %p') if log.timestamp else None
-            
-            results.append({
-                "id": log.id,
-                "event_class_name": event_class_name, 
-                "camera_name": camera_name,
-                "location": location_name,
-                "timestamp": formatted_timestamp, # Send formatted string
-                "status": log.event_status,
-                "acknowledged_by_username": acknowledged_by_username,
-                "file_path": log.file_path
-            })
+        results = [serialize_event_log(*row) for row in logs]
+        next_cursor = encode_cursor(logs[-1][0]) if has_more else None
 
         # ReportsPage.jsx expects 'data.report'
         return jsonify({
             'status': 'success',
-            'report': results
+            'report': results,
+            'page_size': page_size,
+            'next_cursor': next_cursor
         }), 200
 
     except Exception as e:
@@ -109,30 +180,378 @@ def get_event_logs():
         print(traceback.format_exc()) # Print full traceback to server console
         return jsonify({'status': 'error', 'message': f'Internal server error: {e}'}), 500
 
+# 4. Streaming export of event logs
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_BATCH_ROWS = 1000          # Rows fetched from the DB cursor at a time
+EXPORT_CHUNK_BYTES = 64 * 1024    # Bytes buffered before a chunk is sent
+
+EXPORT_COLUMNS = ('id', 'timestamp', 'event_class', 'camera', 'location',
+                  'status', 'acknowledged_by', 'file_path')
+
+
+def iter_export_chunks(rows, export_format):
+    """Turns export rows into CSV or NDJSON text chunks of about EXPORT_CHUNK_BYTES."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+
+    for row in rows:
+        values = list(row)
+        values[1] = values[1].isoformat(sep=' ') if values[1] else None
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values))))
+            buffer.write('\n')
+
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@event_routes.route('/event_logs/export', methods=['GET'])
+@jwt_required()
+def export_event_logs():
+    """
+    Streams every event log in the date range as CSV or NDJSON, newest first.
+    Query params: format (csv | ndjson), start_date, end_date (YYYY-MM-DD).
+    Rows are read from a server-side cursor in batches and written out as they
+    arrive, so memory stays flat and the first bytes go out right away.
+    """
+    export_format = request.args.get('format', default='csv', type=str).lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'status': 'error', 'message': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    start_date_str = request.args.get('start_date', type=str)
+    end_date_str = request.args.get('end_date', type=str)
+
+    # Same joins/filters/order as the report, but plain columns instead of ORM objects
+    export_query = build_event_log_query(start_date_str, end_date_str).with_entities(
+        EventLog.id,
+        EventLog.timestamp,
+        EventClass.class_name,
+        Camera.cam_name,
+        Location.loc_name,
+        EventLog.event_status,
+        User.username,
+        EventLog.file_path
+    ).execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS)
+
+    def generate():
+        try:
+            yield from iter_export_chunks(export_query, export_format)
+        except Exception as e:
+            # Headers are already sent; log and end the stream
+            db.session.rollback()
+            print(f"Error exporting event logs: {e}")
+            print(traceback.format_exc())
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"event_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+# 5. Dashboard summary (served from the hourly rollups, not from event_logs)
+@event_routes.route('/summary/daily', methods=['GET'])
+@jwt_required()
+def get_daily_summary():
+    """
+    Event counts for one day, or for the last 24 hours when no date is given.
+    Query param: date (YYYY-MM-DD, optional).
+    Reads event_hourly_rollups only, so the cost doesn't grow with event_logs.
+    """
+    try:
+        date_str = request.args.get('date', type=str)
+        if date_str:
+            try:
+                window_start = datetime.strptime(date_str, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'status': 'error', 'message': 'date must be YYYY-MM-DD'}), 400
+        else:
+            # Last 24 full/partial hours, including the current one
+            window_start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
+        window_end = window_start + timedelta(hours=24)
+
+        rollups = EventHourlyRollup.query.filter(
+            EventHourlyRollup.hour_start >= window_start,
+            EventHourlyRollup.hour_start < window_end
+        ).all()
+
+        hourly = {window_start + timedelta(hours=h): [0, 0] for h in range(24)}
+        by_location, by_camera, by_event_class = {}, {}, {}
+        for row in rollups:
+            counts = hourly.setdefault(row.hour_start, [0, 0])
+            counts[0] += row.event_count
+            counts[1] += row.acknowledged_count
+            for totals, key in ((by_location, row.loc_id), (by_camera, row.cam_id), (by_event_class, row.event_class_id)):
+                totals[key] = totals.get(key, 0) + row.event_count
+
+        # Names for the ids in the result (from the reference cache)
+        snapshot = reference_cache.snapshot()
+        location_names = {loc_id: loc['name'] for loc_id, loc in snapshot.locations_by_id.items()}
+        camera_names = {cam_id: cam['name'] for cam_id, cam in snapshot.cameras_by_id.items()}
+        class_names = {class_id: cls['name'] for class_id, cls in snapshot.event_classes_by_id.items()}
+
+        def breakdown(totals, names):
+            return sorted(
+                [{'id': key, 'name': names.get(key, 'Unknown'), 'events': count} for key, count in totals.items() if count],
+                key=lambda item: -item['events']
+            )
+
+        total_events = sum(counts[0] for counts in hourly.values())
+        acknowledged = sum(counts[1] for counts in hourly.values())
+
+        return jsonify({
+            'status': 'success',
+            'window_start': window_start.isoformat(),
+            'window_end': window_end.isoformat(),
+            'total_events': total_events,
+            'acknowledged': acknowledged,
+            'unacknowledged': total_events - acknowledged,
+            'hourly': [
+                {'hour': hour.isoformat(), 'events': counts[0], 'acknowledged': counts[1]}
+                for hour, counts in sorted(hourly.items())
+            ],
+            'by_location': breakdown(by_location, location_names),
+            'by_camera': breakdown(by_camera, camera_names),
+            'by_event_class': breakdown(by_event_class, class_names)
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error building daily summary: {e}")
+        print(traceback.format_exc())
+        return jsonify({'status': 'error', 'message': f'Internal server error: {e}'}), 500
+
 # --- UPDATED 'mark_event_viewed' to match SQL Schema ---
 @event_routes.route('/event_logs/<int:log_id>/view', methods=['PATCH'])
 @jwt_required()
 def mark_event_viewed(log_id):
     """
     Marks a specific event log as 'acknowledged' and records the user.
+    Takes the same path as the bulk acknowledge (row lock, UPDATE,
+    apply_acknowledgements), so a single and a bulk ack of the same row
+    can't both count it in the rollups.
     """
     try:
         # Get the user ID from the JWT token
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
 
-        log = EventLog.query.get(log_id)
-        if not log:
+        row = db.session.query(EventLog.id, EventLog.event_status).filter(
+            EventLog.id == log_id
+        ).with_for_update().first()
+        if not row:
             return jsonify({'status': 'error', 'message': 'Event log not found'}), 404
-        
-        # Update the columns from SQL schema
-        log.event_status = 'acknowledged'
-        log.ack_by_user_id = int(current_user_id) # Store the user who acknowledged
-        
+
+        acknowledged = row.event_status != 'acknowledged'
+        if acknowledged:
+            # Update the columns from SQL schema (and the rollups, which the UPDATE bypasses)
+            EventLog.query.filter(EventLog.id == log_id).update(
+                {'event_status': 'acknowledged', 'ack_by_user_id': current_user_id},
+                synchronize_session=False
+            )
+            apply_acknowledgements(db.session.connection(), [log_id])
         db.session.commit()
-        
+
+        if acknowledged:
+            _emit_acknowledged([log_id], current_user_id)
         return jsonify({'status': 'success', 'message': f'Event {log_id} marked as acknowledged.'}), 200
 
     except Exception as e:
         db.session.rollback()
         print(f"Error marking event as viewed: {e}")
-        return jsonify({'status': 'error', 'message': f'Internal server error: {e}'}), 500
\ No newline at end of file
+        return jsonify({'status': 'error', 'message': f'Internal server error: {e}'}), 500
+
+# --- Event clips ---
+# <video src> and new tabs can't send headers, so the clip URL carries a token
+# in its query string. It is not the access token (which would end up in
+# browser history and access logs) but a signed one for this clip only,
+# valid for CLIP_TOKEN_MAX_AGE seconds.
+
+def _clip_token_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='event-clip')
+
+
+@event_routes.route('/event_logs/<int:log_id>/clip_url', methods=['POST'])
+@jwt_required()
+def create_event_clip_url(log_id):
+    """Returns a short-lived URL for the clip of one event."""
+    if db.session.get(EventLog, log_id) is None:
+        return jsonify({'status': 'error', 'message': 'Event log not found'}), 404
+    token = _clip_token_serializer().dumps({'log_id': log_id, 'user_id': int(get_jwt_identity())})
+    return jsonify({
+        'status': 'success',
+        'url': url_for('event_routes.get_event_clip', log_id=log_id, token=token),
+        'expires_in': CLIP_TOKEN_MAX_AGE
+    }), 200
+
+
+@event_routes.route('/event_logs/<int:log_id>/clip', methods=['GET'])
+def get_event_clip(log_id):
+    """
+    Streams the clip recorded for an event (see clip_recorder.py).
+    Needs the ?token= from POST /event_logs/<id>/clip_url.
+    Supports Range requests (scrubbing) and conditional GETs (ETag and
+    Last-Modified). The file is served from an mmap in CLIP_CHUNK_BYTES
+    pieces, or handed to nginx when CLIP_ACCEL_REDIRECT is set. Clips moved
+    to an archive bundle by retention.py are restored first.
+    """
+    try:
+        claims = _clip_token_serializer().loads(request.args.get('token', ''), max_age=CLIP_TOKEN_MAX_AGE)
+    except SignatureExpired:
+        return jsonify({'status': 'error', 'message': 'Clip link expired'}), 401
+    except BadSignature:
+        return jsonify({'status': 'error', 'message': 'Invalid clip token'}), 401
+    if not isinstance(claims, dict) or claims.get('log_id') != log_id:
+        return jsonify({'status': 'error', 'message': 'Invalid clip token'}), 401
+
+    try:
+        log = db.session.get(EventLog, log_id)
+        path = resolve_clip_path(log.file_path) if log and log.file_path else None
+        if path and not os.path.isfile(path):
+            path = blocking_executor.run(restore_archived_clip, log.file_path)
+        if not path or not os.path.isfile(path):
+            return jsonify({'status': 'error', 'message': 'Clip not found'}), 404
+
+        if CLIP_ACCEL_REDIRECT:
+            response = current_app.response_class(mimetype='video/x-msvideo')
+            response.headers['X-Accel-Redirect'] = CLIP_ACCEL_REDIRECT.rstrip('/') + '/' + log.file_path
+            return response
+
+        stat = os.stat(path)
+        clip = MappedFile(path)
+        response = current_app.response_class(
+            FileWrapper(clip, CLIP_CHUNK_BYTES), mimetype='video/x-msvideo', direct_passthrough=True
+        )
+        response.content_length = stat.st_size
+        response.last_modified = stat.st_mtime
+        response.set_etag(f"clip-{log_id}-{int(stat.st_mtime)}-{stat.st_size}")
+        response.headers['Content-Disposition'] = f'inline; filename="{os.path.basename(path)}"'
+        response.cache_control.private = True  # The URL carries a token
+        response.cache_control.max_age = CLIP_MAX_AGE
+        try:
+            # 304 for If-None-Match / If-Modified-Since, 206 (or 416) for Range
+            return response.make_conditional(request, accept_ranges=True, complete_length=stat.st_size)
+        except HTTPException:
+            clip.close()
+            raise
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error serving clip for event {log_id}: {e}")
+        print(traceback.format_exc())
+        return jsonify({'status': 'error', 'message': f'Internal server error: {e}'}), 500
+
+
+# --- Bulk acknowledge ---
+MAX_BULK_ACK = 1000  # ids (or filter matches) handled per request
+
+
+def _parse_datetime(value, field):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid '{field}': expected an ISO date/time such as 2025-11-17T08:00:00")
+
+
+def _emit_acknowledged(ids, user_id):
+    """Tells every dashboard (reports table, alert sidebar) which logs were just acknowledged."""
+    socketio = current_app.extensions.get('socketio')
+    if not socketio:
+        return
+    user = db.session.get(User, user_id)
+    socketio.emit('events_acknowledged', {
+        'ids': ids,
+        'ack_by_user_id': user_id,
+        'ack_by_username': user.username if user else None,
+        'timestamp': int(time.time())
+    })
+
+
+@event_routes.route('/event_logs/acknowledge', methods=['POST'])
+@jwt_required()
+def acknowledge_event_logs():
+    """
+    Acknowledges many event logs with a single UPDATE.
+    Body: {"ids": [1, 2, ...]} or a filter {"cam_id": 3, "start": ..., "end": ...}
+    (ISO date/times, start inclusive, end exclusive). Returns a result per id;
+    when a filter matches more than MAX_BULK_ACK rows, 'more' is true and the
+    client repeats the call.
+    """
+    data = request.get_json(silent=True) or {}
+    current_user_id = int(get_jwt_identity())
+
+    # --- 1. Which rows ---
+    try:
+        ids = None
+        if 'ids' in data:
+            if not isinstance(data['ids'], list) or not data['ids']:
+                raise ValueError("'ids' must be a non-empty list")
+            ids = list(dict.fromkeys(int(log_id) for log_id in data['ids']))
+            if len(ids) > MAX_BULK_ACK:
+                raise ValueError(f"At most {MAX_BULK_ACK} ids per request")
+            conditions = [EventLog.id.in_(ids)]
+        else:
+            conditions = []
+            if data.get('cam_id') is not None:
+                conditions.append(EventLog.cam_id == int(data['cam_id']))
+            if data.get('start'):
+                conditions.append(EventLog.timestamp >= _parse_datetime(data['start'], 'start'))
+            if data.get('end'):
+                conditions.append(EventLog.timestamp < _parse_datetime(data['end'], 'end'))
+            if not conditions:
+                raise ValueError("Send 'ids' or a filter ('cam_id', 'start', 'end')")
+            conditions.append(EventLog.event_status != 'acknowledged')
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    try:
+        # --- 2. Lock the matching rows and sort out which still need it ---
+        rows = db.session.query(EventLog.id, EventLog.event_status).filter(
+            *conditions
+        ).order_by(EventLog.id).limit(MAX_BULK_ACK + 1).with_for_update().all()
+        more = len(rows) > MAX_BULK_ACK
+        rows = rows[:MAX_BULK_ACK]
+        status_by_id = dict(rows)
+        to_ack = [log_id for log_id, status in rows if status != 'acknowledged']
+
+        # --- 3. One set-based UPDATE (plus the rollups, which it bypasses) ---
+        if to_ack:
+            EventLog.query.filter(EventLog.id.in_(to_ack)).update(
+                {'event_status': 'acknowledged', 'ack_by_user_id': current_user_id},
+                synchronize_session=False
+            )
+            apply_acknowledgements(db.session.connection(), to_ack)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error bulk acknowledging events: {e}")
+        print(traceback.format_exc())
+        return jsonify({'status': 'error', 'message': f'Internal server error: {e}'}), 500
+
+    acked = set(to_ack)
+    results = [{
+        'id': log_id,
+        'result': 'acknowledged' if log_id in acked
+                  else 'already_acknowledged' if log_id in status_by_id
+                  else 'not_found'
+    } for log_id in (ids if ids is not None else status_by_id)]
+
+    # --- 4. One update for every other dashboard ---
+    if to_ack:
+        _emit_acknowledged(to_ack, current_user_id)
+
+    return jsonify({
+        'status': 'success',
+        'acknowledged': len(to_ack),
+        'results': results,
+        'more': more
+    }), 200
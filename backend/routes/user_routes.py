@@ -3,18 +3,35 @@ from flask import Blueprint, request, jsonify, current_app
 import bcrypt
 from database import db
 from models import User, Role
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from functools import wraps
 import traceback # Debugging server crashes
 from models import User, Role, EventLog
 from sqlalchemy.orm import joinedload
+from executor import blocking_executor
+from queries import users_query, serialize_user
+from role_cache import role_cache, ROLE_CLAIM
 
 user_routes = Blueprint('user_routes', __name__)
 
+# --- Password Helpers ---
+# bcrypt is deliberately slow (~250 ms); run it in the executor so a login
+# doesn't freeze the eventlet hub (and every video stream) while it hashes.
+def hash_password(password):
+    """ Returns the bcrypt hash of a plain-text password as a string. """
+    hashed = blocking_executor.run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
+    return hashed.decode('utf-8')
+
+def check_password(password, hashed_password):
+    """ Checks a plain-text password against a stored bcrypt hash. """
+    return blocking_executor.run(bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
+
 # --- Admin Role Check Decorator ---
 def admin_required(fn):
     """
     Decorator that checks if the logged-in user's role is 'Admin'.
+    The role comes from role_cache (token claim or cached lookup), so this
+    usually runs no query.
     """
     @wraps(fn)
     @jwt_required()
@@ -22,9 +39,9 @@ def admin_required(fn):
         try:
             user_id_str = get_jwt_identity()
             user_id = int(user_id_str)
-            user = User.query.get(user_id)
+            role_name = role_cache.role_for(user_id, get_jwt())
             
-            if user and user.role and user.role.role_name == 'Admin':
+            if role_name == 'Admin':
                 return fn(*args, **kwargs)
             else:
                 return jsonify(msg="Administration rights required"), 403
@@ -43,17 +60,18 @@ def login():
     if not username or not password:
         return jsonify({"status": "error", "message": "Missing username or password"}), 400
 
-    user = User.query.filter_by(username=username).first()
+    user = User.query.options(joinedload(User.role)).filter_by(username=username).first()
 
     if user and user.password:
         
-        is_password_valid = bcrypt.checkpw(
-            password.encode('utf-8'),
-            user.password.encode('utf-8')
-        )
+        is_password_valid = check_password(password, user.password)
 
         if is_password_valid:
-            access_token = create_access_token(identity=str(user.id)) 
+            # The role claim lets admin_required skip the database (see role_cache.py)
+            access_token = create_access_token(
+                identity=str(user.id),
+                additional_claims={ROLE_CLAIM: user.role.role_name if user.role else None}
+            )
             
             role_name = user.role.role_name if user.role else 'User' 
             return jsonify({
@@ -142,13 +160,11 @@ def change_password():
             return jsonify(msg="User session invalid."), 401
 
         # 2. Verify Old Password (Security Check)
-        if not user.password or not bcrypt.checkpw(old_password.encode('utf-8'), user.password.encode('utf-8')):
+        if not user.password or not check_password(old_password, user.password):
             return jsonify(msg="Invalid current password."), 403
 
         # 3. Hash and save the new password
-        hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-        
-        user.password = hashed_pw.decode('utf-8')
+        user.password = hash_password(new_password)
         db.session.commit()
         
         return jsonify({
@@ -176,19 +192,8 @@ def get_all_users():
         # NOTE: Ensure you are importing current_app and using app_context
         from flask import current_app 
         with current_app.app_context():
-            users = User.query.all()
-            
-            user_list = []
-            for user in users:
-                role_name = user.role.role_name if user.role else 'staff'
-                user_list.append({
-                    'id': user.id,
-                    'username': user.username,
-                    'firstname': user.firstname or 'N/A',
-                    'lastname': user.lastname or 'User', 
-                    'role': role_name,
-                    'userId': user.id 
-                })
+            # Roles are joined in the same query (no lazy load per user)
+            user_list = [serialize_user(user) for user in users_query()]
             return jsonify(user_list), 200
 
     except Exception as e:
@@ -222,7 +227,7 @@ def create_new_user():
                 return jsonify(msg="Username already exists."), 409
 
             # 3. Hash the password before saving
-            hashed_password = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt())
+            hashed_password = hash_password(data['password'])
 
             # 4. Find the Role ID based on the role name (e.g., 'Admin' -> 1)
             role = Role.query.filter_by(role_name=data['role']).first()
@@ -234,7 +239,7 @@ def create_new_user():
                 firstname=data['firstname'],
                 lastname=data['lastname'],
                 username=data['username'],
-                password=hashed_password.decode('utf-8'), # Store as string
+                password=hashed_password, # Store as string
                 role_id=role.id
             )
             db.session.add(new_user)
@@ -274,6 +279,7 @@ def delete_user_by_id(user_id):
             
             db.session.delete(user_to_delete)
             db.session.commit()
+            role_cache.invalidate(user_id)
 
             return jsonify({'status': 'success', 'message': f'User {user_id} deleted successfully.'}), 200
 
@@ -317,10 +323,10 @@ def update_user(user_id):
             # 3. Handle Password Change (Optional)
             if 'password' in data and data['password']:
                 # The frontend validates that password matches confirmPassword
-                hashed_password = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt())
-                user_to_update.password = hashed_password.decode('utf-8')
+                user_to_update.password = hash_password(data['password'])
 
             db.session.commit()
+            role_cache.invalidate(user_id)
 
             return jsonify({'status': 'success', 'message': f'User {user_id} updated successfully!'}), 200
 
@@ -0,0 +1,157 @@
+# backend/stream_ingest.py
+import os
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+from executor import blocking_executor
+from stream_manager import LatestFrameQueue
+
+# Set STREAM_INGEST=false to always use the mock frames, even for real URLs
+STREAM_INGEST_ENABLED = os.getenv('STREAM_INGEST', 'true').lower() in ('1', 'true', 'yes')
+
+# Reconnect backoff (seconds): doubles after every failure, resets once connected
+INGEST_BACKOFF_MIN = float(os.getenv('INGEST_BACKOFF_MIN', 1))
+INGEST_BACKOFF_MAX = float(os.getenv('INGEST_BACKOFF_MAX', 30))
+
+INGEST_CONNECT_TIMEOUT = 5    # seconds
+INGEST_READ_TIMEOUT = 10      # seconds without data before we reconnect
+INGEST_CHUNK_SIZE = 16 * 1024
+MAX_JPEG_BYTES = 4 * 1024 * 1024  # Anything bigger is treated as a corrupt stream
+
+JPEG_SOI = b'\xff\xd8'  # Start of image
+JPEG_EOI = b'\xff\xd9'  # End of image
+
+
+def is_ingestable(stream_url):
+    """True for URLs we can ingest (MJPEG over HTTP). RTSP is not supported yet."""
+    return bool(stream_url) and stream_url.lower().startswith(('http://', 'https://'))
+
+
+def iter_mjpeg_frames(chunks):
+    """
+    Splits a multipart/x-mixed-replace (MJPEG) byte stream into JPEG images.
+    Works on the JPEG start/end markers, so part headers and boundaries are skipped.
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+
+        while True:
+            start = buffer.find(JPEG_SOI)
+            if start < 0:
+                # Keep a trailing 0xFF in case the marker is split across chunks
+                del buffer[:max(len(buffer) - 1, 0)]
+                break
+            end = buffer.find(JPEG_EOI, start + 2)
+            if end < 0:
+                del buffer[:start]
+                if len(buffer) > MAX_JPEG_BYTES:
+                    buffer.clear()
+                break
+            yield bytes(buffer[start:end + 2])
+            del buffer[:end + 2]
+
+
+def decode_jpeg(jpeg_bytes, size):
+    """Decodes a JPEG into an RGB image of the given size. Runs in a worker thread."""
+    image = Image.open(BytesIO(jpeg_bytes))
+    # Let libjpeg downscale while decoding when the source is much larger
+    image.draft('RGB', size)
+    image = image.convert('RGB')
+    if image.size != size:
+        image = image.resize(size, Image.Resampling.BILINEAR)
+    return image
+
+
+class MJPEGFrameSource:
+    """
+    Frame source that ingests a camera's MJPEG-over-HTTP stream_url.
+
+    A reader green thread pulls JPEGs off the socket and hands them to a
+    decoder green thread through a LatestFrameQueue: when decoding falls
+    behind, stale JPEGs are dropped instead of queued. Decoding runs in the
+    shared blocking_executor so the hub (and the REST API) stays responsive.
+    """
+
+    def __init__(self, socketio, cam_id, stream_url, size, is_wanted=None):
+        self.socketio = socketio
+        self.cam_id = cam_id
+        self.stream_url = stream_url
+        self.size = size
+        self.is_wanted = is_wanted or (lambda cam_id: True)
+        self.pending = LatestFrameQueue()
+        self.latest = None
+        self.running = False
+        self.connected = False
+        self.frames_received = 0
+        self.frames_decoded = 0
+        self.decode_errors = 0
+        self.reconnects = 0
+
+    def start(self):
+        self.running = True
+        self.socketio.start_background_task(self._read_loop)
+        self.socketio.start_background_task(self._decode_loop)
+        return self
+
+    def read(self):
+        return self.latest
+
+    def close(self):
+        self.running = False
+
+    def _read_loop(self):
+        backoff = INGEST_BACKOFF_MIN
+        while self.running:
+            try:
+                with requests.get(
+                    self.stream_url, stream=True,
+                    timeout=(INGEST_CONNECT_TIMEOUT, INGEST_READ_TIMEOUT)
+                ) as response:
+                    response.raise_for_status()
+                    self.connected = True
+                    backoff = INGEST_BACKOFF_MIN
+                    print(f"Ingest: camera {self.cam_id} connected to {self.stream_url}")
+
+                    for jpeg in iter_mjpeg_frames(response.iter_content(INGEST_CHUNK_SIZE)):
+                        if not self.running:
+                            break
+                        self.frames_received += 1
+                        self.pending.put(jpeg)
+            except Exception as e:
+                print(f"Ingest: camera {self.cam_id} stream error: {e}")
+
+            self.connected = False
+            if not self.running:
+                break
+            self.reconnects += 1
+            print(f"Ingest: camera {self.cam_id} reconnecting in {backoff:.1f}s...")
+            self.socketio.sleep(backoff)
+            backoff = min(backoff * 2, INGEST_BACKOFF_MAX)
+
+    def _decode_loop(self):
+        while self.running:
+            jpeg = self.pending.get(timeout=1)
+            if jpeg is None or not self.is_wanted(self.cam_id):
+                continue
+            try:
+                self.latest = blocking_executor.run(decode_jpeg, jpeg, self.size)
+                self.frames_decoded += 1
+            except Exception as e:
+                self.decode_errors += 1
+                print(f"Ingest: camera {self.cam_id} could not decode frame: {e}")
+
+    def stats(self):
+        return {
+            'stream_url': self.stream_url,
+            'connected': self.connected,
+            'frames_received': self.frames_received,
+            'frames_decoded': self.frames_decoded,
+            'frames_dropped': self.pending.dropped,
+            'decode_errors': self.decode_errors,
+            'reconnects': self.reconnects,
+        }
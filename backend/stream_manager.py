@@ -0,0 +1,306 @@
+# backend/stream_manager.py
+import os
+import time
+import traceback
+
+from eventlet.queue import LightQueue, Empty, Full
+
+from metrics import FRAME_RENDER_SECONDS
+from queries import cameras_query
+
+# Default frame rate for every camera producer (override with STREAM_TARGET_FPS)
+STREAM_TARGET_FPS = float(os.getenv('STREAM_TARGET_FPS', 10))
+
+
+class LatestFrameQueue:
+    """
+    Bounded queue of size one. Putting a frame while the previous one is
+    still waiting replaces it, so a slow consumer only ever sees the newest frame.
+    """
+
+    def __init__(self):
+        self._queue = LightQueue(maxsize=1)
+        self.dropped = 0
+
+    def put(self, frame):
+        while True:
+            try:
+                self._queue.put_nowait(frame)
+                return
+            except Full:
+                # Discard the stale frame and try again
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Returns the next frame, or None if nothing arrived within `timeout`."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+
+class SubscriptionRegistry:
+    """
+    Tracks which clients are showing which cameras, in which rendition
+    ('thumb' or 'full') and over which transport. Every
+    (camera, rendition, transport) combination is one Socket.IO room.
+    """
+
+    def __init__(self):
+        self._by_camera = {}  # cam_id -> {sid: (rendition, transport)}
+        self._by_client = {}  # sid -> set of cam_ids
+
+    @staticmethod
+    def room(cam_id, rendition, transport):
+        return f"camera_{cam_id}_{rendition}_{transport}"
+
+    def subscribe(self, sid, cam_id, rendition, transport):
+        """
+        Returns (room_to_leave, room_to_join). room_to_leave is set when the
+        client switches rendition; both are None if nothing changed.
+        """
+        watchers = self._by_camera.setdefault(cam_id, {})
+        previous = watchers.get(sid)
+        if previous == (rendition, transport):
+            return None, None
+        watchers[sid] = (rendition, transport)
+        self._by_client.setdefault(sid, set()).add(cam_id)
+        old_room = self.room(cam_id, *previous) if previous else None
+        return old_room, self.room(cam_id, rendition, transport)
+
+    def unsubscribe(self, sid, cam_id):
+        """Returns the room to leave, or None if the client wasn't subscribed."""
+        watchers = self._by_camera.get(cam_id, {})
+        previous = watchers.pop(sid, None)
+        if not watchers:
+            self._by_camera.pop(cam_id, None)
+        self._by_client.get(sid, set()).discard(cam_id)
+        return self.room(cam_id, *previous) if previous else None
+
+    def remove_client(self, sid):
+        """Drops every subscription of a disconnected client."""
+        for cam_id in self._by_client.pop(sid, set()):
+            watchers = self._by_camera.get(cam_id, {})
+            watchers.pop(sid, None)
+            if not watchers:
+                self._by_camera.pop(cam_id, None)
+
+    def cameras_for(self, sid):
+        return set(self._by_client.get(sid, set()))
+
+    def has_subscribers(self, cam_id):
+        return bool(self._by_camera.get(cam_id))
+
+    def room_counts(self, cam_id):
+        """Returns {(rendition, transport): subscriber_count} for one camera."""
+        counts = {}
+        for key in self._by_camera.get(cam_id, {}).values():
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def all_room_counts(self):
+        """Returns {cam_id: {(rendition, transport): subscriber_count}} for every watched camera."""
+        return {cam_id: self.room_counts(cam_id) for cam_id in self._by_camera}
+
+
+class FrameProducer:
+    """
+    Reads and publishes frames for ONE camera at its own target FPS.
+    Reading and publishing run in separate green threads joined by a
+    LatestFrameQueue, so a slow publish never delays the next read.
+    publish_frame returns the bytes it sent, which feeds the per-stream stats.
+    While is_wanted(cam_id) is False (nobody subscribed) nothing is read.
+
+    `source` is any object with read() -> PIL image or None, and close():
+    a MockFrameSource or an MJPEGFrameSource (see stream_ingest.py).
+    """
+
+    def __init__(self, socketio, cam_id, source, publish_frame,
+                 target_fps=STREAM_TARGET_FPS, is_wanted=None):
+        self.socketio = socketio
+        self.cam_id = cam_id
+        self.source = source
+        self.publish_frame = publish_frame
+        self.target_fps = target_fps
+        self.is_wanted = is_wanted or (lambda cam_id: True)
+        self.queue = LatestFrameQueue()
+        self.running = False
+        self.frames_skipped = 0
+        self.frames_produced = 0
+        self.frames_published = 0
+        self.bytes_published = 0
+        self.render_cpu_seconds = 0.0
+        self.publish_cpu_seconds = 0.0
+        self.started_at = None
+
+    @property
+    def interval(self):
+        return 1.0 / self.target_fps
+
+    def start(self):
+        self.running = True
+        self.started_at = time.monotonic()
+        self.socketio.start_background_task(self._produce_loop)
+        self.socketio.start_background_task(self._publish_loop)
+
+    def stop(self):
+        self.running = False
+        self.source.close()
+
+    def _produce_loop(self):
+        next_tick = time.monotonic()
+        while self.running:
+            if not self.is_wanted(self.cam_id):
+                # Nobody is watching this camera: don't render or encode anything
+                self.frames_skipped += 1
+                next_tick = time.monotonic() + self.interval
+                self.socketio.sleep(self.interval)
+                continue
+
+            try:
+                cpu_start = time.thread_time()
+                wall_start = time.perf_counter()
+                frame = self.source.read()
+                FRAME_RENDER_SECONDS.observe(time.perf_counter() - wall_start, self.cam_id)
+                self.render_cpu_seconds += time.thread_time() - cpu_start
+                if frame is not None:
+                    self.queue.put(frame)
+                    self.frames_produced += 1
+            except Exception as e:
+                print(f"Error rendering frame for camera {self.cam_id}: {e}")
+
+            # Sleep until the next tick; if we fell behind, skip ahead instead of bursting
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self.socketio.sleep(delay)
+
+    def _publish_loop(self):
+        while self.running:
+            frame = self.queue.get(timeout=self.interval * 2)
+            if frame is None or not self.running:
+                continue
+            try:
+                cpu_start = time.thread_time()
+                self.bytes_published += self.publish_frame(self.cam_id, frame) or 0
+                self.publish_cpu_seconds += time.thread_time() - cpu_start
+                self.frames_published += 1
+            except Exception as e:
+                print(f"Error publishing frame for camera {self.cam_id}: {e}")
+
+    def stats(self):
+        uptime = max(time.monotonic() - self.started_at, 1e-6) if self.started_at else None
+        produced = max(self.frames_produced, 1)
+        published = max(self.frames_published, 1)
+        stats = {
+            'cam_id': self.cam_id,
+            'source': type(self.source).__name__,
+            'target_fps': self.target_fps,
+            'actual_fps': round(self.frames_published / uptime, 2) if uptime else 0,
+            'frames_produced': self.frames_produced,
+            'frames_skipped': self.frames_skipped,
+            'frames_published': self.frames_published,
+            'frames_dropped': self.queue.dropped,
+            'bytes_published': self.bytes_published,
+            'bytes_per_second': round(self.bytes_published / uptime) if uptime else 0,
+            'render_cpu_ms_per_frame': round(self.render_cpu_seconds * 1000 / produced, 3),
+            'publish_cpu_ms_per_frame': round(self.publish_cpu_seconds * 1000 / published, 3),
+        }
+        if hasattr(self.source, 'stats'):
+            stats['ingest'] = self.source.stats()
+        return stats
+
+
+class StreamSupervisor:
+    """
+    Keeps exactly one FrameProducer running for every active camera.
+    Call sync() whenever cameras are added, deleted or toggled.
+
+    make_source(cam_id, cam_name, stream_url) builds the frame source of a
+    camera; a producer is restarted when the camera's name or URL changes.
+    """
+
+    def __init__(self, app, socketio, make_source, publish_frame,
+                 target_fps=STREAM_TARGET_FPS, is_wanted=None, on_camera_removed=None,
+                 load_cameras=None):
+        self.app = app
+        self.socketio = socketio
+        self.make_source = make_source
+        self.publish_frame = publish_frame
+        self.target_fps = target_fps
+        self.is_wanted = is_wanted
+        self.on_camera_removed = on_camera_removed
+        # Callable returning [(cam_id, cam_name, stream_url)] of the enabled cameras
+        self.load_cameras = load_cameras or self._query_active_cameras
+        self.producers = {}  # cam_id -> (config, FrameProducer)
+        self.running = False
+
+    def start(self):
+        """Starts the supervisor and a producer for every active camera."""
+        if self.running:
+            return
+        print("Starting stream supervisor...")
+        self.running = True
+        self.sync()
+
+    def stop(self):
+        self.running = False
+        for _, producer in self.producers.values():
+            producer.stop()
+        self.producers.clear()
+
+    @staticmethod
+    def _query_active_cameras():
+        return [
+            (cam.id, cam.cam_name, cam.stream_url)
+            for cam in cameras_query(active_only=True)
+        ]
+
+    def sync(self):
+        """Reconciles running producers with the camera table."""
+        if not self.running:
+            return
+
+        try:
+            with self.app.app_context():
+                active = {cam_id: (cam_name, stream_url) for cam_id, cam_name, stream_url in self.load_cameras()}
+        except Exception as e:
+            print(f"Stream supervisor: could not load cameras: {e}")
+            print(traceback.format_exc())
+            return
+
+        # 1. Stop producers for cameras that were deleted, disabled or changed
+        for cam_id in list(self.producers):
+            config, producer = self.producers[cam_id]
+            if active.get(cam_id) == config:
+                continue
+            del self.producers[cam_id]
+            producer.stop()
+            if cam_id not in active and self.on_camera_removed:
+                self.on_camera_removed(cam_id)
+            print(f"Stream supervisor: stopped producer for camera {cam_id}")
+
+        # 2. Start producers for new (or changed) cameras
+        for cam_id, config in active.items():
+            if cam_id in self.producers:
+                continue
+            cam_name, stream_url = config
+            producer = FrameProducer(
+                self.socketio, cam_id, self.make_source(cam_id, cam_name, stream_url),
+                self.publish_frame, self.target_fps, self.is_wanted
+            )
+            self.producers[cam_id] = (config, producer)
+            producer.start()
+            print(f"Stream supervisor: started producer for camera {cam_id} at {self.target_fps} FPS")
+
+        if not active:
+            print("Stream supervisor: No active cameras in database. Waiting...")
+
+    def stats(self):
+        return [producer.stats() for _, producer in self.producers.values()]
@@ -0,0 +1,31 @@
+# backend/tests/conftest.py
+"""
+Unit tests, run from the backend folder:
+    python -m pytest
+
+They use an in-memory SQLite database and never import app.py (no
+producers, executor or Socket.IO server are started).
+"""
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.scratch_db  # noqa: E402,F401  (BIGINT ids auto-increment on SQLite)
+from database import db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """A bare Flask app with every table created in an in-memory database."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,90 @@
+# backend/tests/test_event_writer_spool.py
+import os
+from datetime import datetime
+
+import pytest
+
+import event_writer
+from event_writer import EventLogWriter, append_spool, read_spool
+
+
+def rows(count, start=0):
+    return [{
+        'timestamp': datetime(2025, 11, 17, 8, 0, i % 60), 'cam_id': 1, 'event_class_id': 1,
+        'event_status': 'unacknowledged', 'file_path': f'cam_1/{i}.avi',
+    } for i in range(start, start + count)]
+
+
+class FakeDatabase:
+    """Stands in for EventLogWriter._insert; fails the batches listed in fail_calls."""
+
+    def __init__(self, fail_calls=()):
+        self.batches = []
+        self.calls = 0
+        self.fail_calls = set(fail_calls)
+
+    def __call__(self, batch):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            raise RuntimeError('database down')
+        self.batches.append(batch)
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = EventLogWriter(None, None, batch_size=2, spool_path=str(tmp_path / 'spool' / 'event_logs.jsonl'))
+    writer.database = writer._insert = FakeDatabase()
+    return writer
+
+
+def test_spool_round_trip_skips_corrupt_lines(tmp_path):
+    path = str(tmp_path / 'spool.jsonl')
+    append_spool(path, rows(2))
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"cut off\n')
+    append_spool(path, rows(1, start=2))
+    assert read_spool(path) == rows(3)
+
+
+def test_replay_inserts_everything_in_batches_and_removes_the_file(writer):
+    append_spool(writer.spool_path, rows(5))
+    assert writer.spool_pending()
+    assert writer.replay_spool() == 5
+    assert [len(batch) for batch in writer.database.batches] == [2, 2, 1]
+    assert sum(writer.database.batches, []) == rows(5)
+    assert not writer.spool_pending()
+    assert (writer.replayed, writer.written) == (5, 5)
+
+
+def test_rows_after_a_failed_batch_go_back_to_the_spool(writer):
+    writer.database.fail_calls = {2}
+    append_spool(writer.spool_path, rows(5))
+    assert writer.replay_spool() == 2
+    assert not os.path.exists(writer.replay_path)
+    assert read_spool(writer.spool_path) == rows(3, start=2)
+
+    # Next replay (the database is back) writes the rest, each row once
+    assert writer.replay_spool() == 3
+    assert sum(writer.database.batches, []) == rows(5)
+
+
+def test_replay_file_is_kept_when_the_rows_cannot_be_spooled_again(writer, monkeypatch):
+    writer.database.fail_calls = {2}
+    append_spool(writer.spool_path, rows(5))
+
+    def disk_full(path, batch):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(event_writer, 'append_spool', disk_full)
+    assert writer.replay_spool() == 2
+    assert read_spool(writer.replay_path) == rows(5)  # Nothing lost (rows 0-1 may be inserted twice)
+
+
+def test_a_leftover_replay_file_is_replayed_before_new_spool_rows(writer):
+    append_spool(writer.replay_path, rows(1))  # From a replay that crashed
+    append_spool(writer.spool_path, rows(1, start=1))
+    assert writer.replay_spool() == 1
+    assert writer.database.batches == [rows(1)]
+    assert writer.spool_pending()
+    assert writer.replay_spool() == 1
+    assert not writer.spool_pending()
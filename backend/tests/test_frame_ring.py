@@ -0,0 +1,49 @@
+# backend/tests/test_frame_ring.py
+from clip_recorder import FrameRing
+
+
+def test_frames_come_back_oldest_first_as_bytes():
+    ring = FrameRing(slots=3, slot_bytes=16)
+    assert ring.append(b'one', 1.0)
+    assert ring.append(b'two', 2.0)
+    frames = ring.frames_since(0)
+    assert frames == [(1.0, b'one'), (2.0, b'two')]
+    assert all(type(jpeg) is bytes for _, jpeg in frames)
+
+
+def test_a_full_ring_overwrites_the_oldest_slot():
+    ring = FrameRing(slots=3, slot_bytes=16)
+    for i in range(1, 6):
+        ring.append(b'frame %d' % i, float(i))
+    assert ring.count == 3
+    assert ring.frames_since(0) == [(3.0, b'frame 3'), (4.0, b'frame 4'), (5.0, b'frame 5')]
+
+
+def test_a_shorter_frame_does_not_keep_the_old_slot_tail():
+    ring = FrameRing(slots=1, slot_bytes=16)
+    ring.append(b'a longer frame', 1.0)
+    ring.append(b'short', 2.0)
+    assert ring.frames_since(0) == [(2.0, b'short')]
+
+
+def test_oversized_frames_are_skipped():
+    ring = FrameRing(slots=2, slot_bytes=4)
+    assert ring.append(b'1234', 1.0)
+    assert not ring.append(b'12345', 2.0)
+    assert ring.frames_since(0) == [(1.0, b'1234')]
+
+
+def test_frames_since_filters_by_timestamp():
+    ring = FrameRing(slots=4, slot_bytes=8)
+    for i in range(4):
+        ring.append(bytes([i]), 10.0 + i)
+    assert [t for t, _ in ring.frames_since(12.0)] == [12.0, 13.0]
+    assert ring.frames_since(99.0) == []
+
+
+def test_copies_survive_later_overwrites():
+    ring = FrameRing(slots=1, slot_bytes=8)
+    ring.append(b'first', 1.0)
+    (_, copied), = ring.frames_since(0)
+    ring.append(b'second', 2.0)
+    assert copied == b'first'
@@ -0,0 +1,79 @@
+# backend/tests/test_role_cache.py
+import pytest
+
+import models
+import role_cache as role_cache_module
+from database import db
+from role_cache import ROLE_CLAIM, RoleCache
+from tools.scratch_db import seed_reference_data
+
+TTL = 60.0
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(role_cache_module.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def users(app):
+    seed_reference_data(db.session, models, users=2)  # user 1 is 'Admin', user 2 'Role 2'
+
+
+def test_database_result_is_cached_until_the_ttl(users, clock):
+    cache = RoleCache(ttl=TTL)
+    assert cache.role_for(1) == 'Admin'
+    db.session.get(models.User, 1).role_id = 2
+    db.session.commit()
+
+    clock.now += TTL - 1
+    assert cache.role_for(1) == 'Admin'  # Another process's change isn't seen yet
+    clock.now += 1
+    assert cache.role_for(1) == 'Role 2'
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_a_fresh_role_claim_skips_the_database(users, clock):
+    cache = RoleCache(ttl=TTL)
+    claims = {ROLE_CLAIM: 'Admin', 'iat': clock.now - 10}
+    assert cache.role_for(2, claims) == 'Admin'
+    assert (cache.claim_hits, cache.misses) == (1, 0)
+
+    # Trusted only for the rest of the token's window, then the database decides
+    clock.now += TTL - 10
+    assert cache.role_for(2, claims) == 'Role 2'
+    assert cache.misses == 1
+
+
+def test_a_claim_older_than_the_ttl_is_not_trusted(users, clock):
+    cache = RoleCache(ttl=TTL)
+    assert cache.role_for(2, {ROLE_CLAIM: 'Admin', 'iat': clock.now - TTL}) == 'Role 2'
+    assert cache.claim_hits == 0
+
+
+def test_invalidate_drops_the_entry_and_older_claims(users, clock):
+    cache = RoleCache(ttl=TTL)
+    claims = {ROLE_CLAIM: 'Admin', 'iat': clock.now - 1}
+    assert cache.role_for(2, claims) == 'Admin'
+
+    clock.now += 1
+    cache.invalidate(2)
+    assert cache.role_for(2, claims) == 'Role 2'
+    # A token issued after the change is trusted again (once the cached entry is gone)
+    clock.now += TTL
+    assert cache.role_for(2, {ROLE_CLAIM: 'Role 2', 'iat': clock.now - 1}) == 'Role 2'
+    assert cache.claim_hits == 2
+
+
+def test_deleted_users_have_no_role(app, clock):
+    assert RoleCache(ttl=TTL).role_for(99) is None
@@ -0,0 +1,75 @@
+# backend/tests/test_rollups.py
+from datetime import datetime
+
+import pytest
+
+import models
+import rollups
+from database import db
+from models import EventHourlyRollup, EventLog
+from tools.scratch_db import seed_reference_data
+
+NOON = datetime(2025, 11, 17, 12, 0)
+
+
+def rollup_counts():
+    return {
+        (row.hour_start, row.cam_id, row.loc_id, row.event_class_id): (row.event_count, row.acknowledged_count)
+        for row in db.session.query(EventHourlyRollup)
+    }
+
+
+@pytest.fixture
+def conn(app):
+    seed_reference_data(db.session, models, locations=2, cameras=2)
+    with db.engine.begin() as conn:
+        yield conn
+
+
+def test_increments_create_then_add_to_a_row(conn):
+    key = (NOON, 1, 1, 1)
+    rollups.apply_increments(conn, {key: [2, 1]})
+    rollups.apply_increments(conn, {key: [1, 1], (NOON, 2, 2, 1): [0, 0]})
+    rows = conn.execute(EventHourlyRollup.__table__.select()).all()
+    assert [(row.event_count, row.acknowledged_count) for row in rows] == [(3, 2)]
+
+
+def test_generic_path_matches_the_upsert(conn):
+    table = EventHourlyRollup.__table__
+    row = {'hour_start': NOON, 'cam_id': 1, 'loc_id': 1, 'event_class_id': 1,
+           'event_count': 2, 'acknowledged_count': 0}
+    rollups._update_or_insert(conn, table, [row])
+    rollups._update_or_insert(conn, table, [dict(row, event_count=-1, acknowledged_count=1)])
+    assert [(r.event_count, r.acknowledged_count) for r in conn.execute(table.select())] == [(1, 1)]
+
+
+def test_core_rows_are_keyed_by_hour_and_the_cameras_location(conn):
+    rows = [
+        {'timestamp': datetime(2025, 11, 17, 12, 5), 'cam_id': 2, 'event_class_id': 1, 'event_status': 'unacknowledged'},
+        {'timestamp': datetime(2025, 11, 17, 12, 59), 'cam_id': 2, 'event_class_id': 1, 'event_status': 'acknowledged'},
+        {'timestamp': None, 'cam_id': 2, 'event_class_id': 1, 'event_status': 'acknowledged'},
+    ]
+    rollups.apply_new_events(conn, rows)
+    rollups.apply_deleted_events(conn, rows[:1])
+    counts = {tuple(r[:4]): tuple(r[4:]) for r in conn.execute(EventHourlyRollup.__table__.select())}
+    assert counts == {(NOON, 2, 2, 1): (1, 1)}
+
+
+def test_orm_changes_update_the_rollups_in_the_same_flush(app):
+    rollups.register_rollup_listeners()
+    seed_reference_data(db.session, models, locations=2, cameras=1)
+    log = EventLog(timestamp=datetime(2025, 11, 17, 12, 30), cam_id=1, event_class_id=1)
+    db.session.add(log)
+    db.session.commit()
+    assert rollup_counts() == {(NOON, 1, 1, 1): (1, 0)}
+
+    log.event_status = 'acknowledged'
+    db.session.commit()
+    assert rollup_counts() == {(NOON, 1, 1, 1): (1, 1)}
+
+    # A camera move re-keys its rows, so later deltas land on them
+    db.session.get(models.Camera, 1).loc_id = 2
+    db.session.commit()
+    db.session.delete(log)
+    db.session.commit()
+    assert rollup_counts() == {(NOON, 1, 2, 1): (0, 0)}
@@ -0,0 +1,38 @@
+# backend/tests/test_stream_ingest.py
+import stream_ingest
+from stream_ingest import iter_mjpeg_frames
+
+
+def jpeg(body):
+    return b'\xff\xd8' + body + b'\xff\xd9'
+
+
+def part(frame):
+    return (b'--frame\r\nContent-Type: image/jpeg\r\n'
+            b'Content-Length: %d\r\n\r\n' % len(frame) + frame + b'\r\n')
+
+
+FRAMES = [jpeg(b'first'), jpeg(b'second \xff\x00 frame'), jpeg(b'third')]
+STREAM = b''.join(part(frame) for frame in FRAMES)
+
+
+def test_frames_come_out_without_part_headers():
+    assert list(iter_mjpeg_frames([STREAM])) == FRAMES
+
+
+def test_frames_split_across_chunks_at_every_byte():
+    # Includes splits inside the 0xFFD8 / 0xFFD9 markers
+    for size in range(1, 12):
+        chunks = [STREAM[i:i + size] for i in range(0, len(STREAM), size)]
+        assert list(iter_mjpeg_frames(chunks)) == FRAMES, size
+
+
+def test_empty_chunks_and_a_truncated_last_frame_are_ignored():
+    chunks = [b'', STREAM, b'', part(jpeg(b'cut off'))[:-6]]
+    assert list(iter_mjpeg_frames(chunks)) == FRAMES
+
+
+def test_an_oversized_frame_is_dropped_and_the_stream_recovers(monkeypatch):
+    monkeypatch.setattr(stream_ingest, 'MAX_JPEG_BYTES', 64)
+    chunks = [b'\xff\xd8' + b'x' * 100, b'y' * 100, part(jpeg(b'after'))]
+    assert list(iter_mjpeg_frames(chunks)) == [jpeg(b'after')]
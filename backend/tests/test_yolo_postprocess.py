@@ -0,0 +1,34 @@
+# backend/tests/test_yolo_postprocess.py
+import numpy as np
+
+from yolo_postprocess import postprocess_batch, reference_postprocess, top_per_image
+
+INPUT_SIZE = 640
+
+
+def small_boxes(rng, images, rows):
+    """(images, rows, 7) output of scattered small boxes (2 classes), all below threshold."""
+    output = np.zeros((images, rows, 7), dtype=np.float32)
+    output[..., :2] = rng.uniform(0, INPUT_SIZE, (images, rows, 2))
+    output[..., 2:4] = rng.uniform(5, 20, (images, rows, 2))
+    return output
+
+
+def test_top_per_image_keeps_the_best_of_each_image():
+    image_idx = np.array([0, 0, 0, 1, 1, 0])
+    scores = np.array([0.6, 0.9, 0.7, 0.8, 0.55, 0.9])
+    assert sorted(top_per_image(image_idx, scores, 2).tolist()) == [1, 3, 4, 5]
+
+
+def test_a_crowded_image_does_not_take_the_other_images_candidates():
+    output = small_boxes(np.random.default_rng(1), images=3, rows=200)
+    output[0, :, 4:6] = (0.99, 0.95)      # 200 strong candidates
+    output[1, :5, 4:6] = (0.8, 0.9)       # 5 weaker ones
+    output[2, :3, 4] = 0.7                # 3 weaker ones of class 1
+    output[2, :3, 6] = 0.9
+
+    results = postprocess_batch(output, INPUT_SIZE, max_candidates=50)
+
+    assert [len(detections) for detections in results] == [50, 5, 3]
+    for image, detections in enumerate(results):
+        assert detections == reference_postprocess(output[image].tolist(), INPUT_SIZE, max_candidates=50)
@@ -0,0 +1,186 @@
+# backend/tools/bench_clip_playback.py
+"""
+Concurrent clip playback through GET /api/event_logs/<id>/clip.
+
+Writes a synthetic clip (--seconds at 5 FPS of --frame-kb KB frames) into a
+temporary CLIP_DIR, serves the app with eventlet's WSGI server, then runs
+--clients concurrent players. Each player downloads the whole clip once and
+then scrubs: --seeks Range requests of --range-kb KB at random offsets, the
+way a <video> element does. Reports throughput, request latency and how much
+the process's private memory grew during playback (the players check the
+bytes as they arrive, so this is the server's share; mmap serving keeps it
+to a few chunks per player, whatever the clip size). Mapped clip pages are
+shared page cache and are not counted, though RSS does count them once per
+open mapping.
+
+Linux only (reads /proc/self/status).
+
+Run from the backend folder:
+    python -m tools.bench_clip_playback --clients 20 --seconds 60 --seeks 20
+
+Exits with status 1 if a response is wrong (status, length or bytes).
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+
+def seed(db, models, file_path):
+    db.drop_all()
+    db.create_all()
+    location = models.Location(loc_name='Bench ward')
+    event_type = models.EventType(event_type_name='Fall')
+    db.session.add_all([location, event_type])
+    db.session.flush()
+    camera = models.Camera(cam_name='Bench cam', stream_url='rtsp://bench', loc_id=location.id)
+    event_class = models.EventClass(class_name='Bench fall', event_type_id=event_type.id)
+    db.session.add_all([camera, event_class])
+    db.session.flush()
+    log = models.EventLog(cam_id=camera.id, event_class_id=event_class.id, file_path=file_path)
+    db.session.add(log)
+    db.session.commit()
+    log_id = log.id
+    db.session.remove()
+    return log_id
+
+
+def private_memory_kb():
+    """Anonymous (non-file-backed) resident memory of this process."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1])
+    return 0
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clients', type=int, default=20, help='concurrent players')
+    parser.add_argument('--seconds', type=int, default=60, help='clip length')
+    parser.add_argument('--frame-kb', type=int, default=48, help='size of each clip frame')
+    parser.add_argument('--seeks', type=int, default=20, help='Range requests per player after the full read')
+    parser.add_argument('--range-kb', type=int, default=512, help='bytes asked for per Range request')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='agapai_clips_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ['CLIP_DIR'] = os.path.join(work_dir, 'clips')
+    os.environ['DETECTION_ENABLED'] = 'false'
+    os.environ.setdefault('FLASK_SECRET_KEY', 'clip-playback-bench-secret-key-0123456789')
+
+    try:
+        import app as app_module  # Reads DATABASE_URL / CLIP_DIR on import (and patches eventlet)
+        import eventlet
+        import eventlet.wsgi
+        from eventlet.green.http import client as http_client
+        from flask_jwt_extended import create_access_token
+
+        import models
+        from clip_recorder import CLIP_DIR, write_mjpeg_avi
+        from database import db
+
+        # --- 1. A clip of random (incompressible) frames, and its event row ---
+        file_path = 'cam_1/bench.avi'
+        frame = os.urandom(args.frame_kb * 1024)
+        clip_size = write_mjpeg_avi(os.path.join(CLIP_DIR, file_path), [frame] * (args.seconds * 5), 5, (640, 480))
+        with open(os.path.join(CLIP_DIR, file_path), 'rb') as f:
+            expected = memoryview(f.read())  # To check the responses against
+        app = app_module.app
+        with app.app_context():
+            log_id = seed(db, models, file_path)
+            token = create_access_token(identity='1')
+
+        # --- 2. Serve it ---
+        listener = eventlet.listen(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+        eventlet.spawn(eventlet.wsgi.server, listener, app, log_output=False)
+        url = f'/api/event_logs/{log_id}/clip'
+        headers = {'Authorization': f'Bearer {token}'}
+
+        latencies = []
+        errors = []
+        transferred = [0]
+
+        def fetch(conn, extra_headers, expect_status, expect_start=0, expect_length=0):
+            """One request; the body is checked piece by piece, so the players hold no copies."""
+            started = time.perf_counter()
+            conn.request('GET', url, headers=dict(headers, **extra_headers))
+            response = conn.getresponse()
+            received = 0
+            matches = True
+            while True:
+                chunk = response.read(64 * 1024)
+                if not chunk:
+                    break
+                offset = expect_start + received
+                matches = matches and chunk == expected[offset:offset + len(chunk)]
+                received += len(chunk)
+            latencies.append((time.perf_counter() - started) * 1000)
+            transferred[0] += received
+            if response.status != expect_status or received != expect_length or not matches:
+                errors.append(f"{extra_headers or 'full read'}: HTTP {response.status}, {received} bytes")
+            return response
+
+        def player(seed_value):
+            rng = random.Random(seed_value)
+            conn = http_client.HTTPConnection('127.0.0.1', port, timeout=60)
+            try:
+                response = fetch(conn, {}, 200, 0, clip_size)
+                etag = response.getheader('ETag')
+                fetch(conn, {'If-None-Match': etag}, 304)
+                span = args.range_kb * 1024
+                for _ in range(args.seeks):
+                    start = rng.randrange(0, max(1, clip_size - span))
+                    end = min(clip_size, start + span) - 1
+                    fetch(conn, {'Range': f'bytes={start}-{end}'}, 206, start, end + 1 - start)
+            except Exception as e:
+                errors.append(f"player {seed_value}: {e}")
+            finally:
+                conn.close()
+
+        # --- 3. Play, sampling private memory ---
+        memory_before = private_memory_kb()
+        memory_peak = [memory_before]
+        playing = [True]
+
+        def sample_memory():
+            while playing[0]:
+                memory_peak[0] = max(memory_peak[0], private_memory_kb())
+                eventlet.sleep(0.02)
+
+        sampler = eventlet.spawn(sample_memory)
+        started = time.perf_counter()
+        pool = eventlet.GreenPool(args.clients)
+        for i in range(args.clients):
+            pool.spawn(player, i)
+        pool.waitall()
+        elapsed = time.perf_counter() - started
+        playing[0] = False
+        sampler.wait()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"clip: {clip_size / 1e6:.1f} MB, {args.clients} players, {args.seeks} seeks of {args.range_kb} KB each")
+    print(f"requests:    {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s)")
+    print(f"throughput:  {transferred[0] / elapsed / 1e6:.1f} MB/s ({transferred[0] / 1e6:.1f} MB sent)")
+    print(f"latency ms:  p50 {percentile(latencies, 0.5):.1f}  p95 {percentile(latencies, 0.95):.1f}  "
+          f"max {max(latencies, default=0):.1f}")
+    print(f"private memory growth (peak): {(memory_peak[0] - memory_before) / 1024:.1f} MB")
+
+    if errors:
+        print(f"\nFAIL: {len(errors)} wrong response(s), e.g. {errors[:3]}")
+        sys.exit(1)
+    print("\nOK: every response had the right status and bytes.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# backend/tools/bench_frame_render.py
+"""
+Micro-benchmark for the synthetic frame source.
+
+Compares the old per-frame path (font lookup + new canvas + full redraw +
+new encode buffer) with MockFrameRenderer + encode_rendition, and reports
+frames per second per core (CPU time of this single thread).
+
+Run from the backend folder:
+    python -m tools.bench_frame_render --frames 300 --rendition full
+"""
+import argparse
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+from frame_cache import RENDITIONS, encode_rendition
+from frame_renderer import MockFrameRenderer
+
+
+def legacy_frame(cam_id, cam_name, now, size, quality):
+    """The pre-renderer path: everything is redone for every frame."""
+    img = Image.new('RGB', size, color='darkred')
+    d = ImageDraw.Draw(img)
+    text = f"AGAPAI MOCK STREAM\n{cam_name.upper()} (ID: {cam_id})\nTime: {time.strftime('%H:%M:%S', time.localtime(now))}"
+    try:
+        font = ImageFont.truetype("arial.ttf", 16)
+    except IOError:
+        font = ImageFont.load_default()
+    d.text((10, 10), text, fill=(255, 255, 255), font=font)
+    buffer = BytesIO()
+    img.save(buffer, format='jpeg', quality=quality)
+    return buffer.getvalue()
+
+
+def run(label, make_frame, frames, cameras):
+    start_cpu = time.thread_time()
+    for i in range(frames):
+        # Advance the clock one second per frame so every frame really changes
+        make_frame(i % cameras, f"Cam {i % cameras}", 1_700_000_000 + i)
+    cpu = time.thread_time() - start_cpu
+    fps = frames / cpu if cpu else float('inf')
+    print(f"{label:<10} {frames} frames in {cpu:.3f}s CPU -> {fps:,.0f} frames/s/core")
+    return fps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--cameras', type=int, default=16)
+    parser.add_argument('--rendition', choices=sorted(RENDITIONS), default='full')
+    args = parser.parse_args()
+
+    spec = RENDITIONS[args.rendition]
+    renderer = MockFrameRenderer(spec['size'])
+
+    legacy = run('legacy', lambda c, n, t: legacy_frame(c, n, t, spec['size'], spec['quality']),
+                 args.frames, args.cameras)
+    cached = run('renderer', lambda c, n, t: encode_rendition(renderer.render(c, n, now=t), args.rendition),
+                 args.frames, args.cameras)
+    print(f"speed-up: {cached / legacy:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# backend/tools/bench_login_jitter.py
+"""
+Frame-emission jitter during a burst of logins.
+
+A green thread "emits" a frame every 100 ms (10 FPS) while a burst of
+bcrypt.checkpw calls - what /api/login does - runs through
+BlockingExecutor. Jitter is how late each tick fires. With the inline
+mode every login stalls the hub; with 'thread' or 'process' the ticks
+stay on time.
+
+Run from the backend folder:
+    python -m tools.bench_login_jitter --logins 20 --budget-ms 50
+
+Exits with status 1 if an offloaded mode exceeds the jitter budget.
+"""
+import eventlet
+eventlet.monkey_patch(thread=False)
+
+import argparse
+import sys
+import time
+
+import bcrypt
+
+from executor import BlockingExecutor
+
+TICK_INTERVAL = 0.1  # 10 FPS
+
+
+def measure(mode, logins, workers):
+    executor = BlockingExecutor(mode=mode, workers=workers)
+    hashed = bcrypt.hashpw(b'correct horse', bcrypt.gensalt())
+    jitter = []
+    running = True
+
+    def ticker():
+        next_tick = time.monotonic() + TICK_INTERVAL
+        while running:
+            eventlet.sleep(max(0, next_tick - time.monotonic()))
+            now = time.monotonic()
+            jitter.append(max(0.0, now - next_tick))
+            # Like FrameProducer: a late tick doesn't make the next ones late too
+            next_tick = max(next_tick + TICK_INTERVAL, now)
+
+    def login():
+        executor.run(bcrypt.checkpw, b'correct horse', hashed)
+
+    tick_thread = eventlet.spawn(ticker)
+    eventlet.sleep(TICK_INTERVAL * 3)  # Warm-up ticks
+
+    start = time.monotonic()
+    pool = eventlet.GreenPool()
+    for _ in range(logins):
+        pool.spawn(login)
+    pool.waitall()
+    burst_seconds = time.monotonic() - start
+
+    eventlet.sleep(TICK_INTERVAL * 3)
+    running = False
+    tick_thread.wait()
+    executor.shutdown()
+
+    jitter_ms = sorted(j * 1000 for j in jitter)
+    p99 = jitter_ms[min(len(jitter_ms) - 1, int(len(jitter_ms) * 0.99))]
+    print(f"{mode:<8} {logins} logins in {burst_seconds:.2f}s | ticks={len(jitter_ms)} "
+          f"p50={jitter_ms[len(jitter_ms) // 2]:.1f}ms p99={p99:.1f}ms max={jitter_ms[-1]:.1f}ms")
+    return jitter_ms[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--budget-ms', type=float, default=50)
+    parser.add_argument('--modes', default='inline,thread,process')
+    args = parser.parse_args()
+
+    over_budget = []
+    for mode in args.modes.split(','):
+        max_jitter = measure(mode, args.logins, args.workers)
+        if mode != 'inline' and max_jitter > args.budget_ms:
+            over_budget.append(mode)
+
+    if over_budget:
+        print(f"FAIL: jitter over {args.budget_ms}ms budget for {', '.join(over_budget)}")
+        sys.exit(1)
+    print(f"OK: offloaded modes kept jitter under {args.budget_ms}ms")
+
+
+if __name__ == '__main__':
+    main()
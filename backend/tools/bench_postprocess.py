@@ -0,0 +1,92 @@
+# backend/tools/bench_postprocess.py
+"""
+Benchmark (and cross-check) of the YOLO post-processing.
+
+Builds synthetic (1, 1, 25200, 85) outputs with a given number of people in
+view, each producing a cluster of overlapping candidate boxes above the
+confidence threshold, like a real detector does. Runs the vectorized
+postprocess() and the plain-Python reference_postprocess() on the same
+outputs, checks that they return the same detections, and reports ms/frame.
+
+Run from the backend folder:
+    python -m tools.bench_postprocess --objects 0,1,5,20 --candidates 30 --frames 20
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from yolo_postprocess import postprocess, postprocess_batch, reference_postprocess
+
+ROWS, COLUMNS, INPUT_SIZE = 25200, 85, 640
+
+
+def synthetic_output(rng, objects, candidates_per_object):
+    """One (1, 1, ROWS, COLUMNS) output with `objects` clusters of candidates."""
+    output = np.zeros((ROWS, COLUMNS), dtype=np.float32)
+    output[:, :2] = rng.uniform(0, INPUT_SIZE, (ROWS, 2))
+    output[:, 2:4] = rng.uniform(8, 200, (ROWS, 2))
+    output[:, 4] = rng.uniform(0, 0.3, ROWS)             # Background objectness
+    output[:, 5:] = rng.uniform(0, 0.2, (ROWS, COLUMNS - 5))
+
+    rows = rng.choice(ROWS, objects * candidates_per_object, replace=False)
+    for i in range(objects):
+        cluster = rows[i * candidates_per_object:(i + 1) * candidates_per_object]
+        centre = rng.uniform(100, INPUT_SIZE - 100, 2)
+        size = rng.uniform(60, 200, 2)
+        output[cluster, :2] = centre + rng.normal(0, 6, (cluster.size, 2))
+        output[cluster, 2:4] = size * rng.uniform(0.85, 1.15, (cluster.size, 2))
+        output[cluster, 4] = rng.uniform(0.6, 0.99, cluster.size)
+        output[cluster, 5 + rng.integers(0, 2)] = rng.uniform(0.8, 1.0, cluster.size)
+    return output.reshape(1, 1, ROWS, COLUMNS)
+
+
+def time_per_frame(fn, outputs):
+    start = time.perf_counter()
+    results = [fn(output) for output in outputs]
+    return (time.perf_counter() - start) * 1000 / len(outputs), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--objects', default='0,1,5,20', help='comma-separated people per frame')
+    parser.add_argument('--candidates', type=int, default=30, help='candidate boxes per person')
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=8, help='frames per postprocess_batch() call')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    mismatches = 0
+    print(f"{'objects':>8} {'candidates':>10} {'reference ms':>13} {'vectorized ms':>14} "
+          f"{'batched ms':>11} {'speedup':>8} {'detections':>11}")
+
+    for objects in (int(n) for n in args.objects.split(',')):
+        outputs = [synthetic_output(rng, objects, args.candidates) for _ in range(args.frames)]
+
+        # The reference works on Python lists; convert outside the timed part
+        rows = [output.reshape(-1, COLUMNS).tolist() for output in outputs]
+        ref_ms, expected = time_per_frame(lambda r: reference_postprocess(r, INPUT_SIZE), rows)
+        vec_ms, got = time_per_frame(lambda o: postprocess(o, INPUT_SIZE), outputs)
+
+        batches = [np.concatenate(outputs[i:i + args.batch]) for i in range(0, len(outputs), args.batch)]
+        start = time.perf_counter()
+        batched = [dets for batch in batches for dets in postprocess_batch(batch, INPUT_SIZE)]
+        batch_ms = (time.perf_counter() - start) * 1000 / len(outputs)
+
+        if got != expected or batched != expected:
+            mismatches += 1
+            print(f"MISMATCH at {objects} objects per frame")
+
+        detections = sum(len(d) for d in got) / len(got)
+        print(f"{objects:>8} {objects * args.candidates:>10} {ref_ms:>13.2f} {vec_ms:>14.2f} "
+              f"{batch_ms:>11.2f} {ref_ms / max(vec_ms, 1e-9):>7.1f}x {detections:>11.1f}")
+
+    if mismatches:
+        sys.exit(1)
+    print("Vectorized and reference results match.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+# backend/tools/broker_standin.py
+"""
+Local stand-in for the Redis broker used in multi-worker mode (cluster.py).
+
+Speaks enough of the Redis protocol (RESP2 and RESP3) for the Socket.IO
+message queue and the producer leases: PING, HELLO, CLIENT, SELECT, SET
+(NX/XX/PX/EX), GET, MGET, DEL, EXISTS, INCR(BY), PEXPIRE, PTTL, KEYS, SADD,
+SREM, SMEMBERS, PUBLISH, SUBSCRIBE, UNSUBSCRIBE and FLUSHALL. Everything is
+in memory.
+
+Run from the backend folder, then start the workers against it:
+    python -m tools.broker_standin --port 6390
+    SOCKETIO_MESSAGE_QUEUE=redis://127.0.0.1:6390/0 PORT=5001 python app.py
+    SOCKETIO_MESSAGE_QUEUE=redis://127.0.0.1:6390/0 PORT=5002 python app.py
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class Store:
+    """Keys with optional expiry, plus pub/sub channels."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}      # key -> (value, expires_at or None)
+        self.channels = {}  # channel -> set of handlers
+        self.published = 0
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self.lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key, value, nx=False, xx=False, ttl=None):
+        with self.lock:
+            exists = self._live(key) is not None
+            if (nx and exists) or (xx and not exists):
+                return False
+            self.data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+            return True
+
+    def delete(self, keys):
+        with self.lock:
+            return sum(1 for key in keys if self._live(key) is not None and self.data.pop(key))
+
+    def incr(self, key, amount=1):
+        with self.lock:
+            entry = self._live(key)
+            value = int(entry[0]) + amount if entry else amount
+            self.data[key] = (str(value).encode(), entry[1] if entry else None)
+            return value
+
+    def expire(self, key, ttl):
+        with self.lock:
+            entry = self._live(key)
+            if not entry:
+                return False
+            self.data[key] = (entry[0], time.monotonic() + ttl)
+            return True
+
+    def pttl(self, key):
+        with self.lock:
+            entry = self._live(key)
+            if not entry:
+                return -2
+            return -1 if entry[1] is None else int((entry[1] - time.monotonic()) * 1000)
+
+    def keys(self, pattern):
+        with self.lock:
+            return [key for key in list(self.data)
+                    if self._live(key) is not None and fnmatch.fnmatchcase(key.decode(), pattern.decode())]
+
+    def sadd(self, key, members):
+        with self.lock:
+            entry = self._live(key)
+            current = entry[0] if entry else set()
+            added = len(set(members) - current)
+            self.data[key] = (current | set(members), entry[1] if entry else None)
+            return added
+
+    def srem(self, key, members):
+        with self.lock:
+            entry = self._live(key)
+            if not entry:
+                return 0
+            removed = len(entry[0] & set(members))
+            remaining = entry[0] - set(members)
+            if remaining:
+                self.data[key] = (remaining, entry[1])
+            else:
+                del self.data[key]
+            return removed
+
+    def smembers(self, key):
+        with self.lock:
+            entry = self._live(key)
+            return sorted(entry[0]) if entry else []
+
+    def subscribe(self, channel, handler):
+        with self.lock:
+            self.channels.setdefault(channel, set()).add(handler)
+
+    def unsubscribe(self, channel, handler):
+        with self.lock:
+            subscribers = self.channels.get(channel, set())
+            subscribers.discard(handler)
+            if not subscribers:
+                self.channels.pop(channel, None)
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.channels.get(channel, ()))
+            self.published += 1
+        for handler in subscribers:
+            handler.push([b'message', channel, message])
+        return len(subscribers)
+
+
+class RESPHandler(socketserver.StreamRequestHandler):
+    """One client connection."""
+
+    def setup(self):
+        super().setup()
+        self.protocol = 2
+        self.write_lock = threading.Lock()
+        self.subscriptions = set()
+
+    # --- Encoding ---
+
+    def encode(self, value):
+        if value is None:
+            return b'_\r\n' if self.protocol == 3 else b'$-1\r\n'
+        if isinstance(value, bool):
+            return b':1\r\n' if value else b':0\r\n'
+        if isinstance(value, int):
+            return b':%d\r\n' % value
+        if isinstance(value, SimpleString):
+            return b'+' + value.text.encode() + b'\r\n'
+        if isinstance(value, Error):
+            return b'-' + value.text.encode() + b'\r\n'
+        if isinstance(value, str):
+            value = value.encode()
+        if isinstance(value, bytes):
+            return b'$%d\r\n%s\r\n' % (len(value), value)
+        if isinstance(value, dict):
+            if self.protocol == 3:
+                out = [b'%%%d\r\n' % len(value)]
+                for key, item in value.items():
+                    out.append(self.encode(key))
+                    out.append(self.encode(item))
+                return b''.join(out)
+            value = [v for pair in value.items() for v in pair]
+        return b'*%d\r\n' % len(value) + b''.join(self.encode(item) for item in value)
+
+    def send(self, value):
+        with self.write_lock:
+            self.wfile.write(self.encode(value))
+            self.wfile.flush()
+
+    def push(self, items):
+        """Pub/sub message: a push frame in RESP3, a plain array in RESP2."""
+        payload = b''.join(self.encode(item) for item in items)
+        prefix = b'>' if self.protocol == 3 else b'*'
+        try:
+            with self.write_lock:
+                self.wfile.write(prefix + b'%d\r\n' % len(items) + payload)
+                self.wfile.flush()
+        except OSError:
+            pass
+
+    # --- Parsing ---
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.strip().split()  # Inline command (e.g. from telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        store = self.server.store
+        try:
+            while True:
+                args = self.read_command()
+                if args is None:
+                    break
+                if not args:
+                    continue
+                reply = self.execute(store, args[0].upper().decode(), args[1:])
+                if reply is not NO_REPLY:
+                    self.send(reply)
+        except (OSError, ValueError):
+            pass
+        finally:
+            for channel in self.subscriptions:
+                store.unsubscribe(channel, self)
+
+    def execute(self, store, command, args):
+        if command == 'PING':
+            return args[0] if args else SimpleString('PONG')
+        if command == 'ECHO':
+            return args[0]
+        if command == 'HELLO':
+            if args:
+                if args[0] not in (b'2', b'3'):
+                    return Error('NOPROTO unsupported protocol version')
+                self.protocol = int(args[0])
+            return {'server': 'agapai-broker-standin', 'version': '7.0.0', 'proto': self.protocol,
+                    'id': id(self) % 100000, 'mode': 'standalone', 'role': 'master', 'modules': []}
+        if command in ('CLIENT', 'SELECT', 'AUTH'):
+            return SimpleString('OK')
+        if command == 'QUIT':
+            self.send(SimpleString('OK'))
+            raise OSError('client quit')
+        if command == 'SET':
+            key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+            ttl = None
+            for i, option in enumerate(options):
+                if option == b'PX':
+                    ttl = int(args[2 + i + 1]) / 1000
+                elif option == b'EX':
+                    ttl = int(args[2 + i + 1])
+            done = store.set(key, value, nx=b'NX' in options, xx=b'XX' in options, ttl=ttl)
+            return SimpleString('OK') if done else None
+        if command == 'GET':
+            return store.get(args[0])
+        if command == 'MGET':
+            return [store.get(key) for key in args]
+        if command == 'DEL':
+            return store.delete(args)
+        if command == 'EXISTS':
+            return sum(1 for key in args if store.get(key) is not None)
+        if command == 'INCR':
+            return store.incr(args[0])
+        if command == 'INCRBY':
+            return store.incr(args[0], int(args[1]))
+        if command == 'PEXPIRE':
+            return store.expire(args[0], int(args[1]) / 1000)
+        if command == 'PTTL':
+            return store.pttl(args[0])
+        if command == 'KEYS':
+            return store.keys(args[0])
+        if command == 'SADD':
+            return store.sadd(args[0], args[1:])
+        if command == 'SREM':
+            return store.srem(args[0], args[1:])
+        if command == 'SMEMBERS':
+            return store.smembers(args[0])
+        if command == 'FLUSHALL':
+            with store.lock:
+                store.data.clear()
+            return SimpleString('OK')
+        if command == 'PUBLISH':
+            return store.publish(args[0], args[1])
+        if command == 'SUBSCRIBE':
+            for channel in args:
+                self.subscriptions.add(channel)
+                store.subscribe(channel, self)
+                self.push([b'subscribe', channel, len(self.subscriptions)])
+            return NO_REPLY
+        if command == 'UNSUBSCRIBE':
+            for channel in args or list(self.subscriptions):
+                self.subscriptions.discard(channel)
+                store.unsubscribe(channel, self)
+                self.push([b'unsubscribe', channel, len(self.subscriptions)])
+            return NO_REPLY
+        return Error(f"ERR unknown command '{command}'")
+
+
+class SimpleString:
+    def __init__(self, text):
+        self.text = text
+
+
+class Error:
+    def __init__(self, text):
+        self.text = text
+
+
+NO_REPLY = object()  # Subscribe replies are sent as pushes
+
+
+class BrokerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, RESPHandler)
+        self.store = Store()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+
+    server = BrokerServer((args.host, args.port))
+    print(f"Broker stand-in listening on redis://{args.host}:{args.port}/0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# backend/tools/check_metrics_overhead.py
+"""
+Cost of the /metrics instrumentation on the hot paths.
+
+Measures, against budgets:
+  - one histogram observation (what every frame render, encode, SQL
+    statement and request pays),
+  - what the instrumentation adds to one request of a DB-backed endpoint
+    (/api/cameras, reference cache cleared each time so it queries): the
+    request hooks plus the statement listeners times the statements the
+    request ran, timed directly in a loop,
+  - rendering /metrics with --cameras cameras' worth of series.
+
+It also calls the endpoint through the test client in interleaved rounds
+with metrics on and off and prints both latencies; that difference is
+within the run-to-run noise of a whole request, so it is shown, not checked.
+
+The budget that "overhead stays low enough to leave on in production"
+refers to is the per-request one: at most 50 us of instrumentation per
+request (--request-budget-us). The other two (5 us per observation,
+50 ms per /metrics render) bound its parts.
+
+Run from the backend folder:
+    python -m tools.check_metrics_overhead              # the budgets above
+    python -m tools.check_metrics_overhead --requests 5000 --cameras 200
+
+Exits with status 1 if a cost is over its budget.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from tools.scratch_db import reset_schema, scratch_app, seed_reference_data
+
+# Budgets (see the module docstring)
+OBSERVE_BUDGET_US = 5.0
+REQUEST_BUDGET_US = 50.0
+RENDER_BUDGET_MS = 50.0
+
+
+def observe_cost_us(histogram, samples):
+    """Mean cost of one observe() call, in microseconds."""
+    started = time.perf_counter()
+    for i in range(samples):
+        histogram.observe((i % 100) / 1000.0, 'bench')
+    return (time.perf_counter() - started) * 1e6 / samples
+
+
+def hook_cost_us(app, metrics, path, statements, samples):
+    """Mean cost the instrumentation adds to one request running `statements` SQL statements."""
+    class FakeContext:
+        metrics_started = None
+
+    class FakeResponse:
+        status_code = 200
+
+    context, response = FakeContext(), FakeResponse()
+    with app.test_request_context(path):  # Matches the route, like a real request
+        started = time.perf_counter()
+        for _ in range(samples):
+            metrics._before_request()
+            for _ in range(statements):
+                metrics._before_cursor_execute(None, None, None, None, context, False)
+                metrics._after_cursor_execute(None, None, None, None, context, False)
+            metrics._after_request(response)
+        return (time.perf_counter() - started) * 1e6 / samples
+
+
+def timed_ms(fn):
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def request_round_us(client, reference_cache, path, requests):
+    """Median request time of one round, in microseconds."""
+    times = []
+    for _ in range(requests):
+        reference_cache.invalidate()
+        started = time.perf_counter()
+        response = client.get(path)
+        times.append((time.perf_counter() - started) * 1e6)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned HTTP {response.status_code}")
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per mode (split over the rounds)')
+    parser.add_argument('--rounds', type=int, default=10, help='interleaved on/off rounds')
+    parser.add_argument('--cameras', type=int, default=50, help='cameras (series per metric) to render')
+    parser.add_argument('--observe-budget-us', type=float, default=OBSERVE_BUDGET_US, help='max cost of one observation')
+    parser.add_argument('--request-budget-us', type=float, default=REQUEST_BUDGET_US,
+                        help='max instrumentation cost per request (the acceptance budget)')
+    parser.add_argument('--render-budget-ms', type=float, default=RENDER_BUDGET_MS, help='max time to render /metrics')
+    args = parser.parse_args()
+
+    with scratch_app('agapai_metrics_', DETECTION_ENABLED='false') as app_module:
+        import metrics
+        import models
+        from database import db
+        from reference_cache import reference_cache
+
+        app = app_module.app
+        registry = metrics.registry
+        with app.app_context():
+            reset_schema(db)
+            seed_reference_data(db.session, models, cameras=args.cameras)
+            db.session.remove()
+
+        # --- 1. One observation ---
+        histogram = registry.histogram('agapai_overhead_check_seconds', 'Scratch histogram.', ('label',))
+        observe_us = min(observe_cost_us(histogram, 100000) for _ in range(3))
+
+        # --- 2. A whole request: statements it runs, then on vs off ---
+        client = app.test_client()
+        path = '/api/cameras'
+        per_round = max(1, args.requests // args.rounds)
+        with app.app_context():
+            request_round_us(client, reference_cache, path, 50)  # Warm up
+        queries = metrics.HTTP_REQUEST_DB_QUERIES.values[(f'{path}',)]
+        statements = round(queries[-2] / queries[-1])
+        timings = {True: [], False: []}
+        for i in range(args.rounds):
+            for enabled in ((True, False) if i % 2 else (False, True)):
+                registry.enabled = enabled
+                with app.app_context():
+                    timings[enabled].append(request_round_us(client, reference_cache, path, per_round))
+        registry.enabled = True
+        on_us = statistics.median(timings[True])
+        off_us = statistics.median(timings[False])
+        added_us = min(hook_cost_us(app, metrics, path, statements, 20000) for _ in range(3))
+
+        # --- 3. Render with a full set of per-camera series ---
+        for cam_id in range(args.cameras):
+            for _ in range(10):
+                metrics.FRAME_RENDER_SECONDS.observe(0.004, cam_id)
+                for rendition in ('thumb', 'full'):
+                    metrics.FRAME_ENCODE_SECONDS.observe(0.008, cam_id, rendition)
+        render_ms = min(timed_ms(registry.render) for _ in range(5))
+        with app.app_context():
+            response = client.get('/metrics')
+        exposition = response.get_data(as_text=True)
+
+    checks = [
+        ('one observation', observe_us, args.observe_budget_us, 'us'),
+        (f'added per request ({path}, {statements} statements)', added_us, args.request_budget_us, 'us'),
+        (f'render /metrics ({len(exposition.splitlines())} lines)', render_ms, args.render_budget_ms, 'ms'),
+    ]
+    print(f"{path} through the test client: {off_us:.0f} us with metrics off, {on_us:.0f} us on "
+          f"(median of {args.rounds} rounds each)\n")
+    failed = False
+    for name, value, budget, unit in checks:
+        over = value > budget
+        failed = failed or over
+        print(f"{name:55} {value:>9.2f} {unit}  budget {budget:g} {unit}  {'OVER BUDGET' if over else 'ok'}")
+
+    if response.status_code != 200 or 'agapai_http_request_duration_seconds_bucket' not in exposition:
+        print("\nFAIL: /metrics did not serve the request histogram.")
+        sys.exit(1)
+    if failed:
+        print("\nFAIL: the instrumentation costs more than its budget.")
+        sys.exit(1)
+    print("\nOK: the instrumentation is within budget.")
+
+
+if __name__ == '__main__':
+    main()
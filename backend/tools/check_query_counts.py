@@ -0,0 +1,119 @@
+# backend/tools/check_query_counts.py
+"""
+SQL statements per request of the list endpoints, at two table sizes.
+
+Seeds a temporary SQLite database with --small rows per table, counts the
+statements each endpoint (and the stream supervisor's camera load) runs,
+then reseeds with --large rows and counts again. A count that grows with
+the number of rows is an N+1 (a lazy relationship read per row); see
+queries.py. The reference cache is cleared before every request, so the
+cached endpoints are measured on a miss.
+
+Run from the backend folder:
+    python -m tools.check_query_counts --small 5 --large 50
+
+Exits with status 1 if any count grows.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from tools.scratch_db import reset_schema, scratch_app, seed_reference_data
+
+ENDPOINTS = [
+    '/api/users',
+    '/api/cameras',
+    '/api/locations',
+    '/api/camera_status',
+    '/api/event_logs?limit=200',
+    '/api/summary/daily',
+]
+SUPERVISOR = 'stream supervisor: load cameras'
+
+
+def seed(db, models, rows):
+    """
+    `rows` rows in every table. Each row points at a different related row
+    (user i has role i, camera i location i, ...), so a lazy load per row
+    can't be hidden by the session's identity map.
+    """
+    reset_schema(db)
+    now = datetime.now()
+    session = db.session
+    seed_reference_data(session, models, locations=rows, cameras=rows, event_classes=rows, users=rows)
+    for i in range(1, rows + 1):
+        session.add(models.EventLog(
+            id=i, timestamp=now - timedelta(minutes=i), cam_id=i, event_class_id=i,
+            event_status='acknowledged' if i % 2 else 'unacknowledged',
+            ack_by_user_id=i if i % 2 else None
+        ))
+    session.commit()
+    session.remove()
+
+
+def count_statements(app_module, rows):
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+
+    import models
+    from database import db
+    from reference_cache import reference_cache
+
+    app = app_module.app
+    with app.app_context():
+        seed(db, models, rows)
+        token = create_access_token(identity='1')
+        engine = db.engine
+
+    statements = [0]
+
+    def on_execute(*args):
+        statements[0] += 1
+
+    counts = {}
+    client = app.test_client()
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        for url in ENDPOINTS:
+            reference_cache.invalidate()
+            statements[0] = 0
+            response = client.get(url, headers={'Authorization': f'Bearer {token}'})
+            if response.status_code != 200:
+                sys.exit(f"{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+            counts[url] = statements[0]
+
+        reference_cache.invalidate()
+        statements[0] = 0
+        with app.app_context():
+            app_module.stream_supervisor.load_cameras()
+        counts[SUPERVISOR] = statements[0]
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--small', type=int, default=5, help='rows per table in the first run')
+    parser.add_argument('--large', type=int, default=50, help='rows per table in the second run')
+    args = parser.parse_args()
+
+    with scratch_app('agapai_queries_') as app_module:
+        small = count_statements(app_module, args.small)
+        large = count_statements(app_module, args.large)
+
+    failed = False
+    print(f"{'endpoint':40} {args.small:>6} rows {args.large:>6} rows")
+    for name in small:
+        grows = large[name] > small[name]
+        failed = failed or grows
+        print(f"{name:40} {small[name]:>11} {large[name]:>11}  {'GROWS WITH ROWS' if grows else 'ok'}")
+
+    if failed:
+        print("\nFAIL: some statement counts grow with the number of rows (N+1).")
+        sys.exit(1)
+    print("\nOK: statement counts do not depend on the number of rows.")
+
+
+if __name__ == '__main__':
+    main()
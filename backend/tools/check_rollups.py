@@ -0,0 +1,126 @@
+# backend/tools/check_rollups.py
+"""
+Hourly rollups stay equal to a rebuild from event_logs through camera moves.
+
+Seeds a temporary SQLite database with events of two cameras (some of them
+acknowledged), then, checking the rollup table against backfill() after
+each step:
+  1. moves a camera to another location (as PATCH /api/cameras/<id> does),
+  2. acknowledges one of its older events (ORM) and another one with a bulk
+     UPDATE plus apply_acknowledgements() (as the bulk-ack route does),
+  3. deletes one older event (ORM) and another with a Core DELETE plus
+     apply_deleted_events() (as retention does),
+  4. moves the camera back and inserts a new event (ORM).
+No rollup count may go negative, and every row must match the rebuild.
+
+Run from the backend folder:
+    python -m tools.check_rollups
+
+Exits with status 1 if the rollups drift from event_logs.
+"""
+import sys
+from datetime import datetime, timedelta
+
+from tools.scratch_db import reset_schema, scratch_app, seed_reference_data
+
+
+def seed(db, models, now):
+    reset_schema(db)
+    session = db.session
+    seed_reference_data(session, models, locations=2, cameras=2)
+    for i in range(1, 13):
+        session.add(models.EventLog(
+            id=i, timestamp=now - timedelta(hours=i % 4, minutes=i), cam_id=1 if i <= 8 else 2,
+            event_class_id=1, event_status='acknowledged' if i % 3 == 0 else 'unacknowledged'
+        ))
+    session.commit()
+
+
+def rollup_rows(conn, table):
+    return {
+        (row.hour_start, row.cam_id, row.loc_id, row.event_class_id): (row.event_count, row.acknowledged_count)
+        for row in conn.execute(table.select().where(table.c.event_count != 0))
+    }
+
+
+def compare(db, step):
+    """Problems of the rollup table against a rebuild (done in a transaction that is rolled back)."""
+    from models import EventHourlyRollup
+    from rollups import backfill
+
+    table = EventHourlyRollup.__table__
+    with db.engine.connect() as conn:
+        kept = rollup_rows(conn, table)
+        negative = [key for key, counts in kept.items() if min(counts) < 0]
+        backfill(conn)
+        rebuilt = rollup_rows(conn, table)
+        conn.rollback()
+
+    problems = [f"{step}: negative counts {kept[key]} at {key}" for key in negative]
+    for key in sorted(set(kept) | set(rebuilt), key=str):
+        if kept.get(key) != rebuilt.get(key):
+            problems.append(f"{step}: {key} is {kept.get(key)}, rebuild says {rebuilt.get(key)}")
+    return problems
+
+
+def run_steps(db, models, now):
+    from sqlalchemy import delete, update
+
+    from rollups import apply_acknowledgements, apply_deleted_events
+
+    seed(db, models, now)
+    problems = compare(db, 'seed')
+    session = db.session
+    EventLog = models.EventLog
+
+    # 1. Move camera 1 from ward 1 to ward 2
+    session.get(models.Camera, 1).loc_id = 2
+    session.commit()
+    problems += compare(db, 'move camera')
+
+    # 2. Acknowledge two of its older events
+    session.get(EventLog, 1).event_status = 'acknowledged'
+    session.commit()
+    session.execute(update(EventLog).where(EventLog.id == 2).values(event_status='acknowledged'))
+    apply_acknowledgements(session.connection(), [2])
+    session.commit()
+    problems += compare(db, 'acknowledge old events')
+
+    # 3. Delete two of its older events
+    session.delete(session.get(EventLog, 4))
+    session.commit()
+    table = EventLog.__table__
+    with db.engine.begin() as conn:
+        rows = [dict(row._mapping) for row in conn.execute(table.select().where(table.c.id == 5))]
+        conn.execute(delete(table).where(table.c.id == 5))
+        apply_deleted_events(conn, rows)
+    problems += compare(db, 'delete old events')
+
+    # 4. Move it back, then a new event
+    session.get(models.Camera, 1).loc_id = 1
+    session.commit()
+    session.add(EventLog(timestamp=now, cam_id=1, event_class_id=1, event_status='unacknowledged'))
+    session.commit()
+    problems += compare(db, 'move back and insert')
+    session.remove()
+    return problems
+
+
+def main():
+    with scratch_app('agapai_rollups_') as app_module:
+        import models
+        from database import db
+
+        with app_module.app.app_context():
+            problems = run_steps(db, models, datetime.now().replace(microsecond=0))
+
+    if problems:
+        print("FAIL: the rollups drifted from event_logs:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("OK: the rollups match a rebuild after every step.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# backend/tools/mjpeg_standin.py
+"""
+Local MJPEG camera stand-in for testing stream ingestion.
+
+Serves multipart/x-mixed-replace JPEG frames at /stream.mjpg. Point a
+camera's stream_url at it, e.g. http://127.0.0.1:8081/stream.mjpg
+
+Run from the backend folder:
+    python -m tools.mjpeg_standin --port 8081 --fps 15
+    python -m tools.mjpeg_standin --drop-after 50   # cut every connection after 50 frames
+"""
+import argparse
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from frame_renderer import MockFrameRenderer
+
+BOUNDARY = 'agapaiframe'
+
+
+def make_handler(args):
+    renderer = MockFrameRenderer((args.width, args.height), color='darkgreen')
+
+    class MJPEGHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/stream.mjpg':
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+
+            sent = 0
+            try:
+                while args.drop_after is None or sent < args.drop_after:
+                    buffer = BytesIO()
+                    renderer.render(0, 'MJPEG STAND-IN').save(buffer, format='jpeg', quality=80)
+                    jpeg = buffer.getvalue()
+                    self.wfile.write(
+                        f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                        f'Content-Length: {len(jpeg)}\r\n\r\n'.encode()
+                    )
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b'\r\n')
+                    sent += 1
+                    time.sleep(1.0 / args.fps)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *log_args):
+            print(f"MJPEG stand-in: {self.address_string()} {format % log_args}")
+
+    return MJPEGHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--fps', type=float, default=15)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--drop-after', type=int, default=None,
+                        help='close each connection after this many frames (tests reconnects)')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"MJPEG stand-in serving http://{args.host}:{args.port}/stream.mjpg at {args.fps} FPS")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# backend/tools/scratch_db.py
+"""
+Shared setup for the tools (and tests) that run against a throwaway SQLite
+database instead of MySQL.
+
+    with scratch_app('agapai_rollups_') as app_module:
+        with app_module.app.app_context():
+            reset_schema(db)
+            seed_reference_data(db.session, models, locations=2, cameras=2)
+
+Importing this module also makes SQLite create BIGINT primary keys as
+INTEGER, the only type it auto-increments (MySQL's BIGINT AUTO_INCREMENT
+needs no help), so rows added without an explicit id work the same on both.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(BigInteger, 'sqlite')
+def _sqlite_bigint(type_, compiler, **kw):
+    return 'INTEGER'
+
+
+@contextmanager
+def scratch_sqlite_url(prefix):
+    """A sqlite:/// URL of a new temporary file, removed afterwards."""
+    fd, path = tempfile.mkstemp(suffix='.db', prefix=prefix)
+    os.close(fd)
+    try:
+        yield f'sqlite:///{path}'
+    finally:
+        for leftover in (path, path + '-journal', path + '-wal', path + '-shm'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+@contextmanager
+def scratch_app(prefix, **env):
+    """
+    The app module, imported with DATABASE_URL pointing at a scratch SQLite
+    file (and `env` set first). app.py reads its configuration on import, so
+    a process can only do this once.
+    """
+    with scratch_sqlite_url(prefix) as url:
+        os.environ['DATABASE_URL'] = url
+        os.environ.setdefault('FLASK_SECRET_KEY', f'{prefix}secret-key-0123456789abcdef')
+        os.environ.update(env)
+        import app as app_module
+        yield app_module
+
+
+def reset_schema(db):
+    """Drops and recreates every table (call inside an app context)."""
+    db.drop_all()
+    db.create_all()
+
+
+def seed_reference_data(session, models, locations=1, cameras=1, event_classes=1, users=0):
+    """
+    Ids 1..n of each table: locations, cameras (camera i in location
+    (i - 1) % locations + 1), event classes (class i of its own event type i)
+    and users (user i with its own role i; role 1 is 'Admin'). Commits.
+    """
+    for i in range(1, max(users, 1) + 1):
+        session.add(models.Role(id=i, role_name='Admin' if i == 1 else f'Role {i}'))
+    for i in range(1, locations + 1):
+        session.add(models.Location(id=i, loc_name=f'Ward {i}'))
+    for i in range(1, event_classes + 1):
+        session.add(models.EventType(id=i, event_type_name=f'Fall type {i}'))
+    session.flush()
+    for i in range(1, users + 1):
+        session.add(models.User(id=i, username=f'user{i}', password='x', role_id=i))
+    for i in range(1, event_classes + 1):
+        session.add(models.EventClass(id=i, class_name=f'Fall class {i}', event_type_id=i))
+    for i in range(1, cameras + 1):
+        session.add(models.Camera(id=i, cam_name=f'Cam {i}', stream_url='rtsp://x', loc_id=(i - 1) % locations + 1))
+    session.commit()
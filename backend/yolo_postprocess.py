@@ -0,0 +1,173 @@
+# backend/yolo_postprocess.py
+"""
+Post-processing for YOLO-style detector outputs.
+
+A prediction row is [cx, cy, w, h, objectness, class_0 ... class_k] in input
+pixels, as in the (1, 1, 25200, 85) output of mock_yolov8_fall.xml.
+postprocess()/postprocess_batch() are vectorized with NumPy;
+reference_postprocess() is a plain-Python version of the same steps, kept
+to check the vectorized code against (see tools/bench_postprocess.py).
+
+Detections are dicts: {'class_id', 'score', 'box': [x1, y1, x2, y2]} with the
+box normalised to 0..1, best score first.
+"""
+import numpy as np
+
+DEFAULT_CONF_THRESHOLD = 0.5
+DEFAULT_IOU_THRESHOLD = 0.45
+MAX_CANDIDATES = 3000   # Boxes kept per image (by score) going into NMS
+MAX_DETECTIONS = 100    # Boxes kept per image after NMS
+
+
+def xywh_to_xyxy(xywh):
+    """(n, 4) centre/size boxes -> (n, 4) corner boxes."""
+    boxes = np.empty_like(xywh)
+    half = xywh[:, 2:] / 2
+    boxes[:, :2] = xywh[:, :2] - half
+    boxes[:, 2:] = xywh[:, :2] + half
+    return boxes
+
+
+def box_iou(box, boxes):
+    """IoU of one xyxy box against an (n, 4) array of xyxy boxes."""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def nms(boxes, scores, iou_threshold=DEFAULT_IOU_THRESHOLD, max_detections=None):
+    """
+    Greedy non-maximum suppression. Returns the kept indices, best score first.
+    Each step suppresses every remaining box that overlaps the current best
+    one in a single vectorized IoU, so the loop runs once per kept box.
+    """
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        if order.size == 1 or (max_detections and len(keep) >= max_detections):
+            break
+        rest = order[1:]
+        order = rest[box_iou(boxes[best], boxes[rest]) <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def top_per_image(image_idx, scores, limit):
+    """Indices of the `limit` best scores of each image (ties keep row order)."""
+    order = np.lexsort((-scores, image_idx))  # By image, then best score first
+    sorted_images = image_idx[order]
+    rank = np.arange(order.size) - np.searchsorted(sorted_images, sorted_images)
+    return order[rank < limit]
+
+
+def postprocess_batch(output, input_size, conf_threshold=DEFAULT_CONF_THRESHOLD,
+                      iou_threshold=DEFAULT_IOU_THRESHOLD, max_candidates=MAX_CANDIDATES,
+                      max_detections=MAX_DETECTIONS):
+    """
+    Turns a (N, ..., rows, 5 + classes) output into a detection list per image.
+
+    Thresholding runs on the whole batch at once. NMS runs once for the whole
+    batch too: boxes are shifted by image and class, so boxes from different
+    images or classes never overlap and never suppress each other.
+    max_candidates and max_detections apply to each image.
+    """
+    preds = output.reshape(output.shape[0], -1, output.shape[-1])
+    num_images, num_classes = preds.shape[0], preds.shape[-1] - 5
+    results = [[] for _ in range(num_images)]
+
+    # 1. Cheap objectness pre-filter (class scores can't beat objectness)
+    image_idx, row_idx = np.nonzero(preds[:, :, 4] > conf_threshold)
+    if image_idx.size == 0:
+        return results
+    candidates = preds[image_idx, row_idx].astype(np.float64)
+
+    # 2. Score = objectness x class probability, best class per row
+    class_scores = candidates[:, 5:] * candidates[:, 4:5]
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(class_ids.size), class_ids]
+    keep = scores > conf_threshold
+    if not keep.any():
+        return results
+    image_idx, class_ids, scores = image_idx[keep], class_ids[keep], scores[keep]
+    boxes = xywh_to_xyxy(candidates[keep, :4])
+
+    # 3. Cap what goes into NMS per image, so one crowded frame can't crowd out the others
+    if np.bincount(image_idx).max() > max_candidates:
+        top = top_per_image(image_idx, scores, max_candidates)
+        image_idx, class_ids, scores, boxes = image_idx[top], class_ids[top], scores[top], boxes[top]
+
+    # 4. One NMS for the batch, offsetting boxes per (image, class)
+    offsets = (image_idx * num_classes + class_ids) * (input_size * 2.0)
+    kept = nms(boxes + offsets[:, None], scores, iou_threshold)
+
+    boxes = np.clip(boxes / input_size, 0.0, 1.0)
+    for i in kept:
+        detections = results[image_idx[i]]
+        if len(detections) < max_detections:
+            detections.append({
+                'class_id': int(class_ids[i]),
+                'score': round(float(scores[i]), 4),
+                'box': [round(float(v), 4) for v in boxes[i]],
+            })
+    return results
+
+
+def postprocess(output, input_size, conf_threshold=DEFAULT_CONF_THRESHOLD,
+                iou_threshold=DEFAULT_IOU_THRESHOLD, max_candidates=MAX_CANDIDATES,
+                max_detections=MAX_DETECTIONS):
+    """Single-frame version of postprocess_batch: (rows, 5 + classes) or (1, 1, rows, ...) in."""
+    pred = output.reshape(1, -1, output.shape[-1])
+    return postprocess_batch(pred, input_size, conf_threshold, iou_threshold,
+                             max_candidates, max_detections)[0]
+
+
+# --- Reference implementation ---
+
+def _iou(a, b):
+    inter_w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    inter_h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / max(union, 1e-9)
+
+
+def reference_postprocess(rows, input_size, conf_threshold=DEFAULT_CONF_THRESHOLD,
+                          iou_threshold=DEFAULT_IOU_THRESHOLD, max_candidates=MAX_CANDIDATES,
+                          max_detections=MAX_DETECTIONS):
+    """
+    Plain-Python post-processing of one frame, row by row.
+    `rows` is a list of prediction rows (e.g. output.reshape(-1, 85).tolist()).
+    """
+    candidates = []
+    for row in rows:
+        objectness = row[4]
+        if objectness <= conf_threshold:
+            continue
+        class_scores = [p * objectness for p in row[5:]]
+        class_id = max(range(len(class_scores)), key=class_scores.__getitem__)
+        score = class_scores[class_id]
+        if score <= conf_threshold:
+            continue
+        cx, cy, w, h = row[:4]
+        box = [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+        candidates.append((score, class_id, box))
+
+    candidates.sort(key=lambda c: -c[0])
+    candidates = candidates[:max_candidates]
+
+    kept = []
+    for score, class_id, box in candidates:
+        if all(k[1] != class_id or _iou(k[2], box) <= iou_threshold for k in kept):
+            kept.append((score, class_id, box))
+
+    return [{
+        'class_id': class_id,
+        'score': round(float(score), 4),
+        'box': [round(min(max(v / input_size, 0.0), 1.0), 4) for v in box],
+    } for score, class_id, box in kept[:max_detections]]
@@ -1,17 +1,20 @@
 // src/components/CameraGrid.jsx
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo } from 'react';
 import VideoFeed from './VideoFeed.jsx';
 import TodayReport from './TodayReport.jsx';
 import { useCameraSocket } from '../hooks/useCamera.js';
-import { FaPlug, FaSpinner, FaVideo } from 'react-icons/fa';
+import { FaPlug, FaSpinner, FaVideo, FaChevronLeft, FaChevronRight } from 'react-icons/fa';
+
+// Number of camera tiles shown per grid page
+const CAMERAS_PER_PAGE = 8;
 
 export default function CameraGrid() {
-    // Data from our simplified hook
-    const { cameraData, incidents, isConnected } = useCameraSocket();
-    
     // State for the camera list itself
     const [cameraList, setCameraList] = useState([]);
     
+    // Current grid page (0-based)
+    const [page, setPage] = useState(0);
+    
     // State for loading and errors
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState(null);
@@ -19,6 +22,25 @@ export default function CameraGrid() {
     // This state will track which camera is "focused". null = grid view.
     const [focusedCameraId, setFocusedCameraId] = useState(null);
 
+    const pageCount = Math.max(1, Math.ceil(cameraList.length / CAMERAS_PER_PAGE));
+    const currentPage = Math.min(page, pageCount - 1);
+    const pagedCameras = cameraList.slice(
+        currentPage * CAMERAS_PER_PAGE,
+        (currentPage + 1) * CAMERAS_PER_PAGE
+    );
+
+    // Only subscribe to what is on screen: the focused camera, or the current page
+    const visibleCamIds = useMemo(() => (
+        focusedCameraId ? [focusedCameraId] : pagedCameras.map(c => c.id)
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+    ), [focusedCameraId, currentPage, cameraList]);
+
+    // Data from our simplified hook. Grid tiles get thumbnails, focus mode gets full size.
+    const { cameraData, incidents, isConnected } = useCameraSocket(
+        visibleCamIds,
+        focusedCameraId ? 'full' : 'thumb'
+    );
+
     // Fetch cameras inside useEffect. Runs once on mount.
     useEffect(() => {
         const getCameras = async () => {
@@ -118,7 +140,28 @@ export default function CameraGrid() {
                     <div className="flex-grow lg:w-3/4">
                         {header}
                         
-                        {/* Pagination Controls (REMOVED) */}
+                        {/* Pagination Controls (only when there is more than one page) */}
+                        {pageCount > 1 && (
+                            <div className="flex items-center justify-end gap-3 mb-4 text-sm text-gray-700">
+                                <button
+                                    onClick={() => setPage(Math.max(0, currentPage - 1))}
+                                    disabled={currentPage === 0}
+                                    className="p-2 rounded bg-gray-200 hover:bg-gray-300 disabled:opacity-50"
+                                    title="Previous page"
+                                >
+                                    <FaChevronLeft />
+                                </button>
+                                <span>Page {currentPage + 1} of {pageCount}</span>
+                                <button
+                                    onClick={() => setPage(Math.min(pageCount - 1, currentPage + 1))}
+                                    disabled={currentPage >= pageCount - 1}
+                                    className="p-2 rounded bg-gray-200 hover:bg-gray-300 disabled:opacity-50"
+                                    title="Next page"
+                                >
+                                    <FaChevronRight />
+                                </button>
+                            </div>
+                        )}
 
                         {/* Show loading spinner only when fetching new pages */}
                         {isLoading && (
@@ -131,13 +174,13 @@ export default function CameraGrid() {
                         {!isLoading && cameraList.length > 0 && (
                             // This grid container stays the same: 1 col on mobile, 2 on desktop
                             <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
-                                {cameraList.map(camera => (
+                                {pagedCameras.map(camera => (
                                     // We wrap the VideoFeed in a div.
                                     // If there is only 1 camera, we tell this div to span 2 columns
                                     // on medium screens, making it fill the grid.
                                     <div 
                                         key={camera.id} 
-                                        className={cameraList.length === 1 ? 'md:col-span-2' : ''}
+                                        className={pagedCameras.length === 1 ? 'md:col-span-2' : ''}
                                     >
                                         <VideoFeed
                                             camId={camera.id}
@@ -2,6 +2,7 @@
 import React, { useState, useEffect } from 'react'; // <-- Added useState and useEffect
 import { FaExclamationTriangle, FaCheckCircle, FaChartBar } from 'react-icons/fa';
 import { fetchDailySummary } from '../services/apiService.js'; // <-- Import the new service function
+import { useEventAcknowledgements } from '../hooks/useEventAcknowledgements';
 
 /**
  * Renders the Today's Incident Log and Activity Summary sidebar.
@@ -9,19 +10,23 @@ import { fetchDailySummary } from '../services/apiService.js'; // <-- Import the
  */
 export default function TodayReport({ incidents, user }) { // <-- Accepts user prop
     
-    // State to hold the fetched 24-hour activity data
+    // State to hold the fetched 24-hour event summary
     const [activityData, setActivityData] = useState([]);
+    const [totalEvents, setTotalEvents] = useState(0);
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState(null);
+    // Bumped when another dashboard acknowledges events, so the summary reloads
+    const [ackVersion, setAckVersion] = useState(0);
+    // Alerts (by event_id) that have been acknowledged since they arrived
+    const [acknowledgedIds, setAcknowledgedIds] = useState(new Set());
+
+    useEventAcknowledgements((payload) => {
+        setAcknowledgedIds(prev => new Set([...prev, ...payload.ids]));
+        setAckVersion(version => version + 1);
+    });
 
     // --- Data Fetching Effect for 24h Summary ---
     useEffect(() => {
-        if (!user || !user.token) {
-            setActivityData([]);
-            setIsLoading(false);
-            return;
-        }
-
         const getDailySummary = async () => {
             setIsLoading(true);
             setError(null);
@@ -29,17 +34,20 @@ export default function TodayReport({ incidents, user }) { // <-- Accepts user p
                 // Call the new API service function
                 const rawData = await fetchDailySummary(); 
                 
-                // --- Data Transformation (Example based on assumed API response) ---
-                const total = rawData.moving_time + rawData.resting_time;
-                const incident_count = incidents.length; // Use real-time count for Incidents
+                // --- Data Transformation (rollup counts from /api/summary/daily) ---
+                const total = rawData.total_events || 0;
+                const percentOf = (value) => `${Math.round((value / total) * 100) || 0}%`;
 
                 const newActivityData = [
-                    { label: 'Mov.', value: rawData.moving_time, percentage: `${Math.round((rawData.moving_time / total) * 100) || 0}%`, color: 'bg-teal-500' },
-                    { label: 'Rest', value: rawData.resting_time, percentage: `${Math.round((rawData.resting_time / total) * 100) || 0}%`, color: 'bg-green-500' },
-                    // Incident is often a separate metric, here we just show count
-                    { label: 'Incid.', value: incident_count, percentage: `${incident_count > 0 ? 5 : 0}%`, color: 'bg-red-500' },
+                    { label: 'Ack.', value: rawData.acknowledged, percentage: percentOf(rawData.acknowledged), color: 'bg-teal-500' },
+                    { label: 'Pending', value: rawData.unacknowledged, percentage: percentOf(rawData.unacknowledged), color: 'bg-red-500' },
+                    // Busiest locations of the day
+                    ...(rawData.by_location || []).slice(0, 3).map((loc) => (
+                        { label: loc.name, value: loc.events, percentage: percentOf(loc.events), color: 'bg-green-500' }
+                    )),
                 ];
 
+                setTotalEvents(total);
                 setActivityData(newActivityData);
 
             } catch (err) {
@@ -50,8 +58,8 @@ export default function TodayReport({ incidents, user }) { // <-- Accepts user p
         };
 
         getDailySummary();
-    // Re-run if user (token) changes or if the real-time incident count changes
-    }, [user, incidents.length]); 
+    // Re-run if user (token) changes, a new real-time incident arrives or events were acknowledged
+    }, [user, incidents.length, ackVersion]); 
 
     
     // --- Determine System Status ---
@@ -72,19 +80,26 @@ export default function TodayReport({ incidents, user }) { // <-- Accepts user p
                     </div>
                 ) : (
                     <div className="space-y-3 max-h-80 overflow-y-auto pr-2">
-                        {incidents.map((incident, index) => (
+                        {incidents.map((incident, index) => {
+                            const isAcknowledged = incident.event_id != null && acknowledgedIds.has(incident.event_id);
+                            return (
                             <div 
                                 key={index} 
-                                className="p-3 bg-red-100 border border-red-400 text-red-800 rounded-lg flex items-start animate-pulse-once"
+                                className={isAcknowledged
+                                    ? "p-3 bg-gray-100 border border-gray-300 text-gray-600 rounded-lg flex items-start"
+                                    : "p-3 bg-red-100 border border-red-400 text-red-800 rounded-lg flex items-start animate-pulse-once"}
                             >
-                                <FaExclamationTriangle className="mt-1 mr-3 flex-shrink-0 text-xl text-red-600" />
+                                {isAcknowledged
+                                    ? <FaCheckCircle className="mt-1 mr-3 flex-shrink-0 text-xl text-teal-600" />
+                                    : <FaExclamationTriangle className="mt-1 mr-3 flex-shrink-0 text-xl text-red-600" />}
                                 <div>
-                                    <p className="font-bold text-base">{incident.type || 'Unknown Incident'}!</p>
+                                    <p className="font-bold text-base">{incident.type || 'Unknown Incident'}{isAcknowledged ? ' (acknowledged)' : '!'}</p>
                                     <p className="text-sm">Location: <span className='font-medium'>{incident.location}</span></p>
                                     <p className="text-xs text-gray-600 mt-1">Time: {new Date(incident.timestamp * 1000).toLocaleTimeString()}</p>
                                 </div>
                             </div>
-                        ))}
+                            );
+                        })}
                     </div>
                 )}
             </div>
@@ -93,7 +108,7 @@ export default function TodayReport({ incidents, user }) { // <-- Accepts user p
             <div className="bg-white p-4 rounded-xl shadow-lg border border-gray-200">
                 <h3 className="text-xl font-bold text-gray-800 mb-4 flex items-center border-b pb-2">
                     <FaChartBar className="mr-2 text-teal-600" />
-                    Activity Summary (24h)
+                    Event Summary (24h)
                 </h3>
 
                 {isLoading && <p className="text-center text-gray-500">Loading summary...</p>}
@@ -117,7 +132,7 @@ export default function TodayReport({ incidents, user }) { // <-- Accepts user p
                         ))}
                     </div>
                 )}
-                <p className="text-xs text-gray-500 mt-4 text-center">Data refreshed daily.</p>
+                <p className="text-xs text-gray-500 mt-4 text-center">{totalEvents} event(s) in the last 24 hours.</p>
             </div>
         </div>
     );
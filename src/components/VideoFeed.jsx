@@ -71,10 +71,10 @@ export default function VideoFeed({
       </div>
     );
   } else {
-    // Case 5: We have data! Show the image from the base64 string.
+    // Case 5: We have data! frameData is a ready-made src (Blob object URL or data: URI).
     content = (
       <img 
-        src={`data:image/jpeg;base64,${frameData}`} 
+        src={frameData} 
         alt={`${location} Feed`}
         className="w-full h-full object-cover"
       />
@@ -1,27 +1,105 @@
 // src/hooks/useCamera.js
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import io from 'socket.io-client';
 
+/**
+ * Turns a 'camera_frame' payload into something an <img> can use as src.
+ * Binary frames (ArrayBuffer) become Blob object URLs; base64 frames from
+ * an older server fall back to a data: URI.
+ */
+const frameToImageSrc = (frame) => {
+    if (typeof frame === 'string') {
+        return `data:image/jpeg;base64,${frame}`;
+    }
+    return URL.createObjectURL(new Blob([frame], { type: 'image/jpeg' }));
+};
+
 /**
  * WebSocket hook to handle connecting to the Flask-SocketIO server 
  * and managing camera and incident data streams.
+ * cameraData maps cam_id -> image src (Blob object URL or data: URI).
+ *
+ * @param {Array<number>} visibleCamIds - Cameras currently on screen. The hook
+ *   subscribes to exactly these (and unsubscribes from the rest), so the server
+ *   only sends frames this client will display.
+ * @param {string} rendition - 'thumb' for grid tiles, 'full' for the focused view.
  */
-export const useCameraSocket = () => {
+export const useCameraSocket = (visibleCamIds = [], rendition = 'thumb') => {
     const [cameraData, setCameraData] = useState({});
     const [incidents, setIncidents] = useState([]);
     const [isConnected, setIsConnected] = useState(false);
 
+    // Last object URL per camera, so the previous frame can be revoked
+    const objectUrlsRef = useRef({});
+
+    const socketRef = useRef(null);
+    const wantedCamIdsRef = useRef(new Set());     // What the UI wants to show
+    const wantedRenditionRef = useRef(rendition);  // ...and at which size
+    const subscribedCamIdsRef = useRef(new Map()); // cam_id -> rendition the server sends us
+
+    // Sends subscribe/unsubscribe for the difference between wanted and subscribed cameras
+    const syncSubscriptions = useCallback(() => {
+        const socket = socketRef.current;
+        if (!socket || !socket.connected) {
+            return;
+        }
+
+        const wanted = wantedCamIdsRef.current;
+        const wantedRendition = wantedRenditionRef.current;
+        const subscribed = subscribedCamIdsRef.current;
+        // New cameras, plus cameras we get at the wrong size (grid <-> focus)
+        const toSubscribe = [...wanted].filter(id => subscribed.get(id) !== wantedRendition);
+        const toUnsubscribe = [...subscribed.keys()].filter(id => !wanted.has(id));
+
+        if (toSubscribe.length > 0) {
+            socket.emit('subscribe', { cam_ids: toSubscribe, rendition: wantedRendition });
+        }
+        if (toUnsubscribe.length > 0) {
+            socket.emit('unsubscribe', { cam_ids: toUnsubscribe });
+
+            // Drop the frames of cameras that left the screen
+            toUnsubscribe.forEach(id => {
+                if (objectUrlsRef.current[id]) {
+                    URL.revokeObjectURL(objectUrlsRef.current[id]);
+                    delete objectUrlsRef.current[id];
+                }
+            });
+            setCameraData(prev => {
+                const next = { ...prev };
+                toUnsubscribe.forEach(id => delete next[id]);
+                return next;
+            });
+        }
+
+        subscribedCamIdsRef.current = new Map([...wanted].map(id => [id, wantedRendition]));
+    }, []);
+
+    // Re-sync whenever the visible cameras or the wanted rendition change (paging, focus)
+    const visibleKey = [...visibleCamIds].sort((a, b) => a - b).join(',');
+    useEffect(() => {
+        wantedCamIdsRef.current = new Set(visibleCamIds);
+        wantedRenditionRef.current = rendition;
+        syncSubscriptions();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [visibleKey, rendition, syncSubscriptions]);
+
     // This useEffect only handles the socket connection.
     useEffect(() => {
         // Connect directly to the Flask server on port 5000.
+        // Ask for binary frames; the server confirms via 'stream_options'.
         const socket = io('http://localhost:5000', { 
             path: '/socket.io', 
-            transports: ['websocket', 'polling'] 
+            transports: ['websocket', 'polling'],
+            auth: { frame_transport: 'binary' }
         });
+        socketRef.current = socket;
 
         socket.on('connect', () => {
             console.log('SocketIO: Connected to Flask server');
             setIsConnected(true);
+            // A (re)connect starts with no subscriptions on the server
+            subscribedCamIdsRef.current = new Map();
+            syncSubscriptions();
         });
 
         socket.on('disconnect', () => {
@@ -29,11 +107,32 @@ export const useCameraSocket = () => {
             setIsConnected(false);
         });
 
+        socket.on('stream_options', (options) => {
+            console.log(`SocketIO: Frame transport is '${options.frame_transport}'`);
+        });
+
         // 1. Video Frame Stream
         socket.on('camera_frame', (data) => {
+            // Ignore a late frame for a camera we just unsubscribed from
+            if (!wantedCamIdsRef.current.has(data.cam_id)) {
+                return;
+            }
+            const src = frameToImageSrc(data.frame);
+
+            // Free the Blob behind the frame we are replacing
+            const previousUrl = objectUrlsRef.current[data.cam_id];
+            if (previousUrl) {
+                URL.revokeObjectURL(previousUrl);
+            }
+            if (src.startsWith('blob:')) {
+                objectUrlsRef.current[data.cam_id] = src;
+            } else {
+                delete objectUrlsRef.current[data.cam_id];
+            }
+
             setCameraData(prev => ({
                 ...prev,
-                [data.cam_id]: data.frame
+                [data.cam_id]: src
             }));
         });
 
@@ -50,8 +149,11 @@ export const useCameraSocket = () => {
         return () => {
             console.log('SocketIO: Cleaning up socket connection...');
             socket.disconnect();
+            socketRef.current = null;
+            Object.values(objectUrlsRef.current).forEach(url => URL.revokeObjectURL(url));
+            objectUrlsRef.current = {};
         };
-    }, []); // Empty dependency array = runs once on mount
+    }, [syncSubscriptions]); // syncSubscriptions is stable, so this runs once on mount
 
     // Return only the live data
     return { cameraData, incidents, isConnected };
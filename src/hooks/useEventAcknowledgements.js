@@ -0,0 +1,27 @@
+// src/hooks/useEventAcknowledgements.js
+import { useEffect, useRef } from 'react';
+import { socket } from '../socket';
+
+/**
+ * Calls onAcknowledged(payload) whenever event logs are acknowledged on any
+ * dashboard. The server broadcasts 'events_acknowledged' with
+ * { ids, ack_by_user_id, ack_by_username, timestamp } after every single
+ * or bulk acknowledge.
+ */
+export const useEventAcknowledgements = (onAcknowledged) => {
+    // Keep the newest callback without re-subscribing on every render
+    const callbackRef = useRef(onAcknowledged);
+    callbackRef.current = onAcknowledged;
+
+    useEffect(() => {
+        const handleAcknowledged = (payload) => {
+            if (payload && Array.isArray(payload.ids)) {
+                callbackRef.current(payload);
+            }
+        };
+        socket.on('events_acknowledged', handleAcknowledged);
+        return () => {
+            socket.off('events_acknowledged', handleAcknowledged);
+        };
+    }, []);
+};
@@ -3,15 +3,23 @@
  * This component fetches real event logs from the apiService
  * and displays them in a table format.
  */
-import React, { useState, useEffect } from 'react';
-import { fetchReportsData } from '../services/apiService';
-import { FaFileAlt, FaSpinner, FaExclamationTriangle, FaArrowRight } from 'react-icons/fa';
+import React, { useState, useEffect, useCallback } from 'react';
+import { fetchReportsData, downloadEventLogs, fetchEventClipUrl, acknowledgeEvents } from '../services/apiService';
+import { useEventAcknowledgements } from '../hooks/useEventAcknowledgements';
+import { FaFileAlt, FaSpinner, FaExclamationTriangle, FaArrowRight, FaDownload, FaCheck } from 'react-icons/fa';
 
 export default function ReportsPage() {
     const [logs, setLogs] = useState([]);
     const [isLoading, setIsLoading] = useState(true);
     const [error, setError] = useState(null);
     const [limit, setLimit] = useState(20);
+    // Cursor of the next page (null when everything is loaded)
+    const [nextCursor, setNextCursor] = useState(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    const [isExporting, setIsExporting] = useState(false);
+    // Unacknowledged logs ticked for a bulk acknowledge
+    const [selectedIds, setSelectedIds] = useState(new Set());
+    const [isAcknowledging, setIsAcknowledging] = useState(false);
 
     // NEW STATE: For Date Range Filtering
     const [startDate, setStartDate] = useState(''); 
@@ -28,6 +36,8 @@ export default function ReportsPage() {
                 
                 if (data.status === 'success' && Array.isArray(data.report)) {
                     setLogs(data.report);
+                    setSelectedIds(new Set());
+                    setNextCursor(data.next_cursor || null);
                 } else {
                     throw new Error(data.message || 'Failed to fetch report data');
                 }
@@ -42,11 +52,110 @@ export default function ReportsPage() {
         loadReportData(); 
     }, [limit, startDate, endDate]);
 
-    // Placeholder function for handling the file link click
-    const handleFileClick = (filePath) => {
-        console.log(`File path clicked: ${filePath}`);
-        // TODO: Implement actual logic here (e.g., open file preview, download)
-        alert(`Simulating file view/download for: ${filePath}`);
+    // Appends the next page of logs after the ones already shown
+    const loadMore = async () => {
+        if (!nextCursor || isLoadingMore) return;
+        try {
+            setIsLoadingMore(true);
+            const data = await fetchReportsData(limit, startDate, endDate, nextCursor);
+
+            if (data.status === 'success' && Array.isArray(data.report)) {
+                setLogs(prev => [...prev, ...data.report]);
+                setNextCursor(data.next_cursor || null);
+            } else {
+                throw new Error(data.message || 'Failed to fetch report data');
+            }
+        } catch (err) {
+            console.error("Error fetching more report data:", err);
+            setError(err.message);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
+    // Downloads every log in the selected date range (not just the loaded pages)
+    const handleExport = async (format) => {
+        try {
+            setIsExporting(true);
+            await downloadEventLogs(format, startDate, endDate);
+        } catch (err) {
+            console.error("Error exporting event logs:", err);
+            alert(`Export failed: ${err.message}`);
+        } finally {
+            setIsExporting(false);
+        }
+    };
+
+    // Marks loaded logs as acknowledged (the username arrives with the socket update)
+    const markAcknowledged = useCallback((ids, username) => {
+        const acked = new Set(ids);
+        setLogs(prev => prev.map(log => acked.has(log.id)
+            ? { ...log, status: 'acknowledged', acknowledged_by_username: username || log.acknowledged_by_username }
+            : log
+        ));
+        setSelectedIds(prev => new Set([...prev].filter(id => !acked.has(id))));
+    }, []);
+
+    // Acknowledgements made on any dashboard (including this one) update the table live
+    useEventAcknowledgements((payload) => markAcknowledged(payload.ids, payload.ack_by_username));
+
+    const toggleSelected = (logId) => {
+        setSelectedIds(prev => {
+            const next = new Set(prev);
+            if (next.has(logId)) {
+                next.delete(logId);
+            } else {
+                next.add(logId);
+            }
+            return next;
+        });
+    };
+
+    const pendingIds = logs.filter(log => log.status === 'unacknowledged').map(log => log.id);
+    const allPendingSelected = pendingIds.length > 0 && pendingIds.every(id => selectedIds.has(id));
+
+    const toggleAllPending = () => {
+        setSelectedIds(allPendingSelected ? new Set() : new Set(pendingIds));
+    };
+
+    // One request for all ticked logs (the server caps it at 1000 ids)
+    const handleAcknowledgeSelected = async () => {
+        if (selectedIds.size === 0 || isAcknowledging) return;
+        try {
+            setIsAcknowledging(true);
+            const data = await acknowledgeEvents([...selectedIds]);
+            if (data.status !== 'success') {
+                throw new Error(data.message || 'Failed to acknowledge events');
+            }
+            markAcknowledged(
+                data.results.filter(r => r.result !== 'not_found').map(r => r.id)
+            );
+        } catch (err) {
+            console.error("Error acknowledging events:", err);
+            alert(`Acknowledge failed: ${err.message}`);
+        } finally {
+            setIsAcknowledging(false);
+        }
+    };
+
+    // Opens the event's clip in a new tab (the server streams it with Range support).
+    // The tab is opened right away, inside the click, so popup blockers allow it;
+    // it is pointed at the clip once the short-lived link arrives.
+    const handleFileClick = async (logId) => {
+        const clipWindow = window.open('', '_blank');
+        if (clipWindow) clipWindow.opener = null;
+        try {
+            const url = await fetchEventClipUrl(logId);
+            if (clipWindow) {
+                clipWindow.location.href = url;
+            } else {
+                window.location.href = url;
+            }
+        } catch (err) {
+            if (clipWindow) clipWindow.close();
+            console.error("Error opening clip:", err);
+            alert(`Could not open the clip: ${err.message}`);
+        }
     };
 
     const renderContent = () => {
@@ -82,6 +191,16 @@ export default function ReportsPage() {
                 <table className="min-w-full divide-y divide-gray-200 bg-white">
                     <thead className="bg-gray-50">
                         <tr>
+                            <th scope="col" className="px-4 py-3 text-left">
+                                <input
+                                    type="checkbox"
+                                    checked={allPendingSelected}
+                                    disabled={pendingIds.length === 0}
+                                    onChange={toggleAllPending}
+                                    title="Select all pending events"
+                                    className="h-4 w-4 accent-teal-600"
+                                />
+                            </th>
                             <th scope="col" className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
                                 Timestamp
                             </th>
@@ -109,6 +228,15 @@ export default function ReportsPage() {
                     <tbody className="bg-white divide-y divide-gray-200">
                         {logs.map((log) => (
                             <tr key={log.id} className="hover:bg-teal-100 transition duration-150">
+                                <td className="px-4 py-4">
+                                    <input
+                                        type="checkbox"
+                                        checked={selectedIds.has(log.id)}
+                                        disabled={log.status !== 'unacknowledged'}
+                                        onChange={() => toggleSelected(log.id)}
+                                        className="h-4 w-4 accent-teal-600"
+                                    />
+                                </td>
                                 <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-700">
                                     {new Date(log.timestamp).toLocaleString()}
                                 </td>
@@ -142,7 +270,7 @@ export default function ReportsPage() {
                                             href="#"
                                             onClick={(e) => {
                                                 e.preventDefault(); // Prevent default link behavior
-                                                handleFileClick(log.file_path);
+                                                handleFileClick(log.id);
                                             }}
                                             className="flex items-center text-teal-600 hover:text-teal-800 font-medium transition duration-150 ease-in-out"
                                             title={log.file_path} // Show full path on hover
@@ -158,6 +286,18 @@ export default function ReportsPage() {
                         ))}
                     </tbody>
                 </table>
+                {nextCursor && (
+                    <div className="flex justify-center p-4 bg-gray-50 border-t border-gray-200">
+                        <button
+                            onClick={loadMore}
+                            disabled={isLoadingMore}
+                            className="flex items-center px-4 py-2 text-sm font-medium text-white bg-teal-600 rounded-lg hover:bg-teal-700 disabled:opacity-50 transition duration-150"
+                        >
+                            {isLoadingMore && <FaSpinner className="animate-spin mr-2" />}
+                            {isLoadingMore ? 'Loading...' : 'Load more'}
+                        </button>
+                    </div>
+                )}
             </div>
         );
     };
@@ -223,6 +363,31 @@ export default function ReportsPage() {
                         <option value={100}>100</option>
                     </select>
                 </div>
+
+                {/* Acknowledge the ticked logs */}
+                <button
+                    onClick={handleAcknowledgeSelected}
+                    disabled={selectedIds.size === 0 || isAcknowledging}
+                    className="flex items-center px-3 py-2 text-sm font-medium text-white bg-teal-600 rounded-lg hover:bg-teal-700 disabled:opacity-50 transition duration-150"
+                >
+                    {isAcknowledging ? <FaSpinner className="animate-spin mr-2" /> : <FaCheck className="mr-2" />}
+                    Acknowledge selected ({selectedIds.size})
+                </button>
+
+                {/* Export the whole date range */}
+                <div className="flex items-center space-x-2">
+                    {['csv', 'ndjson'].map((format) => (
+                        <button
+                            key={format}
+                            onClick={() => handleExport(format)}
+                            disabled={isExporting}
+                            className="flex items-center px-3 py-2 text-sm font-medium text-teal-700 border border-teal-600 rounded-lg hover:bg-teal-50 disabled:opacity-50 transition duration-150"
+                        >
+                            <FaDownload className="mr-2" />
+                            {format.toUpperCase()}
+                        </button>
+                    ))}
+                </div>
             </div>
             
             <div className="bg-white p-6 rounded-xl shadow-lg border border-gray-200">
@@ -103,7 +103,7 @@ export const fetchCameraList = () => {
     return fetchApi('/camera_status', 'GET');
 }
 
-// Fetch daily summary data for DashboardPage
+// Fetch the 24h event summary (hourly rollups) for TodayReport
 export const fetchDailySummary = () => {
     return fetchApi('/summary/daily', 'GET');
 };
@@ -114,7 +114,7 @@ export const fetchDailySummary = () => {
  * @param {string} startDate - Optional start date for filtering (format: YYYY-MM-DD).
  * @param {string} endDate - Optional end date for filtering (format: YYYY-MM-DD).
  */
-export const fetchReportsData = (limit, startDate, endDate) => {
+export const fetchReportsData = (limit, startDate, endDate, cursor = null) => {
     
     // Start with the base query parameters for limit
     const params = new URLSearchParams({
@@ -131,11 +131,69 @@ export const fetchReportsData = (limit, startDate, endDate) => {
         params.append('end_date', endDate);
     }
 
+    // Continue after the previous page (the 'next_cursor' the server returned)
+    if (cursor) {
+        params.append('cursor', cursor);
+    }
+
     // Construct the final URL with all parameters
     // The resulting URL will look like: /event_logs?limit=20&start_date=2025-01-01
     return fetchApi(`/event_logs?${params.toString()}`, 'GET');
 };
 
+// Acknowledge many event logs at once: pass an array of ids, or a filter
+// object such as { cam_id: 3, start: '2025-11-17T08:00:00', end: '...' }
+export const acknowledgeEvents = (idsOrFilter) => {
+    const body = Array.isArray(idsOrFilter) ? { ids: idsOrFilter } : idsOrFilter;
+    return fetchApi('/event_logs/acknowledge', 'POST', body);
+};
+
+// Short-lived URL of an event's clip, usable directly as a <video> or link src
+// (media elements can't send headers, so the server signs a token for this
+// clip only; the access token never goes in a URL)
+export const fetchEventClipUrl = async (logId) => {
+    const data = await fetchApi(`/event_logs/${logId}/clip_url`, 'POST');
+    if (data.status !== 'success' || !data.url) {
+        throw new Error(data.message || 'Could not get the clip link');
+    }
+    return data.url;
+};
+
+// Download the event logs in a date range as a CSV or NDJSON file
+// (the server streams the file, so large ranges are fine)
+export const downloadEventLogs = async (format, startDate, endDate) => {
+    const params = new URLSearchParams({ format });
+    if (startDate) {
+        params.append('start_date', startDate);
+    }
+    if (endDate) {
+        params.append('end_date', endDate);
+    }
+
+    const token = localStorage.getItem(AUTH_TOKEN_KEY);
+    const response = await fetch(`${BASE_API_URL}/event_logs/export?${params.toString()}`, {
+        headers: token ? { 'Authorization': `Bearer ${token}` } : {},
+    });
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.message || errorData.msg || `Export failed with status ${response.status}`);
+    }
+
+    // Use the server's file name, then let the browser save the file
+    const disposition = response.headers.get('content-disposition') || '';
+    const match = disposition.match(/filename="([^"]+)"/);
+    const filename = match ? match[1] : `event_logs.${format}`;
+
+    const blobUrl = URL.createObjectURL(await response.blob());
+    const link = document.createElement('a');
+    link.href = blobUrl;
+    link.download = filename;
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+    URL.revokeObjectURL(blobUrl);
+};
+
 // Fetch user profile data
 export const fetchUserProfile = () => {
     return fetchApi('/user/profile', 'GET');